@@ -0,0 +1,303 @@
+"""
+Archives de parties : format binaire compact, fichiers en ajout seul, et rejeu
+
+Une partie est enregistrée par son paquet mélangé, les rôles, les cartes choisies lors des échanges et la
+suite des actions, le tout en demi-octets (quelques dizaines d'octets par partie).
+Une archive est faite de deux fichiers :
+- {chemin}.parties : les enregistrements bout à bout
+- {chemin}.index : un enregistrement de taille fixe par partie (position, taille, classement, rôles),
+  que l'on peut parcourir via mmap sans décoder les parties
+"""
+import mmap
+import struct
+from array import array
+from pathlib import Path
+
+from president_game.player import Player
+
+# Version 2 : nombre de cartes sur 16 bits et poses de plus de 14 cartes (plusieurs paquets)
+VERSION = 2
+
+# Codes des rôles (les rôles inconnus deviennent "Autre")
+ROLES = ["Neutre", "Trou", "Prez", "Vice-Trou", "Vice-Prez"]
+CODE_ROLE_AUTRE = 15
+CODES_ROLES = {role: code for code, role in enumerate(ROLES)}
+
+# Actions : un entier sur 16 bits en mémoire (array "H"), (nb_cartes << 4) | rang pour une pose
+ACTION_RIEN = 0x0000
+ACTION_TRICHE = 0xFFFF
+TYPECODE_ACTIONS = "H"
+# Dans l'enregistrement, une pose de 1 à 14 cartes tient en deux demi-octets (nb_cartes, rang).
+# DEMI_OCTET_ECHAPPEMENT est suivi d'un octet : 0 pour une triche, sinon le nombre de cartes puis le rang
+DEMI_OCTET_ECHAPPEMENT = 15
+MAX_CARTES_POSE = 255
+MAX_RANGS_CARTES = 16
+
+ENTETE = struct.Struct("<BBBHH")  # version, nb_joueurs, nb_rangs_cartes, nb_cartes, nb_actions
+# Classement et rôles de taille fixe dans l'index : une archive refuse les tables plus grandes
+MAX_JOUEURS_INDEX = 16
+INDEX = struct.Struct(f"<QHBB{MAX_JOUEURS_INDEX}s{MAX_JOUEURS_INDEX}s")
+PAS_DE_JOUEUR = 0xFF
+
+
+def code_action(pose: list[int]) -> int:
+    if not pose:
+        return ACTION_RIEN
+    return (len(pose) << 4) | pose[0]
+
+
+def actions_vides() -> array:
+    return array(TYPECODE_ACTIONS)
+
+
+def code_role(role: str) -> int:
+    return CODES_ROLES.get(role, CODE_ROLE_AUTRE)
+
+
+def nom_role(code: int) -> str:
+    return ROLES[code] if code < len(ROLES) else "Autre"
+
+
+def empaqueter(demi_octets: list[int]) -> bytes:
+    if len(demi_octets) % 2:
+        demi_octets = demi_octets + [0]
+    return bytes((demi_octets[i] << 4) | demi_octets[i + 1] for i in range(0, len(demi_octets), 2))
+
+
+def depaqueter(donnees, nb) -> list[int]:
+    demi_octets = []
+    for octet in donnees:
+        demi_octets.append(octet >> 4)
+        demi_octets.append(octet & 0x0F)
+    return demi_octets[:nb]
+
+
+class EnregistrementPartie:
+    """
+    :param actions: un code par tour (voir code_action), ACTION_TRICHE pour un coup refusé
+    :param classement: classement final (non encodé dans l'enregistrement, il est dans l'index)
+    """
+    __slots__ = ("nb_joueurs", "nb_rangs_cartes", "cards_shuffled", "role_players", "choix_echanges", "actions",
+                 "classement")
+
+    def __init__(self, nb_joueurs, nb_rangs_cartes, cards_shuffled, role_players, choix_echanges, actions,
+                 classement=None):
+        self.nb_joueurs = nb_joueurs
+        self.nb_rangs_cartes = nb_rangs_cartes
+        self.cards_shuffled = cards_shuffled
+        self.role_players = role_players
+        self.choix_echanges = choix_echanges
+        self.actions = actions
+        self.classement = classement
+
+    def to_bytes(self) -> bytes:
+        """
+        :raises ValueError: rangs ou poses trop grands pour le format
+        """
+        if self.nb_rangs_cartes > MAX_RANGS_CARTES:
+            raise ValueError(f"Au plus {MAX_RANGS_CARTES} rangs par enregistrement : {self.nb_rangs_cartes}")
+        demi_octets_actions = []
+        for action in self.actions:
+            if action == ACTION_RIEN:
+                demi_octets_actions.append(0)
+            elif action == ACTION_TRICHE:
+                demi_octets_actions.extend((DEMI_OCTET_ECHAPPEMENT, 0, 0))
+            else:
+                nb_cartes = action >> 4
+                if nb_cartes < DEMI_OCTET_ECHAPPEMENT:
+                    demi_octets_actions.extend((nb_cartes, action & 0x0F))
+                elif nb_cartes <= MAX_CARTES_POSE:
+                    demi_octets_actions.extend(
+                        (DEMI_OCTET_ECHAPPEMENT, nb_cartes >> 4, nb_cartes & 0x0F, action & 0x0F)
+                    )
+                else:
+                    raise ValueError(f"Pose de {nb_cartes} cartes : au plus {MAX_CARTES_POSE} par enregistrement")
+        return b"".join([
+            ENTETE.pack(VERSION, self.nb_joueurs, self.nb_rangs_cartes, len(self.cards_shuffled), len(self.actions)),
+            empaqueter([code_role(role) for role in self.role_players]),
+            empaqueter(list(self.cards_shuffled)),
+            bytes([len(self.choix_echanges)]),
+            empaqueter(list(self.choix_echanges)),
+            empaqueter(demi_octets_actions),
+        ])
+
+    @classmethod
+    def from_bytes(cls, donnees, classement=None) -> "EnregistrementPartie":
+        version = donnees[0]
+        if version != VERSION:
+            raise ValueError(f"Version d'enregistrement inconnue : {version}")
+        _, nb_joueurs, nb_rangs_cartes, nb_cartes, nb_actions = ENTETE.unpack_from(donnees)
+        position = ENTETE.size
+        taille = (nb_joueurs + 1) // 2
+        role_players = [nom_role(code) for code in depaqueter(donnees[position: position + taille], nb_joueurs)]
+        position += taille
+        taille = (nb_cartes + 1) // 2
+        cards_shuffled = depaqueter(donnees[position: position + taille], nb_cartes)
+        position += taille
+        nb_choix = donnees[position]
+        position += 1
+        taille = (nb_choix + 1) // 2
+        choix_echanges = depaqueter(donnees[position: position + taille], nb_choix)
+        position += taille
+
+        demi_octets = depaqueter(donnees[position:], 2 * (len(donnees) - position))
+        actions = actions_vides()
+        i = 0
+        while len(actions) < nb_actions:
+            demi_octet = demi_octets[i]
+            if demi_octet == 0:
+                actions.append(ACTION_RIEN)
+            elif demi_octet != DEMI_OCTET_ECHAPPEMENT:
+                i += 1
+                actions.append((demi_octet << 4) | demi_octets[i])
+            else:
+                nb_cartes = (demi_octets[i + 1] << 4) | demi_octets[i + 2]
+                i += 2
+                if nb_cartes == 0:
+                    actions.append(ACTION_TRICHE)
+                else:
+                    i += 1
+                    actions.append((nb_cartes << 4) | demi_octets[i])
+            i += 1
+        return cls(nb_joueurs, nb_rangs_cartes, cards_shuffled, role_players, choix_echanges, actions, classement)
+
+
+class JoueurRejoue(Player):
+    """
+    Rejoue les actions et les échanges enregistrés. Tous les joueurs d'une partie rejouée partagent
+    le même itérateur d'actions, le moteur les appelant dans l'ordre du jeu.
+    """
+    trusted = True
+
+    def __init__(self, actions, choix_echanges):
+        self.actions = actions
+        self.choix_echanges = choix_echanges
+
+    def get_name(self):
+        return "Rejoue"
+
+    def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        action = next(self.actions)
+        if action == ACTION_RIEN:
+            return []
+        if action == ACTION_TRICHE:
+            # N'importe quelle carte absente de la main est refusée comme à l'origine
+            return [-1]
+        return [action & 0x0F] * (action >> 4)
+
+    def give_cards_prez_to_trou(self, main):
+        return self.choix_echanges[:2]
+
+    def give_card_vice_prez_to_vice_trou(self, main):
+        return self.choix_echanges[2]
+
+
+class ArchiveParties:
+    """
+    Ecriture d'une archive, en ajout seul
+    """
+    def __init__(self, chemin):
+        self.chemin = Path(chemin)
+        self.fichier_parties = open(self.chemin.with_suffix(".parties"), "ab")
+        self.fichier_index = open(self.chemin.with_suffix(".index"), "ab")
+
+    def ajouter(self, enregistrement: EnregistrementPartie):
+        """
+        :raises ValueError: plus de MAX_JOUEURS_INDEX joueurs, ou enregistrement trop grand pour le format
+        """
+        nb_joueurs = enregistrement.nb_joueurs
+        if nb_joueurs > MAX_JOUEURS_INDEX:
+            raise ValueError(f"Au plus {MAX_JOUEURS_INDEX} joueurs par partie archivée : {nb_joueurs}")
+        donnees = enregistrement.to_bytes()
+        position = self.fichier_parties.tell()
+        self.fichier_parties.write(donnees)
+        classement = bytes(enregistrement.classement or []).ljust(MAX_JOUEURS_INDEX, bytes([PAS_DE_JOUEUR]))
+        roles = bytes(code_role(role) for role in enregistrement.role_players).ljust(
+            MAX_JOUEURS_INDEX, bytes([PAS_DE_JOUEUR])
+        )
+        self.fichier_index.write(INDEX.pack(position, len(donnees), nb_joueurs, 0, classement, roles))
+
+    def fermer(self):
+        self.fichier_parties.close()
+        self.fichier_index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+class LecteurArchive:
+    """
+    Lecture d'une archive par mmap : l'index se parcourt sans décoder les parties
+    """
+    def __init__(self, chemin):
+        self.chemin = Path(chemin)
+        self.mmap_parties = self.ouvrir(self.chemin.with_suffix(".parties"))
+        self.mmap_index = self.ouvrir(self.chemin.with_suffix(".index"))
+
+    @staticmethod
+    def ouvrir(chemin):
+        with open(chemin, "rb") as fichier:
+            # Un fichier vide ne peut pas être projeté en mémoire
+            if fichier.seek(0, 2) == 0:
+                return b""
+            return mmap.mmap(fichier.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self.mmap_index) // INDEX.size
+
+    def entree_index(self, i):
+        position, taille, nb_joueurs, _, classement, roles = INDEX.unpack_from(self.mmap_index, i * INDEX.size)
+        return position, taille, list(classement[:nb_joueurs]), [nom_role(code) for code in roles[:nb_joueurs]]
+
+    def __getitem__(self, i) -> EnregistrementPartie:
+        position, taille, classement, _ = self.entree_index(i)
+        return EnregistrementPartie.from_bytes(self.mmap_parties[position: position + taille], classement)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def index_numpy(self):
+        """
+        L'index sous forme de tableau NumPy structuré, sans copie
+        """
+        import numpy as np
+
+        dtype = np.dtype([
+            ("position", "<u8"),
+            ("taille", "<u2"),
+            ("nb_joueurs", "u1"),
+            ("reserve", "u1"),
+            ("classement", "u1", MAX_JOUEURS_INDEX),
+            ("roles", "u1", MAX_JOUEURS_INDEX),
+        ])
+        return np.frombuffer(self.mmap_index, dtype=dtype, count=len(self))
+
+    def gagnees_par_role(self, role: str):
+        """
+        Indices des parties gagnées par le joueur qui avait ce rôle
+        """
+        code = code_role(role)
+        try:
+            import numpy as np
+        except ImportError:
+            return [
+                i for i, (_, _, _, _, classement, roles) in enumerate(INDEX.iter_unpack(self.mmap_index))
+                if roles[classement[0]] == code
+            ]
+        index = self.index_numpy()
+        return np.flatnonzero(index["roles"][np.arange(len(index)), index["classement"][:, 0]] == code)
+
+    def fermer(self):
+        for donnees in (self.mmap_parties, self.mmap_index):
+            if isinstance(donnees, mmap.mmap):
+                donnees.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
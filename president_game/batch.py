@@ -0,0 +1,457 @@
+"""
+Moteur vectorisé : simule N parties à la fois avec NumPy
+
+Chaque partie est représentée par des tableaux (nombre de cartes par rang pour chaque joueur,
+dessus du plateau, risque_saut, counter_same_card, révolution, joueurs pas finis / en jeu...) et toutes
+les parties avancent d'un tour en même temps.
+Les joueurs DumbPlayer et AggressivePlayer sont vectorisés, les autres Player sont appelés
+partie par partie en Python, avec le même timeout que dans Partie.
+Le classement final est identique à celui de Partie.play_whole_game_from_cards pour les mêmes donnes.
+
+Sur un cœur, avec DumbPlayer et AggressivePlayer à 4 joueurs, le lot va environ 25 à 35 fois plus vite que
+Partie (environ 25 000 parties par seconde contre 900) : voir moteur_batch dans benchmarks.py. Le coût restant
+est celui des opérations NumPy de chaque tour, appliquées à toutes les parties encore en cours.
+"""
+import concurrent.futures
+import logging
+
+import numpy as np
+
+from president_game.coups import NB_COULEURS
+from president_game.execution import ExecutionJoueurs
+from president_game.player import Player, DumbPlayer, AggressivePlayer
+from president_game.utils import convert_dict_to_sorted_hand
+
+logger = logging.getLogger(__name__)
+
+# Codes des politiques vectorisées
+POLITIQUE_PYTHON = 0
+POLITIQUE_DUMB = 1
+POLITIQUE_AGGRESSIVE = 2
+POLITIQUES_VECTORISEES = {
+    DumbPlayer: POLITIQUE_DUMB,
+    AggressivePlayer: POLITIQUE_AGGRESSIVE,
+}
+
+ROLES_ECHANGE = {"Trou", "Prez", "Vice-Trou", "Vice-Prez"}
+
+
+def code_politique(player: Player) -> int:
+    # On ne vectorise que les classes exactes : une sous-classe peut changer la stratégie
+    return POLITIQUES_VECTORISEES.get(type(player), POLITIQUE_PYTHON)
+
+
+def melanger_lot(nb_parties, nb_rangs_cartes=13, rng=None, nb_paquets=1) -> np.ndarray:
+    """
+    Renvoie nb_parties paquets mélangés, au même format que Partie.cards_shuffled
+    """
+    rng = np.random.default_rng(rng)
+    paquet = np.repeat(np.arange(nb_rangs_cartes, dtype=np.int8), NB_COULEURS * nb_paquets)
+    return rng.permuted(np.tile(paquet, (nb_parties, 1)), axis=1)
+
+
+class ResultatsLot:
+    # classement[g] : indices des joueurs du premier au dernier (-1 si la partie n'a pas abouti)
+    classement: np.ndarray
+    # False si la partie n'a pas été jouée jusqu'au bout
+    valide: np.ndarray
+    nb_tours: np.ndarray
+    # timeouts[g, siege] : nombre de timeouts du joueur du siège (joueurs appelés en Python)
+    timeouts: np.ndarray
+
+    def __init__(self, nb_parties, nb_joueurs):
+        self.classement = np.full((nb_parties, nb_joueurs), -1, dtype=np.int8)
+        self.valide = np.zeros(nb_parties, dtype=bool)
+        self.nb_tours = np.zeros(nb_parties, dtype=np.int32)
+        self.timeouts = np.zeros((nb_parties, nb_joueurs), dtype=np.int16)
+
+    def __len__(self):
+        return len(self.valide)
+
+
+class BatchPartie:
+    """
+    Lot de parties jouées simultanément
+
+    :param players: liste de nb_joueurs Player communs à toutes les parties,
+    ou liste de nb_parties listes de Player
+    :param role_players: liste de rôles commune, ou une liste de rôles par partie
+    :param cards_shuffled: tableau (nb_parties, nb_cartes) des paquets mélangés
+    :param nb_paquets: nombre de paquets mélangés ensemble, comme pour Partie
+    :param timeout_players, execution_joueurs: comme pour Partie, pour les joueurs appelés en Python
+    """
+    nb_parties: int
+    nb_joueurs: int
+    nb_rangs_cartes: int
+
+    def __init__(
+        self,
+        cards_shuffled,
+        players,
+        role_players=None,
+        nb_rangs_cartes=13,
+        nb_paquets=1,
+        timeout_players=3,
+        execution_joueurs=None,
+    ):
+        self.timeout_players = timeout_players
+        # Threads des joueurs Python : partagés si fournis, sinon fermés à la fin de play_all_games
+        self.execution_joueurs = execution_joueurs
+        self.cards_shuffled = np.asarray(cards_shuffled, dtype=np.int64)
+        self.nb_parties, nb_cartes = self.cards_shuffled.shape
+        self.nb_rangs_cartes = nb_rangs_cartes
+        self.nb_exemplaires = NB_COULEURS * nb_paquets
+
+        # Mêmes joueurs pour toutes les parties : leurs politiques ne sont calculées qu'une fois
+        communs = bool(players) and isinstance(players[0], Player)
+        if communs:
+            players = [players] * self.nb_parties
+        self.players = [list(el) for el in players]
+        self.nb_joueurs = len(self.players[0])
+        if len(self.players) != self.nb_parties or any(len(el) != self.nb_joueurs for el in self.players):
+            raise ValueError("Il faut autant de listes de joueurs que de parties, de même taille")
+
+        if role_players is None:
+            role_players = default_roles(self.nb_joueurs)
+        if role_players and isinstance(role_players[0], str):
+            role_players = [role_players] * self.nb_parties
+        self.role_players = [list(el) for el in role_players]
+
+        if communs:
+            self.politiques = np.tile(
+                np.array([code_politique(player) for player in self.players[0]], dtype=np.int8),
+                (self.nb_parties, 1),
+            )
+        else:
+            self.politiques = np.array(
+                [[code_politique(player) for player in players_partie] for players_partie in self.players],
+                dtype=np.int8,
+            )
+        self.counts = self.distribute_cards(nb_cartes)
+        self.exchange_cards_classic()
+
+    def distribute_cards(self, nb_cartes) -> np.ndarray:
+        """
+        Même découpage du paquet que Partie.distribute_cards, directement en nombre de cartes par rang
+        """
+        n, p, r = self.nb_parties, self.nb_joueurs, self.nb_rangs_cartes
+        joueur_position = np.empty(nb_cartes, dtype=np.int64)
+        for i in range(p):
+            joueur_position[i * nb_cartes // p: (i + 1) * nb_cartes // p] = i
+        index_plat = (
+            np.arange(n)[:, None] * (p * r) + joueur_position[None, :] * r + self.cards_shuffled
+        )
+        return np.bincount(index_plat.ravel(), minlength=n * p * r).reshape(n, p, r).astype(np.int8)
+
+    def exchange_cards_classic(self):
+        # Regroupement des parties par configuration de rôles
+        configurations = {}
+        for g, roles in enumerate(self.role_players):
+            configurations.setdefault(tuple(roles), []).append(g)
+        for roles, parties in configurations.items():
+            if ROLES_ECHANGE.issubset(roles):
+                parties = np.array(parties)
+                self.exchange_cards(parties, roles.index("Trou"), roles.index("Prez"), 2)
+                self.exchange_cards(parties, roles.index("Vice-Trou"), roles.index("Vice-Prez"), 1)
+            elif ROLES_ECHANGE & set(roles):
+                raise ValueError(f"Ces rôles : {list(roles)} sont illogiques")
+
+    def exchange_cards(self, parties, joueur_inferieur, joueur_superieur, nb_cards_to_exchange):
+        counts = self.counts
+        rangs_decroissants = np.arange(self.nb_rangs_cartes - 1, -1, -1)
+        # Le joueur inférieur donne ses meilleures cartes au joueur supérieur
+        for _ in range(nb_cards_to_exchange):
+            main = counts[parties, joueur_inferieur]
+            rang = rangs_decroissants[np.argmax(main[:, ::-1] > 0, axis=1)]
+            counts[parties, joueur_inferieur, rang] -= 1
+            counts[parties, joueur_superieur, rang] += 1
+
+        # Le joueur supérieur choisit ses cartes : en Python si sa stratégie n'est pas celle par défaut
+        methode = "give_card_vice_prez_to_vice_trou" if nb_cards_to_exchange == 1 else "give_cards_prez_to_trou"
+        defaut = np.array([
+            getattr(type(self.players[g][joueur_superieur]), methode) is getattr(Player, methode)
+            for g in parties
+        ], dtype=bool)
+        parties_defaut = parties[defaut]
+        for _ in range(nb_cards_to_exchange):
+            main = counts[parties_defaut, joueur_superieur]
+            rang = np.argmax(main > 0, axis=1)
+            counts[parties_defaut, joueur_superieur, rang] -= 1
+            counts[parties_defaut, joueur_inferieur, rang] += 1
+        for g in parties[~defaut]:
+            player = self.players[g][joueur_superieur]
+            main = self.main_liste(g, joueur_superieur)
+            if nb_cards_to_exchange == 1:
+                cards = [player.give_card_vice_prez_to_vice_trou(main)]
+            else:
+                cards = player.give_cards_prez_to_trou(main)
+            if not set(cards).issubset(main):
+                raise ValueError(
+                    f"{player.get_name()} a tenté de donner des cartes qu'il n'a pas"
+                )
+            for card in cards:
+                counts[g, joueur_superieur, card] -= 1
+                counts[g, joueur_inferieur, card] += 1
+
+    def main_liste(self, g, joueur) -> list[int]:
+        return convert_dict_to_sorted_hand(
+            {rang: int(nb) for rang, nb in enumerate(self.counts[g, joueur]) if nb}
+        )
+
+    def play_all_games(self) -> ResultatsLot:
+        """
+        Joue toutes les parties du lot jusqu'au bout
+        """
+        n = self.nb_parties
+        resultats = ResultatsLot(n, self.nb_joueurs)
+        counts = self.counts.copy()
+        politiques = self.politiques.copy()
+
+        # Plateau et cartes déjà jouées en liste, uniquement pour les parties avec un joueur Python
+        jeux_python = {
+            g: {"cartes_plateau": [], "cartes_deja_jouees": []}
+            for g in np.flatnonzero((politiques == POLITIQUE_PYTHON).any(axis=1))
+        }
+        for g in jeux_python:
+            for i, player in enumerate(self.players[g]):
+                player.donner_main(self.main_liste(g, i))
+        execution_propre = self.execution_joueurs is None and bool(jeux_python)
+        if execution_propre:
+            self.execution_joueurs = ExecutionJoueurs()
+        try:
+            self.jouer_tours(resultats, counts, politiques, jeux_python)
+        finally:
+            if execution_propre:
+                self.execution_joueurs.fermer()
+                self.execution_joueurs = None
+        logger.debug(f"{n} parties simulées, {int(resultats.valide.sum())} valides")
+        return resultats
+
+    def jouer_tours(self, resultats: ResultatsLot, counts, politiques, jeux_python):
+        """
+        Fait avancer toutes les parties d'un tour à la fois jusqu'à la fin de la dernière
+        """
+        n, p, r = self.nb_parties, self.nb_joueurs, self.nb_rangs_cartes
+        rangs = np.arange(r)
+        decalages = np.arange(1, p + 1)
+
+        # Etat des parties encore en cours, compacté au fil des fins de parties
+        ids = np.arange(n)
+        tailles = counts.sum(axis=2, dtype=np.int16)
+        actuel = np.zeros(n, dtype=np.int64)
+        top_rang = np.full(n, -1, dtype=np.int64)
+        top_nb = np.zeros(n, dtype=np.int64)
+        risque_saut = np.zeros(n, dtype=bool)
+        counter_same_card = np.zeros(n, dtype=np.int64)
+        revolution = np.zeros(n, dtype=bool)
+        pas_fini = np.ones((n, p), dtype=bool)
+        en_jeu = np.ones((n, p), dtype=bool)
+        classement = np.full((n, p), -1, dtype=np.int8)
+        nb_classes = np.zeros(n, dtype=np.int64)
+        tricheurs = np.full((n, p), -1, dtype=np.int8)
+        nb_tricheurs = np.zeros(n, dtype=np.int64)
+        nb_tours = np.zeros(n, dtype=np.int32)
+
+        while len(ids):
+            m = len(ids)
+            g = np.arange(m)
+            main = counts[g, actuel]
+
+            # Joueur suivant parmi les joueurs en jeu
+            ordre = (actuel[:, None] + decalages[None, :]) % p
+            prochain = ordre[g, np.argmax(en_jeu[g[:, None], ordre], axis=1)]
+
+            # Choix des coups
+            rang, nb = self.coups_vectorises(
+                main, politiques[g, actuel], top_rang, top_nb, risque_saut, revolution, rangs
+            )
+            triche = np.zeros(m, dtype=bool)
+            for k in np.flatnonzero(politiques[g, actuel] == POLITIQUE_PYTHON):
+                rang[k], nb[k], triche[k] = self.coup_python(
+                    resultats, ids[k], actuel[k], counts[k, actuel[k]], jeux_python[ids[k]], risque_saut[k],
+                    revolution[k],
+                )
+            nb_tours += 1
+
+            # Le joueur a la main mais ne joue pas : il va en dernier
+            triche |= (nb == 0) & (top_nb == 0)
+            jouer = (nb > 0) & ~triche
+            passe = (nb == 0) & ~triche
+
+            # Le joueur pose ses cartes
+            meme_pose = (rang == top_rang) & (nb == top_nb)
+            counter_same_card = np.where(jouer, np.where(meme_pose, counter_same_card + nb, nb), counter_same_card)
+            risque_saut = np.where(jouer, meme_pose, risque_saut)
+            kj, aj, rj = g[jouer], actuel[jouer], rang[jouer]
+            counts[kj, aj, rj] -= nb[jouer].astype(np.int8)
+            tailles[kj, aj] -= nb[jouer].astype(np.int16)
+            top_rang = np.where(jouer, rang, top_rang)
+            top_nb = np.where(jouer, nb, top_nb)
+            for k in np.flatnonzero(jouer) if jeux_python else ():
+                if ids[k] in jeux_python:
+                    etat = jeux_python[ids[k]]
+                    pose = [int(rang[k])] * int(nb[k])
+                    etat["cartes_plateau"].append(pose)
+                    etat["cartes_deja_jouees"] = sorted(etat["cartes_deja_jouees"] + pose)
+
+            fini = jouer & (tailles[g, actuel] == 0)
+            kf, af = g[fini], actuel[fini]
+            pas_fini[kf, af] = False
+            en_jeu[kf, af] = False
+            classement[kf, nb_classes[fini]] = af
+            nb_classes += fini
+
+            # Révolution (tous les exemplaires d'un rang d'un coup) : l'ordre des rangs s'inverse
+            revolution ^= jouer & (nb == self.nb_exemplaires)
+
+            # Coupe (tous les exemplaires d'un rang d'affilée) ou carte la plus forte : le joueur a la main
+            coupe = jouer & (counter_same_card == self.nb_exemplaires)
+            risque_saut &= ~coupe
+            prend_main = coupe | (jouer & (rang == np.where(revolution, 0, r - 1)))
+            en_jeu[prend_main] = False
+            en_jeu[g[prend_main], actuel[prend_main]] = True
+
+            # Tricheurs
+            kt, at = g[triche], actuel[triche]
+            pas_fini[kt, at] = False
+            en_jeu[kt, at] = False
+            tricheurs[kt, nb_tricheurs[triche]] = at
+            nb_tricheurs += triche
+
+            # Le joueur ne joue pas : il est sauté ou il passe
+            saute = passe & risque_saut
+            risque_saut &= ~saute
+            kp = passe & ~saute
+            en_jeu[g[kp], actuel[kp]] = False
+
+            # Fin du pli : un seul joueur en jeu
+            fin_pli = en_jeu.sum(axis=1) == 1
+            leader = np.argmax(en_jeu, axis=1)
+            leader = np.where(pas_fini[g, leader], leader, prochain)
+            risque_saut &= ~fin_pli
+            top_rang[fin_pli] = -1
+            top_nb[fin_pli] = 0
+            counter_same_card[fin_pli] = 0
+            en_jeu[fin_pli] = pas_fini[fin_pli]
+            actuel = np.where(fin_pli, leader, prochain)
+            for k in np.flatnonzero(fin_pli) if jeux_python else ():
+                if ids[k] in jeux_python:
+                    jeux_python[ids[k]]["cartes_plateau"] = []
+
+            # Parties terminées
+            termine = (nb_classes + nb_tricheurs) >= p - 1
+            if termine.any():
+                dernier = np.argmax(pas_fini[termine], axis=1)
+                final = classement[termine].copy()
+                rangees = np.arange(int(termine.sum()))
+                nb_classes_termine = nb_classes[termine]
+                final[rangees, nb_classes_termine] = dernier
+                # Les tricheurs sont ajoutés à la suite du dernier, le j-ième à la place nb_classes + 1 + j
+                tricheurs_termine, nb_tricheurs_termine = tricheurs[termine], nb_tricheurs[termine]
+                for j in range(int(nb_tricheurs_termine.max())):
+                    avec = nb_tricheurs_termine > j
+                    final[rangees[avec], nb_classes_termine[avec] + 1 + j] = tricheurs_termine[avec, j]
+                resultats.classement[ids[termine]] = final
+                resultats.valide[ids[termine]] = True
+                resultats.nb_tours[ids[termine]] = nb_tours[termine]
+
+            if termine.any():
+                garde = ~termine
+                ids = ids[garde]
+                counts, tailles, politiques = counts[garde], tailles[garde], politiques[garde]
+                actuel, prochain = actuel[garde], prochain[garde]
+                top_rang, top_nb = top_rang[garde], top_nb[garde]
+                risque_saut, counter_same_card = risque_saut[garde], counter_same_card[garde]
+                revolution = revolution[garde]
+                pas_fini, en_jeu = pas_fini[garde], en_jeu[garde]
+                classement, nb_classes = classement[garde], nb_classes[garde]
+                tricheurs, nb_tricheurs = tricheurs[garde], nb_tricheurs[garde]
+                nb_tours = nb_tours[garde]
+
+    @staticmethod
+    def coups_vectorises(main, politique, top_rang, top_nb, risque_saut, revolution, rangs):
+        """
+        Coups de DumbPlayer et AggressivePlayer, sous forme (rang, nombre de cartes), nombre nul si on passe
+
+        Pendant une révolution, on joue sur les rangs retournés (le plus faible devient le rang 0) :
+        les stratégies sont les mêmes que sans révolution
+        """
+        m = len(main)
+        g = np.arange(m)
+        a_la_main = top_nb == 0
+        dernier_rang = len(rangs) - 1
+        if revolution.any():
+            main = np.where(revolution[:, None], main[:, ::-1], main)
+            top_rang = np.where(revolution & (top_rang >= 0), dernier_rang - top_rang, top_rang)
+
+        # On a la main : on joue toutes nos cartes les plus faibles
+        rang = np.argmax(main > 0, axis=1)
+        nb = main[g, rang].astype(np.int64)
+
+        # Sans la main, chaque stratégie ne regarde que ses propres parties
+        for code in (POLITIQUE_DUMB, POLITIQUE_AGGRESSIVE):
+            k = np.flatnonzero((politique == code) & ~a_la_main)
+            if not len(k):
+                continue
+            main_k, top_rang_k, top_nb_k = main[k], top_rang[k, None], top_nb[k, None]
+            rangs_possibles = np.where(risque_saut[k, None], rangs == top_rang_k, rangs >= top_rang_k)
+            if code == POLITIQUE_DUMB:
+                # DumbPlayer : même type que le centre, sans casser les doubles ou les triples
+                candidats = rangs_possibles & (main_k == top_nb_k)
+                rang[k] = np.argmax(candidats, axis=1)
+            else:
+                # AggressivePlayer : d'abord les simples, puis les doubles, puis les triples
+                candidats = rangs_possibles & (main_k >= top_nb_k) & (main_k <= 3)
+                cle = np.where(candidats, main_k.astype(np.int16) * len(rangs) + rangs, np.iinfo(np.int16).max)
+                rang[k] = np.argmin(cle, axis=1)
+            nb[k] = np.where(candidats.any(axis=1), top_nb[k], 0)
+        if revolution.any():
+            rang = np.where(revolution, dernier_rang - rang, rang)
+        return rang, nb
+
+    def coup_python(self, resultats: ResultatsLot, partie, joueur, main_counts, etat, risque_saut, revolution):
+        """
+        Appelle que_jouer d'un joueur non vectorisé et vérifie son coup comme le moteur scalaire
+
+        :return: (rang, nombre de cartes, triche)
+        """
+        player = self.players[partie][joueur]
+        main = convert_dict_to_sorted_hand({rang: int(nb) for rang, nb in enumerate(main_counts) if nb})
+        cartes_plateau = etat["cartes_plateau"]
+        player.is_revolution = bool(revolution)
+        try:
+            pose = self.execution_joueurs.appeler(
+                player, "que_jouer", self.timeout_players,
+                list(main), [list(el) for el in cartes_plateau], bool(risque_saut), list(etat["cartes_deja_jouees"]),
+            )
+        except concurrent.futures.TimeoutError:
+            logger.error(f"Le code de {player.get_name()} a pris plus de {self.timeout_players} secondes : "
+                         f"on joue à sa place")
+            resultats.timeouts[partie, joueur] += 1
+            pose = [] if cartes_plateau else [main[-1]]
+        except Exception:
+            logger.error(f"Le code de {player.get_name()} est beugué : on joue à sa place", exc_info=True)
+            pose = [] if cartes_plateau else [main[-1]]
+        else:
+            if not isinstance(pose, list) or not all(isinstance(x, int) for x in pose):
+                pose = [] if cartes_plateau else [main[-1]]
+        if not pose:
+            return 0, 0, False
+
+        cartes_au_dessus = cartes_plateau[-1] if cartes_plateau else None
+        conditions_triche = [
+            not all(el == pose[0] for el in pose),
+            cartes_au_dessus is not None and not revolution and pose[0] < cartes_au_dessus[0],
+            cartes_au_dessus is not None and revolution and pose[0] > cartes_au_dessus[0],
+            risque_saut and pose != cartes_au_dessus,
+            not 0 <= pose[0] < self.nb_rangs_cartes or main.count(pose[0]) < len(pose),
+        ]
+        if any(conditions_triche):
+            return 0, 0, True
+        return pose[0], len(pose), False
+
+
+def default_roles(nb_joueurs) -> list[str]:
+    if nb_joueurs >= 4:
+        return ["Trou", "Prez", "Vice-Trou", "Vice-Prez"] + ["Neutre" for _ in range(0, nb_joueurs - 4)]
+    return ["Trou", "Prez", "Vice-Trou", "Vice-Prez"][:nb_joueurs]
@@ -0,0 +1,391 @@
+"""
+Benchmarks
+
+- débit : parties par seconde sur des tables de 4 et 5 joueurs identiques, pour chaque joueur fourni,
+  avec des paquets tirés d'une graine fixe
+- surcoût du moteur par tour, sans le temps passé dans les joueurs
+- grandes tables : surcoût du moteur par tour de 4 à 12 joueurs (de 1 à 3 paquets),
+  qui doit rester stable quand la table grandit
+- moteur batch : parties par seconde de BatchPartie et gain sur Partie, pour les mêmes donnes
+- préparation d'une partie : __init__, distribute_cards, exchange_cards_classic
+- mémoire maximale d'une étude de 10 000 parties, dans un processus neuf
+- démarrage : temps d'import et mémoire d'un processus neuf qui importe le moteur, et vérification qu'aucune
+  bibliothèque lourde (pandas, plotly, numpy) n'est chargée au passage
+
+Tout tourne hors ligne. Les résultats sont un dictionnaire plat {mesure: valeur}, écrit en JSON, que l'on
+compare à une référence enregistrée : une mesure moins bonne que la référence de plus du seuil est une régression.
+    python -m president_game.benchmarks --enregistrer reference.json
+    python -m president_game.benchmarks --reference reference.json --seuil 0.15
+"""
+import argparse
+import json
+import logging
+import random
+import subprocess
+import sys
+import time
+
+from president_game.coups import NB_COULEURS
+from president_game.execution import ExecutionJoueurs
+from president_game.partie import Partie, paquet_modele
+from president_game.player import AggressivePlayer, CheatPlayer, DumbPlayer, Player
+
+MODULES_MOTEUR = (
+    "president_game.partie",
+    "president_game.player",
+    "president_game.utils",
+    "president_game.tournoi",
+    "president_game.etudes",
+)
+MODULES_LOURDS = ("pandas", "plotly", "numpy")
+
+ROLES = {
+    nb_joueurs: ["Trou", "Prez", "Vice-Trou", "Vice-Prez"] + ["Neutre"] * (nb_joueurs - 4)
+    for nb_joueurs in range(4, 13)
+}
+# (nombre de joueurs, nombre de paquets) des grandes tables
+GRANDES_TABLES = ((4, 1), (8, 2), (12, 3))
+
+
+def fabrique_endgame():
+    # Un solveur neuf par table : la table de transposition ne sert pas d'une mesure à l'autre
+    from president_game.solveur import EndgamePlayer, SolveurFinDePartie
+
+    solveur = SolveurFinDePartie()
+    return lambda: EndgamePlayer(solveur=solveur, seed=0)
+
+
+# Joueurs mesurés et nombre de parties par mesure (SlowPlayer attend 4 secondes par coup : il n'est pas mesuré)
+JOUEURS = {
+    "DumbP": (lambda: DumbPlayer, 2000),
+    "AggressiveP": (lambda: AggressivePlayer, 2000),
+    "CheatP": (lambda: CheatPlayer, 2000),
+    "EndgameP": (fabrique_endgame, 20),
+}
+
+# Mémoire maximale du processus. ru_maxrss garde celle du processus parent d'avant exec : sous Linux,
+# on lit VmHWM, propre au programme lancé
+CODE_RSS_MAX = """
+def rss_max_mo():
+    try:
+        with open("/proc/self/status") as fichier:
+            for ligne in fichier:
+                if ligne.startswith("VmHWM:"):
+                    return int(ligne.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+"""
+
+CODE_DEMARRAGE = CODE_RSS_MAX + """
+import json, sys, time
+debut = time.perf_counter()
+for module in {modules!r}:
+    __import__(module)
+duree = time.perf_counter() - debut
+print(json.dumps({{
+    "duree_import_s": duree,
+    "rss_max_mo": rss_max_mo(),
+    "modules_lourds": sorted({{nom.split(".")[0] for nom in sys.modules}} & set({lourds!r})),
+}}))
+"""
+
+CODE_MEMOIRE = CODE_RSS_MAX + """
+import json
+from president_game.player import DumbPlayer
+from president_game.tournoi import Tournoi
+roles = {roles!r}
+Tournoi([([DumbPlayer] * len(roles), roles)], {nb_parties}, seed=0, moteur={moteur!r}).lancer()
+print(json.dumps({{"rss_max_mo": rss_max_mo()}}))
+"""
+
+
+def paquets(nb_parties, nb_rangs_cartes=13, seed=0, nb_paquets=1) -> list[list[int]]:
+    rng = random.Random(seed)
+    resultat = []
+    for _ in range(nb_parties):
+        paquet = list(paquet_modele(nb_rangs_cartes, NB_COULEURS * nb_paquets))
+        rng.shuffle(paquet)
+        resultat.append(paquet)
+    return resultat
+
+
+class JoueurChronometre(Player):
+    """
+    Enveloppe un joueur et compte le temps passé dans son que_jouer
+    """
+    trusted = True
+
+    def __init__(self, joueur: Player):
+        self.joueur = joueur
+        self.vues_riches = joueur.vues_riches
+        self.position_determinisee = joueur.position_determinisee
+        self.seuil_position = joueur.seuil_position
+        self.duree = 0.
+        self.nb_coups = 0
+
+    def get_name(self):
+        return self.joueur.get_name()
+
+    def donner_main(self, main: list[int]):
+        self.joueur.donner_main(main)
+
+    def give_cards_prez_to_trou(self, main: list[int]) -> list[int]:
+        return self.joueur.give_cards_prez_to_trou(main)
+
+    def give_card_vice_prez_to_vice_trou(self, main: list[int]) -> int:
+        return self.joueur.give_card_vice_prez_to_vice_trou(main)
+
+    def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        joueur = self.joueur
+        joueur.is_revolution = self.is_revolution
+        if self.position_determinisee:
+            joueur.position = self.position
+        debut = time.perf_counter()
+        pose = joueur.que_jouer(main, cartes_plateau, risque_saut, historique_jeux)
+        self.duree += time.perf_counter() - debut
+        self.nb_coups += 1
+        return pose
+
+
+def jouer_table(players, nb_parties, seed=0, nb_paquets=1) -> tuple[float, int]:
+    """
+    Joue nb_parties parties sur une table, avec Partie.reset entre deux donnes
+
+    :return: durée totale et nombre de tours
+    """
+    roles = ROLES[len(players)]
+    with ExecutionJoueurs() as execution_joueurs:
+        partie = None
+        nb_tours = 0
+        debut = time.perf_counter()
+        for paquet in paquets(nb_parties, seed=seed, nb_paquets=nb_paquets):
+            if partie is None:
+                partie = Partie(
+                    nb_joueurs=len(players),
+                    nb_paquets=nb_paquets,
+                    players=players,
+                    role_players=roles,
+                    cards_shuffled=paquet,
+                    save_events=False,
+                    execution_joueurs=execution_joueurs,
+                )
+            else:
+                partie.reset(cards_shuffled=paquet)
+            partie.play_whole_game_from_cards()
+            nb_tours += partie.nb_tours
+        return time.perf_counter() - debut, nb_tours
+
+
+def debit(joueurs=JOUEURS, tailles_tables=(4, 5), seed=0, repetitions=3) -> dict:
+    """
+    Parties par seconde de chaque joueur, et surcoût du moteur par tour (temps total moins temps des joueurs).
+    Chaque mesure est répétée et on garde la meilleure, pour ne pas compter les autres processus de la machine
+    """
+    resultats = {}
+    for nom, (fabrique, nb_parties) in joueurs.items():
+        for nb_joueurs in tailles_tables:
+            meilleure_duree = meilleur_surcout = float("inf")
+            for _ in range(repetitions):
+                classe = fabrique()
+                players = [JoueurChronometre(classe()) for _ in range(nb_joueurs)]
+                duree, nb_tours = jouer_table(players, nb_parties, seed)
+                duree_joueurs = sum(player.duree for player in players)
+                meilleure_duree = min(meilleure_duree, duree)
+                meilleur_surcout = min(meilleur_surcout, (duree - duree_joueurs) / nb_tours)
+            resultats[f"debit.{nom}.{nb_joueurs}j.parties_par_seconde"] = nb_parties / meilleure_duree
+            resultats[f"moteur.{nom}.{nb_joueurs}j.us_par_tour"] = meilleur_surcout * 1e6
+    return resultats
+
+
+def grandes_tables(nb_parties=500, tables=GRANDES_TABLES, seed=0, repetitions=3) -> dict:
+    """
+    Surcoût du moteur par tour (hors temps des joueurs) quand la table grandit, avec DumbPlayer
+    """
+    resultats = {}
+    for nb_joueurs, nb_paquets in tables:
+        meilleur_surcout = float("inf")
+        for _ in range(repetitions):
+            players = [JoueurChronometre(DumbPlayer()) for _ in range(nb_joueurs)]
+            duree, nb_tours = jouer_table(players, nb_parties, seed, nb_paquets)
+            meilleur_surcout = min(meilleur_surcout, (duree - sum(player.duree for player in players)) / nb_tours)
+        resultats[f"grandes_tables.{nb_joueurs}j_{nb_paquets}paquets.us_par_tour"] = meilleur_surcout * 1e6
+    return resultats
+
+
+def moteur_batch(nb_parties=20_000, nb_parties_partie=2000, seed=0, repetitions=3) -> dict:
+    """
+    Parties par seconde du moteur batch (DumbPlayer et AggressivePlayer vectorisés) et de Partie sur les mêmes
+    donnes, et le gain de l'un sur l'autre
+    """
+    from president_game.batch import BatchPartie
+
+    classes = [DumbPlayer, AggressivePlayer, DumbPlayer, AggressivePlayer]
+    roles = ROLES[len(classes)]
+    donnes = paquets(nb_parties, seed=seed)
+    meilleure_batch = meilleure_partie = float("inf")
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        BatchPartie(donnes, [classe() for classe in classes], roles).play_all_games()
+        meilleure_batch = min(meilleure_batch, time.perf_counter() - debut)
+        with ExecutionJoueurs() as execution_joueurs:
+            partie = None
+            debut = time.perf_counter()
+            for paquet in donnes[:nb_parties_partie]:
+                if partie is None:
+                    partie = Partie(
+                        nb_joueurs=len(classes),
+                        players=[classe() for classe in classes],
+                        role_players=roles,
+                        cards_shuffled=paquet,
+                        save_events=False,
+                        execution_joueurs=execution_joueurs,
+                    )
+                else:
+                    partie.reset(cards_shuffled=paquet)
+                partie.play_whole_game_from_cards()
+            meilleure_partie = min(meilleure_partie, time.perf_counter() - debut)
+    par_seconde_batch = nb_parties / meilleure_batch
+    par_seconde_partie = nb_parties_partie / meilleure_partie
+    return {
+        "batch.4j.parties_par_seconde": par_seconde_batch,
+        "batch.4j.partie.parties_par_seconde": par_seconde_partie,
+        "batch.4j.gain": par_seconde_batch / par_seconde_partie,
+    }
+
+
+def preparation(nb_parties=2000, nb_joueurs=5, seed=0, repetitions=3) -> dict:
+    """
+    Coût de préparation d'une partie, en microsecondes : construction complète, puis chaque étape de reset
+    (meilleure de repetitions mesures)
+    """
+    roles = ROLES[nb_joueurs]
+    donnes = paquets(nb_parties, seed=seed)
+    players = [DumbPlayer() for _ in range(nb_joueurs)]
+    resultats = {}
+    with ExecutionJoueurs() as execution_joueurs:
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            for paquet in donnes:
+                partie = Partie(
+                    nb_joueurs=nb_joueurs,
+                    players=players,
+                    role_players=roles,
+                    cards_shuffled=paquet,
+                    save_events=False,
+                    execution_joueurs=execution_joueurs,
+                )
+            duree_init = time.perf_counter() - debut
+
+            duree_distribution = duree_echanges = 0.
+            for paquet in donnes:
+                partie.cards_shuffled = paquet
+                partie.choix_echanges = []
+                debut = time.perf_counter()
+                partie.distribute_cards()
+                milieu = time.perf_counter()
+                partie.exchange_cards_classic()
+                duree_distribution += milieu - debut
+                duree_echanges += time.perf_counter() - milieu
+
+            for mesure, duree in [
+                ("preparation.init.us", duree_init),
+                ("preparation.distribute_cards.us", duree_distribution),
+                ("preparation.exchange_cards_classic.us", duree_echanges),
+            ]:
+                resultats[mesure] = min(resultats.get(mesure, float("inf")), duree / nb_parties * 1e6)
+    return resultats
+
+
+def memoire_etude(nb_parties=10_000, nb_joueurs=5, moteur="partie") -> dict:
+    """
+    Mémoire maximale (RSS) d'un processus neuf qui joue une étude de nb_parties parties
+    """
+    code = CODE_MEMOIRE.format(roles=ROLES[nb_joueurs], nb_parties=nb_parties, moteur=moteur)
+    sortie = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return {f"memoire.etude_{nb_parties}.{moteur}.rss_max_mo": json.loads(sortie)["rss_max_mo"]}
+
+
+def demarrage(modules=MODULES_MOTEUR, repetitions=5) -> dict:
+    """
+    Importe les modules dans un processus neuf, repetitions fois, et garde le meilleur temps
+    """
+    code = CODE_DEMARRAGE.format(modules=tuple(modules), lourds=MODULES_LOURDS)
+    mesures = []
+    for _ in range(repetitions):
+        sortie = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        mesures.append(json.loads(sortie))
+    meilleure = min(mesures, key=lambda mesure: mesure["duree_import_s"])
+    return {"modules": list(modules), **meilleure}
+
+
+def lancer_suite(rapide=False) -> dict:
+    """
+    Toutes les mesures. En mode rapide, dix fois moins de parties (les mesures sont plus bruitées)
+    """
+    echelle = 10 if rapide else 1
+    joueurs = {nom: (fabrique, max(1, nb_parties // echelle)) for nom, (fabrique, nb_parties) in JOUEURS.items()}
+    resultats = {}
+    resultats.update(debit(joueurs))
+    resultats.update(grandes_tables(500 // echelle))
+    resultats.update(moteur_batch(20_000 // echelle, 2000 // echelle))
+    resultats.update(preparation(2000 // echelle))
+    resultats.update(memoire_etude(10_000 // echelle))
+    import_moteur = demarrage(repetitions=5 // echelle or 1)
+    resultats["demarrage.import.s"] = import_moteur["duree_import_s"]
+    resultats["demarrage.rss_max_mo"] = import_moteur["rss_max_mo"]
+    resultats["demarrage.nb_modules_lourds"] = len(import_moteur["modules_lourds"])
+    return resultats
+
+
+def plus_grand_est_mieux(mesure) -> bool:
+    return mesure.endswith(("_par_seconde", ".gain"))
+
+
+def comparer(resultats: dict, reference: dict, seuil=0.2) -> list[str]:
+    """
+    Régressions par rapport à la référence : mesures moins bonnes de plus de seuil (en relatif).
+    Les mesures absentes de l'un ou de l'autre sont ignorées
+    """
+    regressions = []
+    for mesure, valeur_reference in reference.items():
+        valeur = resultats.get(mesure)
+        if valeur is None or valeur_reference is None:
+            continue
+        if plus_grand_est_mieux(mesure):
+            ecart = (valeur_reference - valeur) / valeur_reference if valeur_reference else 0.
+        else:
+            ecart = (valeur - valeur_reference) / valeur_reference if valeur_reference else float(valeur > 0)
+        if ecart > seuil:
+            regressions.append(f"{mesure} : {valeur:.4g} contre {valeur_reference:.4g} ({ecart:+.0%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks du moteur")
+    parser.add_argument("--reference", help="résultats de référence (JSON) à comparer")
+    parser.add_argument("--enregistrer", help="fichier JSON où écrire les résultats")
+    parser.add_argument("--seuil", type=float, default=0.2, help="régression tolérée, en relatif (0.2 : 20 %%)")
+    parser.add_argument("--rapide", action="store_true", help="dix fois moins de parties")
+    arguments = parser.parse_args()
+
+    # Les messages des joueurs (triche...) ne sont pas mesurés
+    logging.disable(logging.CRITICAL)
+    resultats = lancer_suite(arguments.rapide)
+    print(json.dumps(resultats, indent=2))
+    if arguments.enregistrer:
+        with open(arguments.enregistrer, "w", encoding="utf-8") as fichier:
+            json.dump(resultats, fichier, indent=2)
+
+    erreurs = []
+    if resultats["demarrage.nb_modules_lourds"]:
+        erreurs.append("Le moteur charge des bibliothèques lourdes")
+    if arguments.reference:
+        with open(arguments.reference, encoding="utf-8") as fichier:
+            erreurs.extend(comparer(resultats, json.load(fichier), arguments.seuil))
+    if erreurs:
+        sys.exit("Régressions :\n" + "\n".join(erreurs))
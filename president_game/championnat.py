@@ -0,0 +1,277 @@
+"""
+Championnats : des manches enchaînées à la même table, comme en vrai
+
+Le classement d'une manche donne les rôles de la suivante (premier Prez, deuxième Vice-Prez, avant-dernier
+Vice-Trou, dernier Trou), donc les échanges de cartes. La première manche se joue sans rôles (tous Neutre).
+Championnats lance beaucoup de championnats indépendants, chacun avec sa graine dérivée de celle de l'ensemble
+et de son numéro : le résultat ne dépend pas du nombre de workers.
+"""
+import logging
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from president_game.coups import NB_COULEURS
+from president_game.execution import ExecutionJoueurs
+from president_game.partie import Partie, paquet_modele
+from president_game.player import Player
+from president_game.statistiques import StatsEnLigne
+from president_game.tournoi import ResultatsTournoi
+
+logger = logging.getLogger(__name__)
+
+
+def roles_depuis_classement(classement: list[int]) -> list[str]:
+    """
+    Rôles de chaque siège pour la manche suivante. À moins de 4 joueurs, pas de rôles (tous Neutre)
+    """
+    nb_joueurs = len(classement)
+    roles = ["Neutre"] * nb_joueurs
+    if nb_joueurs >= 4:
+        for place, role in [(0, "Prez"), (1, "Vice-Prez"), (nb_joueurs - 2, "Vice-Trou"), (nb_joueurs - 1, "Trou")]:
+            roles[classement[place]] = role
+    return roles
+
+
+def points_par_defaut(nb_joueurs) -> list[int]:
+    # nb_joueurs - 1 points pour le premier, 0 pour le dernier
+    return list(range(nb_joueurs - 1, -1, -1))
+
+
+class ResultatsChampionnats(ResultatsTournoi):
+    """
+    Répartition des places de toutes les manches (voir ResultatsTournoi), et en plus :
+    transitions[role][role_suivant] : nombre de fois où un joueur qui avait gagné role a gagné role_suivant
+    à la manche d'après. scores_finaux : score cumulé de chaque siège à la fin de chaque championnat
+    """
+    nb_championnats: int
+    transitions: dict[str, dict[str, int]]
+    scores_finaux: list[list[int]]
+
+    def __init__(self, nb_joueurs):
+        super().__init__(nb_joueurs)
+        self.nb_championnats = 0
+        self.transitions = {}
+        self.scores_finaux = []
+
+    def ajouter_transitions(self, roles, roles_suivants):
+        for role, role_suivant in zip(roles, roles_suivants):
+            suivants = self.transitions.setdefault(role, {})
+            suivants[role_suivant] = suivants.get(role_suivant, 0) + 1
+
+    def fusionner(self, autre: "ResultatsChampionnats"):
+        super().fusionner(autre)
+        self.nb_championnats += autre.nb_championnats
+        for role, suivants in autre.transitions.items():
+            nos_suivants = self.transitions.setdefault(role, {})
+            for role_suivant, nb in suivants.items():
+                nos_suivants[role_suivant] = nos_suivants.get(role_suivant, 0) + nb
+        self.scores_finaux.extend(autre.scores_finaux)
+
+    def probabilites_transitions(self) -> dict[str, dict[str, float]]:
+        """
+        Probabilité de gagner chaque rôle à la manche suivante, selon le rôle gagné à cette manche
+        """
+        return {
+            role: {role_suivant: nb / sum(suivants.values()) for role_suivant, nb in suivants.items()}
+            for role, suivants in self.transitions.items()
+        }
+
+    def probabilite_garder(self, role) -> float:
+        """
+        Probabilité de garder le rôle d'une manche à l'autre (par exemple rester Prez)
+        """
+        suivants = self.transitions.get(role, {})
+        return suivants.get(role, 0) / sum(suivants.values()) if suivants else 0.
+
+    def stats_scores_finaux(self) -> list[StatsEnLigne]:
+        """
+        Score final de chaque siège sur l'ensemble des championnats
+        """
+        stats = [StatsEnLigne() for _ in range(self.nb_joueurs)]
+        for scores in self.scores_finaux:
+            for stats_siege, score in zip(stats, scores):
+                stats_siege.ajouter(score)
+        return stats
+
+
+class Championnat:
+    """
+    nb_manches manches enchaînées à une table.
+    scores : score cumulé de chaque siège, mis à jour après chaque manche
+
+    :param points: points de chaque place à chaque manche (par défaut nb_joueurs - 1 pour le premier,
+    0 pour le dernier)
+    :param roles_initiaux: rôles de la première manche (par défaut tous Neutre : pas d'échange)
+    :param rng: générateur des donnes, pour reproduire le championnat
+    """
+    def __init__(
+        self,
+        players: list[Player],
+        nb_manches,
+        points=None,
+        roles_initiaux=None,
+        rng: random.Random | None = None,
+        nb_rangs_cartes=13,
+        nb_paquets=1,
+        save_events=False,
+        execution_joueurs=None,
+    ):
+        self.players = players
+        self.nb_joueurs = len(players)
+        self.nb_manches = nb_manches
+        self.points = points if points is not None else points_par_defaut(self.nb_joueurs)
+        self.role_players = list(roles_initiaux) if roles_initiaux is not None else ["Neutre"] * self.nb_joueurs
+        self.rng = rng or random.Random()
+        self.nb_rangs_cartes = nb_rangs_cartes
+        self.nb_paquets = nb_paquets
+        self.save_events = save_events
+        self.execution_joueurs = execution_joueurs
+        self.scores = [0] * self.nb_joueurs
+        self.manche = 0
+        # Les rôles de la manche en cours viennent-ils d'un classement (et pas de roles_initiaux) ?
+        self.roles_gagnes = False
+        self.partie: Partie | None = None
+
+    def paquet(self) -> list[int]:
+        cards_shuffled = list(paquet_modele(self.nb_rangs_cartes, NB_COULEURS * self.nb_paquets))
+        self.rng.shuffle(cards_shuffled)
+        return cards_shuffled
+
+    def jouer_manche(self, resultats: ResultatsChampionnats | None = None) -> list[int]:
+        """
+        Joue la manche suivante avec les rôles en cours, puis prépare les rôles de la suivante. Renvoie le classement
+        """
+        # Une seule Partie pour tout le championnat, remise à zéro à chaque manche
+        if self.partie is None:
+            self.partie = Partie(
+                nb_joueurs=self.nb_joueurs,
+                nb_rangs_cartes=self.nb_rangs_cartes,
+                nb_paquets=self.nb_paquets,
+                players=self.players,
+                role_players=self.role_players,
+                cards_shuffled=self.paquet(),
+                save_events=self.save_events,
+                execution_joueurs=self.execution_joueurs,
+            )
+        else:
+            self.partie.reset(cards_shuffled=self.paquet(), role_players=self.role_players)
+        self.partie.play_whole_game_from_cards()
+        classement = self.partie.classement
+        for place, siege in enumerate(classement):
+            self.scores[siege] += self.points[place]
+
+        roles_suivants = roles_depuis_classement(classement)
+        if resultats is not None:
+            resultats.ajouter_partie(classement, self.players, self.role_players)
+            if self.roles_gagnes:
+                resultats.ajouter_transitions(self.role_players, roles_suivants)
+        self.role_players = roles_suivants
+        self.roles_gagnes = True
+        self.manche += 1
+        return classement
+
+    def jouer(self, resultats: ResultatsChampionnats | None = None) -> list[int]:
+        """
+        Joue les manches restantes. Renvoie les scores finaux
+        """
+        while self.manche < self.nb_manches:
+            self.jouer_manche(resultats)
+        if resultats is not None:
+            resultats.nb_championnats += 1
+            resultats.scores_finaux.append(list(self.scores))
+        return self.scores
+
+
+def generateur_championnat(seed, indice) -> random.Random:
+    return random.Random(f"{seed}-championnat-{indice}")
+
+
+class Championnats:
+    """
+    Beaucoup de championnats indépendants, à la même table (mêmes joueurs aux mêmes sièges)
+
+    :param fabriques: fabrique du joueur de chaque siège (par exemple sa classe)
+    :param taille_lot: nombre de championnats par lot envoyé à un worker
+    """
+    def __init__(
+        self,
+        fabriques: list[Callable[[], Player]],
+        nb_championnats,
+        nb_manches,
+        seed=None,
+        nb_workers=1,
+        taille_lot=16,
+        points=None,
+        roles_initiaux=None,
+        nb_rangs_cartes=13,
+        nb_paquets=1,
+    ):
+        self.fabriques = fabriques
+        self.nb_championnats = nb_championnats
+        self.nb_manches = nb_manches
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+            logger.info(f"Graine des championnats : {seed}")
+        self.seed = seed
+        self.nb_workers = nb_workers
+        self.taille_lot = taille_lot
+        self.points = points
+        self.roles_initiaux = roles_initiaux
+        self.nb_rangs_cartes = nb_rangs_cartes
+        self.nb_paquets = nb_paquets
+
+    def lots(self):
+        for debut in range(0, self.nb_championnats, self.taille_lot):
+            yield (
+                self.fabriques,
+                debut,
+                min(debut + self.taille_lot, self.nb_championnats),
+                self.nb_manches,
+                self.seed,
+                self.points,
+                self.roles_initiaux,
+                self.nb_rangs_cartes,
+                self.nb_paquets,
+            )
+
+    def lancer(self) -> ResultatsChampionnats:
+        debut = time.perf_counter()
+        resultats = ResultatsChampionnats(len(self.fabriques))
+        if self.nb_workers == 1:
+            for resultat_lot in map(jouer_championnats, self.lots()):
+                resultats.fusionner(resultat_lot)
+        else:
+            with ProcessPoolExecutor(max_workers=self.nb_workers) as executor:
+                # map rend les lots dans l'ordre : scores_finaux est dans l'ordre des championnats
+                for resultat_lot in executor.map(jouer_championnats, self.lots()):
+                    resultats.fusionner(resultat_lot)
+        resultats.duree = time.perf_counter() - debut
+        logger.info(
+            f"{resultats.nb_championnats} championnats de {self.nb_manches} manches ({resultats.nb_parties} parties) "
+            f"en {resultats.duree:.1f}s sur {self.nb_workers} worker(s) : {resultats.parties_par_seconde:.0f} parties/s"
+        )
+        return resultats
+
+
+def jouer_championnats(lot) -> ResultatsChampionnats:
+    """
+    Joue les championnats [debut, fin). Fonction de module pour pouvoir être envoyée aux workers
+    """
+    fabriques, debut, fin, nb_manches, seed, points, roles_initiaux, nb_rangs_cartes, nb_paquets = lot
+    resultats = ResultatsChampionnats(len(fabriques))
+    resultats.nb_parties = (fin - debut) * nb_manches
+    with ExecutionJoueurs() as execution_joueurs:
+        for indice in range(debut, fin):
+            Championnat(
+                [fabrique() for fabrique in fabriques],
+                nb_manches,
+                points=points,
+                roles_initiaux=roles_initiaux,
+                rng=generateur_championnat(seed, indice),
+                nb_rangs_cartes=nb_rangs_cartes,
+                nb_paquets=nb_paquets,
+                execution_joueurs=execution_joueurs,
+            ).jouer(resultats)
+    return resultats
@@ -0,0 +1,122 @@
+"""
+Cotes Elo des joueurs, mises à jour partie par partie
+
+Une partie à n joueurs compte comme toutes les confrontations deux à deux : le mieux classé gagne contre
+chacun de ceux qui finissent après lui. L'avantage des rôles (le président reçoit les meilleures cartes)
+est appris en même temps, comme un bonus de cote par rôle : la cote d'un joueur ne dépend donc pas
+des rôles qu'il a eus.
+
+Les cotes se gardent dans un fichier JSON. Un nouveau joueur commence avec un K plus fort (cote provisoire) :
+quelques centaines de parties contre les joueurs déjà cotés suffisent à le placer, sans rejouer les autres.
+"""
+import json
+import os
+from pathlib import Path
+
+from president_game.player import nom_joueur
+from president_game.resultats import ResultSink
+
+
+class CotesElo(ResultSink):
+    """
+    Peut servir de result_sink à Partie pour mettre les cotes à jour au fil des parties. Pour un tournoi, les
+    parties sont écrites par les workers (Tournoi(dossier_resultats=...)) puis rejouées dans l'ordre avec
+    ajouter_colonnes(lire_colonnes(dossier_resultats))
+
+    :param k: variation maximale de cote par partie pour un joueur établi
+    :param k_provisoire: K des joueurs qui ont moins de nb_parties_provisoire parties
+    :param k_roles: K des bonus de rôle
+    """
+    def __init__(self, cote_initiale=1500., k=16., k_provisoire=64., nb_parties_provisoire=50, k_roles=4.):
+        self.cote_initiale = cote_initiale
+        self.k = k
+        self.k_provisoire = k_provisoire
+        self.nb_parties_provisoire = nb_parties_provisoire
+        self.k_roles = k_roles
+        self.cotes: dict[str, float] = {}
+        self.nb_parties: dict[str, int] = {}
+        self.bonus_roles: dict[str, float] = {}
+
+    def cote(self, nom) -> float:
+        return self.cotes.get(nom, self.cote_initiale)
+
+    def k_joueur(self, nom) -> float:
+        return self.k_provisoire if self.nb_parties.get(nom, 0) < self.nb_parties_provisoire else self.k
+
+    def ajouter(self, partie):
+        self.ajouter_resultat([nom_joueur(player) for player in partie.players], partie.role_players, partie.classement)
+
+    def ajouter_resultat(self, joueurs, roles, classement):
+        """
+        Met à jour les cotes avec une partie : joueurs et roles par siège, classement des sièges
+        """
+        nb_joueurs = len(classement)
+        cotes_effectives = [self.cote(joueurs[siege]) + self.bonus_roles.get(roles[siege], 0.) for siege in classement]
+        # Somme des (résultat - résultat attendu) de chaque place contre toutes les autres
+        ecarts = [0.] * nb_joueurs
+        for i in range(nb_joueurs):
+            for j in range(i + 1, nb_joueurs):
+                attendu = 1 / (1 + 10 ** ((cotes_effectives[j] - cotes_effectives[i]) / 400))
+                ecarts[i] += 1 - attendu
+                ecarts[j] -= 1 - attendu
+
+        # Toutes les variations sont calculées avec les cotes d'avant la partie
+        variations = {}
+        variations_roles = {}
+        for place, siege in enumerate(classement):
+            nom = joueurs[siege]
+            variations[nom] = variations.get(nom, 0.) + self.k_joueur(nom) * ecarts[place] / (nb_joueurs - 1)
+            role = roles[siege]
+            variations_roles[role] = variations_roles.get(role, 0.) + self.k_roles * ecarts[place] / (nb_joueurs - 1)
+        for nom, variation in variations.items():
+            self.cotes[nom] = self.cote(nom) + variation
+            self.nb_parties[nom] = self.nb_parties.get(nom, 0) + 1
+        for role, variation in variations_roles.items():
+            self.bonus_roles[role] = self.bonus_roles.get(role, 0.) + variation
+
+    def ajouter_colonnes(self, colonnes: dict[str, list]):
+        """
+        Rejoue des résultats enregistrés par SinkColonnes (voir lire_colonnes), dans l'ordre
+        """
+        for joueurs, roles, classement in zip(colonnes["joueurs"], colonnes["roles"], colonnes["classement"]):
+            self.ajouter_resultat(joueurs, roles, classement)
+
+    def tableau(self) -> list[tuple[str, float, int]]:
+        """
+        (nom, cote, nombre de parties) du meilleur au moins bon
+        """
+        return sorted(
+            ((nom, cote, self.nb_parties[nom]) for nom, cote in self.cotes.items()), key=lambda ligne: -ligne[1]
+        )
+
+    def sauvegarder(self, chemin):
+        """
+        Écrit les cotes dans un fichier temporaire puis le renomme : le fichier n'est jamais à moitié écrit
+        """
+        chemin = Path(chemin)
+        temporaire = chemin.with_name(chemin.name + ".tmp")
+        donnees = {
+            "parametres": {
+                "cote_initiale": self.cote_initiale,
+                "k": self.k,
+                "k_provisoire": self.k_provisoire,
+                "nb_parties_provisoire": self.nb_parties_provisoire,
+                "k_roles": self.k_roles,
+            },
+            "joueurs": {nom: {"cote": cote, "nb_parties": self.nb_parties[nom]} for nom, cote in self.cotes.items()},
+            "bonus_roles": self.bonus_roles,
+        }
+        with open(temporaire, "w", encoding="utf-8") as fichier:
+            json.dump(donnees, fichier, indent=2, ensure_ascii=False)
+        os.replace(temporaire, chemin)
+
+    @classmethod
+    def charger(cls, chemin) -> "CotesElo":
+        with open(chemin, encoding="utf-8") as fichier:
+            donnees = json.load(fichier)
+        cotes = cls(**donnees["parametres"])
+        for nom, joueur in donnees["joueurs"].items():
+            cotes.cotes[nom] = joueur["cote"]
+            cotes.nb_parties[nom] = joueur["nb_parties"]
+        cotes.bonus_roles = donnees["bonus_roles"]
+        return cotes
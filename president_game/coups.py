@@ -0,0 +1,137 @@
+"""
+Coups légaux, à partir de tables précalculées
+
+Un coup (rang, nb_cartes) correspond à un bit : rang * nb_exemplaires + nb_cartes - 1.
+Une main est résumée par le masque des coups qu'elle permet, et les règles du centre par un masque :
+un coup est légal si son bit est dans les deux. Mêmes règles que le moteur :
+- même rang pour toutes les cartes posées, et pas en dessous du centre (pas au dessus pendant une révolution)
+- en cas de risque de saut, exactement les mêmes cartes que le centre
+"""
+from functools import lru_cache
+
+# Cartes de chaque rang dans un jeu : un paquet en a NB_COULEURS, une partie à plusieurs paquets davantage
+NB_COULEURS = 4
+
+
+class TableCoups:
+    """
+    Tables de masques pour un jeu de nb_rangs_cartes rangs avec nb_exemplaires cartes par rang
+    """
+    __slots__ = (
+        "nb_rangs_cartes", "nb_exemplaires", "masques_rang", "masques_au_dessus", "masques_en_dessous", "coups", "tous"
+    )
+
+    def __init__(self, nb_rangs_cartes=13, nb_exemplaires=4):
+        self.nb_rangs_cartes = nb_rangs_cartes
+        self.nb_exemplaires = nb_exemplaires
+        # masques_rang[rang][n] : coups possibles avec n cartes de ce rang en main
+        self.masques_rang = [
+            [((1 << n) - 1) << (rang * nb_exemplaires) for n in range(nb_exemplaires + 1)]
+            for rang in range(nb_rangs_cartes)
+        ]
+        # masques_au_dessus[rang] : coups de rang supérieur ou égal
+        self.tous = (1 << (nb_rangs_cartes * nb_exemplaires)) - 1
+        self.masques_au_dessus = [
+            self.tous & ~((1 << (rang * nb_exemplaires)) - 1) for rang in range(nb_rangs_cartes)
+        ]
+        # masques_en_dessous[rang] : coups de rang inférieur ou égal (pendant une révolution)
+        self.masques_en_dessous = [(1 << ((rang + 1) * nb_exemplaires)) - 1 for rang in range(nb_rangs_cartes)]
+        self.coups = [(bit // nb_exemplaires, bit % nb_exemplaires + 1) for bit in range(nb_rangs_cartes * nb_exemplaires)]
+
+    def bit(self, rang, nb_cartes) -> int:
+        return rang * self.nb_exemplaires + nb_cartes - 1
+
+    def masque_main(self, hand_counts) -> int:
+        masque = 0
+        for rang, n in enumerate(hand_counts):
+            masque |= self.masques_rang[rang][n]
+        return masque
+
+    def mettre_a_jour(self, masque_main, rang, n) -> int:
+        """
+        Masque d'une main dont le nombre de cartes de ce rang vient de passer à n
+        """
+        masques = self.masques_rang[rang]
+        return (masque_main & ~masques[-1]) | masques[n]
+
+    def masque_centre(self, top_rang, top_nb, risque_saut, revolution=False) -> int:
+        """
+        Coups autorisés par le centre, quelle que soit la main (top_rang None si personne n'a joué)
+        """
+        if top_rang is None:
+            return self.tous
+        if risque_saut:
+            return 1 << self.bit(top_rang, top_nb)
+        if revolution:
+            return self.masques_en_dessous[top_rang]
+        return self.masques_au_dessus[top_rang]
+
+    def est_legal(self, masque_main, rang, nb_cartes, top_rang, top_nb, risque_saut, revolution=False) -> bool:
+        if not (0 <= rang < self.nb_rangs_cartes and 1 <= nb_cartes <= self.nb_exemplaires):
+            return False
+        centre = self.masque_centre(top_rang, top_nb, risque_saut, revolution)
+        return bool((masque_main & centre) >> self.bit(rang, nb_cartes) & 1)
+
+    def decoder(self, masque) -> list[tuple[int, int]]:
+        """
+        Coups (rang, nb_cartes) d'un masque, par rang puis nombre de cartes croissants
+        """
+        coups = []
+        while masque:
+            bit_bas = masque & -masque
+            coups.append(self.coups[bit_bas.bit_length() - 1])
+            masque ^= bit_bas
+        return coups
+
+
+@lru_cache(maxsize=None)
+def table_coups(nb_rangs_cartes=13, nb_exemplaires=4) -> TableCoups:
+    return TableCoups(nb_rangs_cartes, nb_exemplaires)
+
+
+def compter_main(main, nb_rangs_cartes=13) -> list[int] | tuple[int, ...]:
+    """
+    Nombre de cartes de chaque rang d'une main : main.counts pour une vue riche, sinon compté depuis la liste
+    """
+    counts = getattr(main, "counts", None)
+    if counts is not None:
+        return counts
+    counts = [0] * max(nb_rangs_cartes, max(main, default=-1) + 1)
+    for carte in main:
+        counts[carte] += 1
+    return counts
+
+
+def legal_moves_mask(hand_counts, top=None, risque_saut=False, nb_exemplaires=None, revolution=False) -> int:
+    """
+    Masque des coups légaux (voir TableCoups pour la position des bits)
+
+    :param hand_counts: nombre de cartes de chaque rang dans la main
+    :param top: les cartes au centre (cartes_plateau[-1]), None ou vide si on a la main
+    :param nb_exemplaires: nombre de cartes par rang dans le jeu, par défaut 4 (ou plus si la main en a plus)
+    :param revolution: ordre des rangs inversé (Player.is_revolution)
+    """
+    if nb_exemplaires is None:
+        nb_exemplaires = max(4, max(hand_counts, default=0))
+    table = table_coups(len(hand_counts), nb_exemplaires)
+    if not top:
+        centre = table.tous
+    elif top[0] >= table.nb_rangs_cartes or len(top) > nb_exemplaires:
+        # Rien dans cette main ne peut aller sur le centre
+        return 0
+    else:
+        centre = table.masque_centre(top[0], len(top), risque_saut, revolution)
+    return table.masque_main(hand_counts) & centre
+
+
+def legal_moves(
+    hand_counts, top=None, risque_saut=False, nb_exemplaires=None, revolution=False
+) -> list[tuple[int, int]]:
+    """
+    Coups légaux (rang, nb_cartes), par rang puis nombre de cartes croissants, hors passer.
+    Passer est toujours permis, sauf quand on a la main.
+    """
+    if nb_exemplaires is None:
+        nb_exemplaires = max(4, max(hand_counts, default=0))
+    table = table_coups(len(hand_counts), nb_exemplaires)
+    return table.decoder(legal_moves_mask(hand_counts, top, risque_saut, nb_exemplaires, revolution))
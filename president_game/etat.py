@@ -0,0 +1,201 @@
+"""
+Etat compact d'une partie : les mains et les cartes déjà jouées sont des nombres de cartes par rang
+"""
+from president_game.coups import table_coups
+
+
+class GameState:
+    """
+    mains[i][rang] : nombre de cartes de ce rang dans la main du joueur i
+    cartes_deja_jouees[rang] : nombre de cartes de ce rang déjà posées
+    journal : cartes posées dans l'ordre du jeu, liste qui ne fait que s'allonger (partagée par les vues)
+    masques[i] : coups que permet la main du joueur i (voir president_game.coups), tenus à jour à chaque coup
+
+    Jouer et vérifier un coup se fait en temps constant. Les listes triées attendues par les joueurs
+    ne sont construites qu'à la demande, et gardées tant que la main ne change pas.
+    """
+    __slots__ = (
+        "nb_rangs_cartes",
+        "mains",
+        "tailles",
+        "cartes_deja_jouees",
+        "journal",
+        "nb_exemplaires",
+        "masques",
+        "table",
+        "_listes_mains",
+        "_liste_cartes_deja_jouees",
+    )
+
+    def __init__(self, nb_joueurs, nb_rangs_cartes=13, nb_exemplaires=4):
+        self.nb_rangs_cartes = nb_rangs_cartes
+        self.nb_exemplaires = nb_exemplaires
+        self.mains = [[0] * nb_rangs_cartes for _ in range(nb_joueurs)]
+        self.tailles = [0] * nb_joueurs
+        self.cartes_deja_jouees = [0] * nb_rangs_cartes
+        self.journal = []
+        self.table = table_coups(nb_rangs_cartes, nb_exemplaires)
+        self.masques = [0] * nb_joueurs
+        self._listes_mains = [None] * nb_joueurs
+        self._liste_cartes_deja_jouees = None
+
+    @classmethod
+    def from_hands(cls, hands: list[list[int]], nb_rangs_cartes=13, nb_exemplaires=4) -> "GameState":
+        etat = cls(len(hands), nb_rangs_cartes, nb_exemplaires)
+        for joueur, hand in enumerate(hands):
+            main = etat.mains[joueur]
+            for carte in hand:
+                main[carte] += 1
+            etat.tailles[joueur] = len(hand)
+            etat.masques[joueur] = etat.table.masque_main(main)
+        return etat
+
+    def reinitialiser(self, hands: list[list[int]]):
+        """
+        Nouvelle donne dans les mêmes listes (même nombre de joueurs). Le journal est remplacé, pas vidé :
+        les vues de la partie précédente restent valables
+        """
+        masques_rang = self.table.masques_rang
+        zeros = [0] * self.nb_rangs_cartes
+        for joueur, hand in enumerate(hands):
+            main = self.mains[joueur]
+            main[:] = zeros
+            # Les masques d'un rang s'emboîtent : le masque se construit carte par carte
+            masque = 0
+            for carte in hand:
+                main[carte] += 1
+                masque |= masques_rang[carte][main[carte]]
+            self.tailles[joueur] = len(hand)
+            self.masques[joueur] = masque
+            self._listes_mains[joueur] = None
+        self.cartes_deja_jouees[:] = zeros
+        self.journal = []
+        self._liste_cartes_deja_jouees = None
+
+    @staticmethod
+    def counts_to_list(counts) -> list[int]:
+        return [rang for rang, nb in enumerate(counts) for _ in range(nb)]
+
+    def main_liste(self, joueur) -> list[int]:
+        """
+        Main triée du joueur. La liste est partagée : ne pas la modifier
+        """
+        liste = self._listes_mains[joueur]
+        if liste is None:
+            liste = self.counts_to_list(self.mains[joueur])
+            self._listes_mains[joueur] = liste
+        return liste
+
+    def cartes_deja_jouees_liste(self) -> list[int]:
+        """
+        Cartes déjà jouées, triées. La liste est partagée : ne pas la modifier
+        """
+        if self._liste_cartes_deja_jouees is None:
+            self._liste_cartes_deja_jouees = self.counts_to_list(self.cartes_deja_jouees)
+        return self._liste_cartes_deja_jouees
+
+    def cartes_restantes(self) -> tuple[int, ...]:
+        """
+        Nombre de cartes de chaque rang pas encore posées
+        """
+        return tuple(self.nb_exemplaires - nb for nb in self.cartes_deja_jouees)
+
+    def possede(self, joueur, rang, nb=1) -> bool:
+        return 0 <= rang < self.nb_rangs_cartes and self.mains[joueur][rang] >= nb
+
+    def est_triche(
+        self, joueur, pose: list[int], cartes_au_dessus: list[int] | None, risque_saut: bool, revolution=False
+    ) -> bool:
+        """
+        Vérifie un coup non vide : même rang, pas en dessous du centre (pas au dessus pendant une révolution),
+        identique au centre en cas de risque de saut, et cartes présentes dans la main
+        """
+        rang = pose[0]
+        if not all(el == rang for el in pose):
+            return True
+        if cartes_au_dessus is None:
+            return not self.table.est_legal(self.masques[joueur], rang, len(pose), None, 0, False)
+        return not self.table.est_legal(
+            self.masques[joueur], rang, len(pose), cartes_au_dessus[0], len(cartes_au_dessus), risque_saut, revolution
+        )
+
+    def coups_legaux(self, joueur, cartes_au_dessus: list[int] | None, risque_saut: bool, revolution=False) -> int:
+        """
+        Masque des coups légaux du joueur (voir TableCoups.decoder pour la liste des coups)
+        """
+        if cartes_au_dessus is None:
+            return self.masques[joueur]
+        return self.masques[joueur] & self.table.masque_centre(
+            cartes_au_dessus[0], len(cartes_au_dessus), risque_saut, revolution
+        )
+
+    def jouer(self, joueur, rang, nb):
+        main = self.mains[joueur]
+        main[rang] -= nb
+        self.tailles[joueur] -= nb
+        self.masques[joueur] = self.table.mettre_a_jour(self.masques[joueur], rang, main[rang])
+        self.cartes_deja_jouees[rang] += nb
+        self.journal.extend([rang] * nb)
+        self._listes_mains[joueur] = None
+        self._liste_cartes_deja_jouees = None
+
+    def annuler(self, joueur, rang, nb):
+        """
+        Défait le dernier jouer(joueur, rang, nb)
+        """
+        main = self.mains[joueur]
+        main[rang] += nb
+        self.tailles[joueur] += nb
+        self.masques[joueur] = self.table.mettre_a_jour(self.masques[joueur], rang, main[rang])
+        self.cartes_deja_jouees[rang] -= nb
+        del self.journal[-nb:]
+        self._listes_mains[joueur] = None
+        self._liste_cartes_deja_jouees = None
+
+    def clone(self) -> "GameState":
+        """
+        Copie indépendante de l'état. Les listes triées en cache sont partagées : elles ne sont jamais modifiées,
+        seulement remplacées
+        """
+        etat = GameState.__new__(GameState)
+        etat.nb_rangs_cartes = self.nb_rangs_cartes
+        etat.nb_exemplaires = self.nb_exemplaires
+        etat.table = self.table
+        etat.mains = [main[:] for main in self.mains]
+        etat.tailles = self.tailles[:]
+        etat.masques = self.masques[:]
+        etat.cartes_deja_jouees = self.cartes_deja_jouees[:]
+        etat.journal = self.journal[:]
+        etat._listes_mains = self._listes_mains[:]
+        etat._liste_cartes_deja_jouees = self._liste_cartes_deja_jouees
+        return etat
+
+    def donner(self, joueur_source, joueur_cible, rang):
+        self.mains[joueur_source][rang] -= 1
+        self.tailles[joueur_source] -= 1
+        self.mains[joueur_cible][rang] += 1
+        self.tailles[joueur_cible] += 1
+        table = self.table
+        self.masques[joueur_source] = table.mettre_a_jour(
+            self.masques[joueur_source], rang, self.mains[joueur_source][rang]
+        )
+        self.masques[joueur_cible] = table.mettre_a_jour(
+            self.masques[joueur_cible], rang, self.mains[joueur_cible][rang]
+        )
+        self._listes_mains[joueur_source] = None
+        self._listes_mains[joueur_cible] = None
+
+    def plus_fortes(self, joueur, nb) -> list[int]:
+        """
+        Les nb cartes les plus fortes du joueur, de la plus faible à la plus forte
+        """
+        cartes = []
+        main = self.mains[joueur]
+        for rang in range(self.nb_rangs_cartes - 1, -1, -1):
+            cartes.extend([rang] * min(main[rang], nb - len(cartes)))
+            if len(cartes) == nb:
+                break
+        return cartes[::-1]
+
+    def est_vide(self, joueur) -> bool:
+        return self.tailles[joueur] == 0
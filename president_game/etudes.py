@@ -1,51 +1,46 @@
 import logging
+from random import Random
 
-import pandas as pd
-
+from president_game.championnat import Championnat, Championnats
 from president_game.logger import init_logger
-# pd.options.plotting.backend = "plotly"
 
 from president_game.player import DumbPlayer, AggressivePlayer, CheatPlayer, SlowPlayer
 from president_game.partie import Partie
-import plotly.express as px
-from itertools import permutations
+from president_game.rapports import tracer_scores
+from president_game.statistiques import CriterePrecision, Sprt
+from president_game.tournoi import Tournoi, tables_equilibrees
 
 
 logger = logging.getLogger()
 
 class Etudes:
     @staticmethod
-    def priorite_joueur_1():
+    def priorite_joueur_1(total_parties=500, nb_workers=1, seed=None, precision=None):
         """
         Quantifie l'avantage de jouer en premier joueur
+
+        :param precision: si fourni, s'arrête dès que le taux de victoire du premier joueur est connu à ±precision
+        (total_parties est alors un maximum)
         """
         nb_joueurs = 5
-        players = [DumbPlayer() for _ in range(nb_joueurs)]
-        scores_joueurs = [0 for _ in range(nb_joueurs)]
         # role_players = ["Trou", "Prez", "Vice-Trou", "Vice-Prez"]
         role_players = ["Joueur1", "Joueur2", "Joueur3", "Joueur4", "Joueur5"]
-        total_parties = 500
-        total_parties_played = 0
-        for _ in range(total_parties):
-            try:
-                p = Partie(
-                    nb_joueurs=nb_joueurs,
-                    nb_rangs_cartes=13,
-                    players=players,
-                    role_players=role_players,
-                    save_events=False,
-                )
-                p.play_whole_game_from_cards()
-                # print(p.classement)
-                for i, ind_joueur in enumerate(p.classement):
-                    # scores_joueurs[ind_joueur].append(scores_joueurs[ind_joueur][-1] + 3-i)
-                    # scores_joueurs[ind_joueur] += 3-i
-                    if i == 0:
-                        scores_joueurs[ind_joueur] += 1
-                    # scores_joueurs[ind_joueur] += 3-i
-                total_parties_played += 1
-            except NotImplementedError:
-                continue
+        # On ne compte que les victoires
+        points = [1] + [0] * (nb_joueurs - 1)
+        critere_arret = None
+        if precision is not None:
+            critere_arret = CriterePrecision(lambda resultats: resultats.stats_sieges(points)[0], precision)
+        resultats = Tournoi(
+            tables=[([DumbPlayer] * nb_joueurs, role_players)],
+            nb_parties=total_parties,
+            seed=seed,
+            nb_workers=nb_workers,
+            memoire_partagee=True,
+        ).lancer(critere_arret)
+        total_parties = resultats.nb_parties
+        scores_joueurs = resultats.scores_sieges(points)
+        for role, stats in zip(role_players, resultats.stats_sieges(points)):
+            logger.info(f"Taux de victoire {role} : {stats}")
 
         dic_indics = {}
         # columns_df = ["ScoreTrou", "ScorePrez", "Score"]
@@ -54,46 +49,47 @@ class Etudes:
             dic_indics[role_players[ind_player]] = [
                 scores_joueurs[ind_player] / total_parties
             ]
-        df = pd.DataFrame.from_dict(dic_indics, orient="index", columns=columns_df)
-        # df = df.reindex(["Prez", "Vice-Prez", "Vice-Trou", "Trou"])
-        fig = px.line(df)
-        fig.show()
+        # ordre = ["Prez", "Vice-Prez", "Vice-Trou", "Trou"]
+        tracer_scores(dic_indics, columns_df)
 
     @staticmethod
-    def avantage_president():
+    def avantage_president(total_parties=2, nb_workers=1, seed=None, precision=None, p1_victoire_prez=None):
         """
         Quantifie l'avantage du président
+
+        Avec un critère d'arrêt, total_parties est un maximum :
+        :param precision: s'arrête dès que les points moyens du président sont connus à ±precision
+        :param p1_victoire_prez: s'arrête dès qu'un SPRT tranche entre "le président gagne une partie sur
+        nb_joueurs" et "il en gagne p1_victoire_prez"
         """
         nb_joueurs = 5
-        players = [DumbPlayer() for _ in range(nb_joueurs)]
-        scores_joueurs = [0 for _ in range(nb_joueurs)]
         role_players = ["Trou", "Prez", "Vice-Trou", "Vice-Prez", "Neutre"]
-        total_parties = 2
-        total_parties_played = 0
-        for _ in range(total_parties):
-            try:
-                p = Partie(
-                    nb_joueurs=nb_joueurs,
-                    nb_rangs_cartes=13,
-                    players=players,
-                    role_players=role_players,
-                    save_events=False,
-                )
-                p.play_whole_game_from_cards()
-                for i, ind_joueur in enumerate(p.classement):
-                    scores_joueurs[ind_joueur] += 4 - i
-                total_parties_played += 1
-            except NotImplementedError:
-                continue
+        points = [4 - i for i in range(nb_joueurs)]
+        critere_arret = None
+        if precision is not None:
+            critere_arret = CriterePrecision(lambda resultats: resultats.stats_roles(points)["Prez"], precision)
+        elif p1_victoire_prez is not None:
+            critere_arret = Sprt(
+                lambda resultats: resultats.victoires_role("Prez"),
+                1 / nb_joueurs,
+                p1_victoire_prez,
+            )
+        resultats = Tournoi(
+            tables=[([DumbPlayer] * nb_joueurs, role_players)],
+            nb_parties=total_parties,
+            seed=seed,
+            nb_workers=nb_workers,
+            memoire_partagee=True,
+        ).lancer(critere_arret)
+        scores_joueurs = resultats.scores_sieges(points)
+        for role, stats in resultats.stats_roles(points).items():
+            logger.info(f"Points {role} : {stats}")
 
         dic_indics = {}
         columns_df = ["Score"]
         for ind_player in range(nb_joueurs):
             dic_indics[role_players[ind_player]] = [scores_joueurs[ind_player]]
-        df = pd.DataFrame.from_dict(dic_indics, orient="index", columns=columns_df)
-        df = df.reindex(["Prez", "Vice-Prez", "Neutre", "Vice-Trou", "Trou"])
-        fig = px.line(df)
-        fig.show()
+        tracer_scores(dic_indics, columns_df, ["Prez", "Vice-Prez", "Neutre", "Vice-Trou", "Trou"])
 
     @staticmethod
     def coherence_une_partie():
@@ -116,56 +112,54 @@ class Etudes:
         p.show_game()
 
     @staticmethod
-    def force_joueurs():
+    def force_joueurs(nb_iters=2, nb_workers=1, seed=None, duplique=True, precision=None):
         """
         Compare la force de plusieurs joueurs (2 ou plus)
+
+        :param duplique: chaque donne est jouée sur toutes les tables (nb_iters donnes), et chaque joueur est
+        comparé au premier sur les mêmes donnes
+        :param precision: en mode dupliqué, s'arrête dès que l'écart entre les deux premiers joueurs est connu
+        à ±precision (nb_iters est alors un maximum)
         """
         classe_joueurs = [DumbPlayer, AggressivePlayer]
         name_players = [el().get_name() for el in classe_joueurs]
         nb_joueurs = 2 * len(classe_joueurs)
-        players = [
-            classe_joueurs[i]()
-            for i in range(nb_joueurs // len(classe_joueurs))
-            for _ in range(2)
-        ]
-        arrangements_joueurs = list(set(permutations(players)))
 
         roles = ["Prez", "Vice-Prez", "Vice-Trou", "Trou"] + ["Neutre"] * (
             nb_joueurs - 4
         )
-        arrangement_roles = list(set(permutations(roles)))
-
-        nb_iters = 2
-        score_joueurs = [0 for _ in range(len(classe_joueurs))]
-        total_parties_played = 0
-        for _ in range(nb_iters):
-            for arrangement_joueur in arrangements_joueurs:
-                for arrangement_role in arrangement_roles:
-                    try:
-                        p = Partie(
-                            nb_joueurs=nb_joueurs,
-                            nb_rangs_cartes=13,
-                            players=arrangement_joueur,
-                            role_players=arrangement_role,
-                            save_events=False,
-                        )
-                        p.play_whole_game_from_cards()
-                        for i, ind_joueur in enumerate(p.classement):
-                            real_index_joueur = name_players.index(
-                                arrangement_joueur[ind_joueur].get_name()
-                            )
-                            score_joueurs[real_index_joueur] += 4 - i
-                        total_parties_played += 1
-                    except NotImplementedError:
-                        continue
+        # Chaque classe joue chaque siège et chaque rôle aussi souvent que les autres
+        tables = tables_equilibrees(classe_joueurs, roles)
+        points = [4 - i for i in range(nb_joueurs)]
+        critere_arret = None
+        if duplique and precision is not None:
+            critere_arret = CriterePrecision(
+                lambda resultats: resultats.stats_differences(points, name_players[1], name_players[0]), precision
+            )
+        resultats = Tournoi(
+            tables=tables,
+            nb_parties=nb_iters * len(tables),
+            seed=seed,
+            nb_workers=nb_workers,
+            duplique=duplique,
+            memoire_partagee=True,
+        ).lancer(critere_arret)
+        scores = resultats.scores_joueurs(points)
+        score_joueurs = [scores.get(name_player, 0) for name_player in name_players]
+        if duplique:
+            for name_player in name_players[1:]:
+                comparaison = resultats.comparaison(points, name_player, name_players[0])
+                logger.info(
+                    f"{name_player} - {name_players[0]} : {comparaison['ecart']:+.3f} points par partie "
+                    f"(erreur type {comparaison['erreur_type']:.3f}, z = {comparaison['z']:.1f}, "
+                    f"{comparaison['nb_donnes']} donnes)"
+                )
 
         dic_indics = {}
         columns_df = ["Score"]
         for ind_player, name_player in enumerate(name_players):
             dic_indics[name_player] = [score_joueurs[ind_player]]
-        df = pd.DataFrame.from_dict(dic_indics, orient="index", columns=columns_df)
-        fig = px.line(df)
-        fig.show()
+        tracer_scores(dic_indics, columns_df)
 
     @staticmethod
     def variete_joueurs():
@@ -188,9 +182,35 @@ class Etudes:
         p.play_whole_game_from_cards()
         p.show_game()
 
-    def partie_reelle(nb_joueurs):
-        # A écrire
-        pass
+    @staticmethod
+    def partie_reelle(nb_joueurs=5, nb_manches=20, nb_championnats=200, nb_workers=1, seed=None):
+        """
+        Parties enchaînées comme en vrai : le classement d'une manche donne les rôles (et les échanges) de la suivante.
+        Affiche un championnat manche par manche, puis mesure sur nb_championnats championnats la probabilité
+        de garder chaque rôle d'une manche à l'autre
+        """
+        classe_joueurs = [DumbPlayer, AggressivePlayer]
+        fabriques = [classe_joueurs[i % len(classe_joueurs)] for i in range(nb_joueurs)]
+        championnat = Championnat([fabrique() for fabrique in fabriques], nb_manches, rng=Random(seed))
+        name_players = [f"{i}_{player.get_name()}" for i, player in enumerate(championnat.players)]
+        while championnat.manche < nb_manches:
+            roles = championnat.role_players
+            classement = championnat.jouer_manche()
+            logger.info(
+                f"Manche {championnat.manche} : "
+                + " ".join(f"{name_players[siege]} ({roles[siege]})" for siege in classement)
+                + f", scores : {championnat.scores}"
+            )
+
+        resultats = Championnats(fabriques, nb_championnats, nb_manches, seed=seed, nb_workers=nb_workers).lancer()
+        for siege, stats in enumerate(resultats.stats_scores_finaux()):
+            logger.info(f"Score final {name_players[siege]} : {stats}")
+        ordre = [role for role in ["Prez", "Vice-Prez", "Neutre", "Vice-Trou", "Trou"] if role in resultats.transitions]
+        dic_indics = {}
+        for role in ordre:
+            dic_indics[role] = [resultats.probabilite_garder(role)]
+            logger.info(f"Probabilité de rester {role} : {dic_indics[role][0]:.3f}")
+        tracer_scores(dic_indics, ["Garde son rôle"], ordre)
 
 
 if __name__ == "__main__":
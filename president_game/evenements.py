@@ -0,0 +1,120 @@
+"""
+Enregistrement des événements d'une partie
+
+Chaque événement est un petit tuple d'entiers (tour, joueur, action, rang, nb_cartes) rangé dans un tampon
+préalloué. Le texte (affichage de la partie, résumé CSV) n'est construit qu'à la demande.
+"""
+from array import array
+
+from president_game.utils import pretty_actions_jouees, show_pretty_pose
+
+# Actions
+JOUE = 0
+PASSE = 1
+SAUTE = 2
+TRICHE = 3
+FINI = 4
+COUPE = 5
+NOUVEAU_PLI = 6
+NOUVELLE_LIGNE = 7
+TIMEOUT = 8
+BUG = 9
+FORMAT = 10
+REVOLUTION = 11
+
+NB_CHAMPS = 5
+AUCUN_JOUEUR = -1
+AUCUN_RANG = -1
+
+# Lettre de chaque action dans le résumé de la partie
+LETTRES_ACTIONS = {PASSE: "P", SAUTE: "S", TRICHE: "T"}
+
+
+class EnregistreurEvenements:
+    """
+    Tampon d'événements d'une partie. Sa capacité double quand il est plein
+    """
+    __slots__ = ("tampon", "nb_evenements")
+
+    def __init__(self, capacite=256):
+        self.tampon = array("h", bytes(2 * NB_CHAMPS * capacite))
+        self.nb_evenements = 0
+
+    def ajouter(self, tour, joueur, action, rang=AUCUN_RANG, nb_cartes=0):
+        position = self.nb_evenements * NB_CHAMPS
+        if position == len(self.tampon):
+            self.tampon.extend(array("h", bytes(2 * len(self.tampon))))
+        tampon = self.tampon
+        tampon[position] = tour
+        tampon[position + 1] = joueur
+        tampon[position + 2] = action
+        tampon[position + 3] = rang
+        tampon[position + 4] = nb_cartes
+        self.nb_evenements += 1
+
+    def __len__(self):
+        return self.nb_evenements
+
+    def __iter__(self):
+        tampon = self.tampon
+        for position in range(0, self.nb_evenements * NB_CHAMPS, NB_CHAMPS):
+            yield tuple(tampon[position: position + NB_CHAMPS])
+
+    def rendre(self, noms_joueurs: list[str]) -> list[str]:
+        """
+        Déroulé de la partie, une ligne par événement
+        """
+        lignes = []
+        for tour, joueur, action, rang, nb_cartes in self:
+            nom = noms_joueurs[joueur] if joueur != AUCUN_JOUEUR else ""
+            if action == JOUE:
+                lignes.append(f"{nom} joue {show_pretty_pose([rang] * nb_cartes)}")
+            elif action == PASSE:
+                lignes.append(f"Le joueur : {nom} passe")
+            elif action == SAUTE:
+                lignes.append(f"Le joueur : {nom} est sauté")
+            elif action == TRICHE:
+                if nb_cartes:
+                    lignes.append(f"Le joueur {nom} a essayé de jouer {show_pretty_pose([rang] * nb_cartes)}, "
+                                  f"il triche !")
+                else:
+                    lignes.append(f"Le joueur : {nom} a la main mais ne joue pas : il va en dernier")
+            elif action == FINI:
+                lignes.append(f"{nom} a fini")
+            elif action == COUPE:
+                lignes.append("Coupe !")
+            elif action == NOUVEAU_PLI:
+                lignes.append(f"{nom} a la main")
+            elif action == TIMEOUT:
+                lignes.append(f"Le code de {nom} a pris trop de temps : on joue à sa place")
+            elif action == BUG:
+                lignes.append(f"Le code de {nom} est beugué : on joue à sa place")
+            elif action == FORMAT:
+                lignes.append(f"Le joueur {nom} n'a pas renvoyé le bon format : on joue à sa place")
+            elif action == REVOLUTION:
+                lignes.append(f"Révolution de {show_pretty_pose([rang])} !!")
+        return lignes
+
+    def resume(self, nb_joueurs) -> dict[int, list[str]]:
+        """
+        Actions de chaque joueur, regroupées par ligne (un tour de table ou un pli) :
+        "P" passe, "S" sauté, "T" triche, "x" a déjà fini
+        """
+        resume = {i: [] for i in range(nb_joueurs)}
+        actions_ligne = {i: [] for i in range(nb_joueurs)}
+        fini = set()
+        for _, joueur, action, rang, nb_cartes in self:
+            if action == JOUE:
+                actions_ligne[joueur].extend([str(rang)] * nb_cartes)
+            elif action in LETTRES_ACTIONS:
+                actions_ligne[joueur].append(LETTRES_ACTIONS[action])
+            if action in (FINI, TRICHE):
+                fini.add(joueur)
+            elif action in (NOUVEAU_PLI, NOUVELLE_LIGNE):
+                for i in range(nb_joueurs):
+                    action_jouee = pretty_actions_jouees(actions_ligne[i])
+                    if i in fini and action_jouee == "":
+                        action_jouee = "x"
+                    resume[i].append(action_jouee)
+                    actions_ligne[i] = []
+        return resume
@@ -0,0 +1,105 @@
+"""
+Exécution des joueurs : un thread dédié et persistant par joueur, au lieu d'un pool créé à chaque tour.
+Pour les parties asyncio (Partie.play_whole_game_async), ExecutionJoueursAsync attend les joueurs asynchrones
+et fait tourner les autres dans un pool de threads borné.
+"""
+import asyncio
+import concurrent.futures
+import inspect
+from functools import partial
+
+from president_game.player import Player
+
+
+class ExecutionJoueurs:
+    """
+    Appelle les méthodes des joueurs avec un timeout.
+
+    Chaque joueur a son propre thread, créé au premier appel et gardé jusqu'à fermer().
+    Les joueurs de confiance (Player.trusted) sont appelés directement, sans timeout.
+    Les joueurs isolés dans un processus (sandbox.JoueurIsole) gèrent eux-mêmes le timeout.
+    Un joueur qui dépasse le timeout est abandonné dans son thread : ses appels suivants partent d'un thread neuf.
+    """
+    def __init__(self):
+        self.executors: dict[int, concurrent.futures.ThreadPoolExecutor] = {}
+
+    def appeler(self, player: Player, nom_methode: str, timeout, *args):
+        """
+        :raises concurrent.futures.TimeoutError: si le joueur n'a pas répondu à temps
+        """
+        # Les joueurs isolés dans un processus (sandbox.JoueurIsole) appliquent eux-mêmes le timeout
+        if hasattr(player, "appeler_avec_timeout"):
+            return player.appeler_avec_timeout(nom_methode, timeout, *args)
+        methode = getattr(player, nom_methode)
+        if player.trusted:
+            return methode(*args)
+        executor = self.executors.get(id(player))
+        if executor is None:
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"joueur_{player.get_name()}"
+            )
+            self.executors[id(player)] = executor
+        future = executor.submit(methode, *args)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            # Le thread reste bloqué jusqu'à ce que le joueur ait fini : on ne s'en sert plus
+            future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            del self.executors[id(player)]
+            raise
+
+    def fermer(self):
+        # On n'attend pas les joueurs encore bloqués
+        for executor in self.executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.executors = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+class ExecutionJoueursAsync:
+    """
+    Appelle les méthodes des joueurs depuis une boucle asyncio, avec un timeout.
+
+    Les méthodes async sont attendues et annulées au timeout. Les joueurs de confiance synchrones sont appelés
+    directement. Les autres joueurs synchrones (et les joueurs isolés) tournent dans un pool de max_threads
+    threads partagé par toutes les parties : au timeout, la partie continue sans eux mais le thread reste
+    occupé jusqu'à ce qu'ils aient fini.
+    """
+    def __init__(self, max_threads=8):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="joueurs")
+
+    async def appeler(self, player: Player, nom_methode: str, timeout, *args):
+        """
+        :raises concurrent.futures.TimeoutError: si le joueur n'a pas répondu à temps
+        """
+        methode = getattr(player, nom_methode)
+        if inspect.iscoroutinefunction(methode):
+            attente = methode(*args)
+        elif hasattr(player, "appeler_avec_timeout"):
+            # Le joueur isolé applique lui-même le timeout
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, partial(player.appeler_avec_timeout, nom_methode, timeout, *args)
+            )
+        elif player.trusted:
+            return methode(*args)
+        else:
+            attente = asyncio.get_running_loop().run_in_executor(self.executor, partial(methode, *args))
+        try:
+            return await asyncio.wait_for(attente, timeout)
+        except asyncio.TimeoutError:
+            raise concurrent.futures.TimeoutError() from None
+
+    def fermer(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
@@ -0,0 +1,182 @@
+"""
+Mesures de temps d'une partie : latence de que_jouer par joueur, remplacements (timeout, bug, mauvais format),
+durée des phases du moteur (distribution, échanges, traitement de chaque tour)
+
+Partie(mesurer=True) remplit partie.mesures à chaque donne, Tournoi(mesurer=True) les additionne sur tout le
+tournoi. Avec Partie(tracer=True), chaque appel est aussi gardé pour exporter la chronologie de la partie au format
+Chrome trace event (exporter_trace), à ouvrir dans chrome://tracing ou https://ui.perfetto.dev.
+"""
+import json
+import math
+import time
+
+# Largeur des classes des histogrammes : 20 classes par puissance de 10, soit des bornes espacées de 12 %
+CLASSES_PAR_DECADE = 20
+
+
+class HistogrammeLatences:
+    """
+    Durées (en secondes) rangées dans des classes logarithmiques : les quantiles sont approchés à 6 % près,
+    la mémoire ne dépend pas du nombre de mesures et deux histogrammes s'additionnent
+    """
+    __slots__ = ("classes", "n", "total", "max")
+
+    def __init__(self):
+        # Indice de la classe -> nombre de mesures
+        self.classes: dict[int, int] = {}
+        self.n = 0
+        self.total = 0.
+        self.max = 0.
+
+    def ajouter(self, duree):
+        indice = math.floor(math.log10(max(duree, 1e-9)) * CLASSES_PAR_DECADE)
+        self.classes[indice] = self.classes.get(indice, 0) + 1
+        self.n += 1
+        self.total += duree
+        if duree > self.max:
+            self.max = duree
+
+    def fusionner(self, autre: "HistogrammeLatences"):
+        for indice, nb in autre.classes.items():
+            self.classes[indice] = self.classes.get(indice, 0) + nb
+        self.n += autre.n
+        self.total += autre.total
+        self.max = max(self.max, autre.max)
+
+    @property
+    def moyenne(self) -> float:
+        return self.total / self.n if self.n else 0.
+
+    def quantile(self, q) -> float:
+        """
+        Centre (géométrique) de la classe qui contient le quantile q, sans dépasser le maximum
+        """
+        if not self.n:
+            return 0.
+        rang = q * self.n
+        cumul = 0
+        for indice in sorted(self.classes):
+            cumul += self.classes[indice]
+            if cumul >= rang:
+                return min(10 ** ((indice + 0.5) / CLASSES_PAR_DECADE), self.max)
+        return self.max
+
+    def resume(self) -> dict:
+        """
+        Nombre de mesures et durées en millisecondes
+        """
+        return {
+            "n": self.n,
+            "moyenne_ms": self.moyenne * 1e3,
+            "p50_ms": self.quantile(0.5) * 1e3,
+            "p99_ms": self.quantile(0.99) * 1e3,
+            "max_ms": self.max * 1e3,
+        }
+
+
+class Mesures:
+    """
+    Mesures d'une partie, ou de plusieurs après fusionner. Les joueurs sont identifiés par leur nom :
+    deux joueurs du même nom sont comptés ensemble
+
+    :param noms_joueurs: nom du joueur de chaque siège. Sans noms, les mesures sont vides et servent à
+    additionner celles d'autres parties
+    :param trace: garde aussi chaque mesure, avec son instant, pour exporter_trace
+    """
+    def __init__(self, noms_joueurs: list[str] | None = None, trace=False):
+        self.noms_joueurs = noms_joueurs
+        self.nb_parties = 0 if noms_joueurs is None else 1
+        self.latences: dict[str, HistogrammeLatences] = {}
+        self.timeouts: dict[str, int] = {}
+        # Coups joués à la place du joueur : timeouts, bugs et mauvais formats
+        self.remplacements: dict[str, int] = {}
+        # "distribution", "echanges" et "moteur" (traitement d'un tour, hors appel du joueur)
+        self.phases: dict[str, HistogrammeLatences] = {}
+        self.origine = time.perf_counter()
+        self.evenements_trace: list[dict] | None = [] if trace else None
+
+    def ajouter_joueur(self, siege, debut, fin):
+        """
+        Appel de que_jouer du joueur du siège, entre les instants debut et fin (time.perf_counter)
+        """
+        nom = self.noms_joueurs[siege]
+        histogramme = self.latences.get(nom)
+        if histogramme is None:
+            histogramme = self.latences[nom] = HistogrammeLatences()
+        histogramme.ajouter(fin - debut)
+        if self.evenements_trace is not None:
+            self._tracer("que_jouer", siege + 1, debut, fin)
+
+    def ajouter_phase(self, nom, debut, fin):
+        histogramme = self.phases.get(nom)
+        if histogramme is None:
+            histogramme = self.phases[nom] = HistogrammeLatences()
+        histogramme.ajouter(fin - debut)
+        if self.evenements_trace is not None:
+            self._tracer(nom, 0, debut, fin)
+
+    def ajouter_remplacement(self, siege, cause):
+        """
+        Le moteur a joué à la place du joueur du siège. cause : "timeout", "bug" ou "format"
+        """
+        nom = self.noms_joueurs[siege]
+        self.remplacements[nom] = self.remplacements.get(nom, 0) + 1
+        if cause == "timeout":
+            self.timeouts[nom] = self.timeouts.get(nom, 0) + 1
+        if self.evenements_trace is not None:
+            self.evenements_trace.append({
+                "name": cause, "ph": "i", "s": "t", "pid": 0, "tid": siege + 1,
+                "ts": (time.perf_counter() - self.origine) * 1e6,
+            })
+
+    def _tracer(self, nom, fil, debut, fin):
+        self.evenements_trace.append({
+            "name": nom, "ph": "X", "pid": 0, "tid": fil,
+            "ts": (debut - self.origine) * 1e6, "dur": (fin - debut) * 1e6,
+        })
+
+    def fusionner(self, autre: "Mesures"):
+        """
+        Ajoute les mesures d'une autre partie (la trace n'est pas fusionnée)
+        """
+        self.nb_parties += autre.nb_parties
+        for histogrammes, autres_histogrammes in [(self.latences, autre.latences), (self.phases, autre.phases)]:
+            for nom, histogramme in autres_histogrammes.items():
+                histogrammes.setdefault(nom, HistogrammeLatences()).fusionner(histogramme)
+        for compteurs, autres_compteurs in [(self.timeouts, autre.timeouts), (self.remplacements, autre.remplacements)]:
+            for nom, nb in autres_compteurs.items():
+                compteurs[nom] = compteurs.get(nom, 0) + nb
+
+    def resume(self) -> dict:
+        """
+        Par joueur : latences de que_jouer, timeouts et remplacements. Par phase du moteur : durées
+        """
+        return {
+            "nb_parties": self.nb_parties,
+            "joueurs": {
+                nom: {
+                    **histogramme.resume(),
+                    "timeouts": self.timeouts.get(nom, 0),
+                    "remplacements": self.remplacements.get(nom, 0),
+                }
+                for nom, histogramme in self.latences.items()
+            },
+            "phases": {nom: histogramme.resume() for nom, histogramme in self.phases.items()},
+        }
+
+    def trace(self) -> dict:
+        """
+        Chronologie de la partie au format Chrome trace event : un fil pour le moteur, un par siège
+        """
+        if self.evenements_trace is None:
+            raise ValueError("La trace n'a pas été gardée : il faut Partie(tracer=True)")
+        noms_fils = ["moteur"] + [f"{siege}_{nom}" for siege, nom in enumerate(self.noms_joueurs)]
+        metadonnees = [
+            {"name": "thread_name", "ph": "M", "pid": 0, "tid": fil, "args": {"name": nom}}
+            for fil, nom in enumerate(noms_fils)
+        ]
+        return {"traceEvents": metadonnees + self.evenements_trace, "displayTimeUnit": "ms"}
+
+    def exporter_trace(self, chemin):
+        with open(chemin, "w", encoding="utf-8") as fichier:
+            json.dump(self.trace(), fichier)
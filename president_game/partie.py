@@ -1,21 +1,60 @@
 import logging
-import operator
-from random import shuffle
-from copy import deepcopy, copy
+from array import array
+from random import Random, shuffle
+from copy import copy
+from functools import lru_cache
+from time import perf_counter
 import concurrent.futures
-
-import pandas as pd
-
+import inspect
+
+from president_game import evenements
+from president_game.archive import ACTION_TRICHE, EnregistrementPartie, JoueurRejoue, actions_vides, code_action
+from president_game.coups import NB_COULEURS
+from president_game.etat import GameState
+from president_game.evenements import EnregistreurEvenements
+from president_game.execution import ExecutionJoueurs, ExecutionJoueursAsync
+from president_game.mesures import Mesures
 from president_game.player import Player, DumbPlayer
-from president_game.utils import (
-    show_pretty_pose, show_super_pretty_hand, pretty_actions_jouees,
+from president_game.position import (
+    EFFET_COUPE, EFFET_FINI, EFFET_NOUVEAU_PLI, EFFET_REVOLUTION, EFFET_SAUTE, EFFET_TRICHE, PASSER, TRICHER,
+    Position,
 )
+from president_game.resultats import ResultSink, SinkResumeCsv
+from president_game.vues import VueCartes, VueMain, VueCartesDejaJouees
+from president_game.utils import show_super_pretty_hand
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=None)
+def paquet_modele(nb_rangs_cartes, nb_exemplaires=4) -> tuple[int, ...]:
+    """
+    Paquet trié, construit une seule fois : chaque donne en mélange une copie
+    """
+    return tuple(valeur for valeur in range(0, nb_rangs_cartes) for _ in range(nb_exemplaires))
+
+
+@lru_cache(maxsize=None)
+def sieges_echanges(role_players: tuple[str, ...]) -> tuple[tuple[int, int, int], ...]:
+    """
+    Echanges de début de partie : (siège qui donne ses meilleures cartes, siège qui les reçoit, nombre de cartes)
+    """
+    if {"Trou", "Prez", "Vice-Trou", "Vice-Prez"}.issubset(set(role_players)):
+        return (
+            (role_players.index("Trou"), role_players.index("Prez"), 2),
+            (role_players.index("Vice-Trou"), role_players.index("Vice-Prez"), 1),
+        )
+    if len({"Trou", "Prez", "Vice-Trou", "Vice-Prez"} & set(role_players)):
+        raise ValueError(f"Ces rôles : {list(role_players)} sont illogiques")
+    return ()
+
+
 class Partie:
     # Common elements for a whole game
     nb_joueurs: int
     nb_rangs_cartes: int
+    # Nombre de paquets mélangés ensemble, et donc de cartes de chaque rang (4 par paquet)
+    nb_paquets: int
+    nb_exemplaires: int
     lowest_card: int
     players: list[Player]
     save_events: bool
@@ -27,16 +66,24 @@ class Partie:
     role_players: list[str] | None = None
 
     # Variables varying thoughout a round
-    current_cards_players: list[list[int]] | None = None
-    counter_same_card: int = 0
+    etat: GameState | None = None
+    # Déroulé du jeu (joueur actuel, pli, classement...), créée au début de play_whole_game_from_cards
+    position: Position | None = None
     current_card_over: int | None = None
-    is_revolution: bool = False
-    risque_saut: bool = False
 
     # Elements of output summarizing the game
     classement: list[int] | None = None
     historique_jeux: list[list[list[int]]] = None
-    all_events: list[str] = []
+    # Evénements de la dernière partie jouée, None si save_events est False
+    evenements: EnregistreurEvenements | None = None
+    nb_tours: int = 0
+    # Nombre de timeouts de chaque siège pendant la dernière donne
+    timeouts_sieges: list[int] | None = None
+    # Cartes données par le Prez puis le Vice-Prez, et actions de chaque tour (voir archive.code_action)
+    choix_echanges: list[int] | None = None
+    actions: array | None = None
+    # Temps de réponse des joueurs et du moteur pendant la dernière donne, None si mesurer est False
+    mesures: Mesures | None = None
 
     def __init__(
         self,
@@ -46,12 +93,33 @@ class Partie:
         role_players=None,
         cards_shuffled=None,
         save_events=True,
-        timeout_players=3
+        timeout_players=3,
+        execution_joueurs=None,
+        enregistrer_actions=False,
+        result_sink: ResultSink | None = None,
+        mesurer=False,
+        tracer=False,
+        nb_paquets=1,
     ):
         self.nb_joueurs = nb_joueurs
         self.timeout_players = timeout_players
+        # Threads des joueurs : partagés si fournis (par exemple pour tout un tournoi), sinon propres à la partie
+        self.execution_joueurs = execution_joueurs or ExecutionJoueurs()
+        # Les threads propres à la partie sont fermés à la fin de chaque donne
+        self.execution_propre = execution_joueurs is None
         self.save_events = save_events
+        # Enregistrement des actions pour l'archivage et le rejeu (Partie.record, Partie.replay)
+        self.enregistrer_actions = enregistrer_actions
+        # Destination du résumé de chaque partie : par défaut resume_partie.csv, si on garde les événements
+        if result_sink is None and save_events:
+            result_sink = SinkResumeCsv()
+        self.result_sink = result_sink
+        # Mesures de temps de chaque donne (Partie.mesures), avec la chronologie complète si tracer est True
+        self.mesurer = mesurer or tracer
+        self.tracer = tracer
         self.nb_rangs_cartes = nb_rangs_cartes
+        self.nb_paquets = nb_paquets
+        self.nb_exemplaires = NB_COULEURS * nb_paquets
         self.lowest_card = 0
         if players is None:
             self.players = [DumbPlayer() for _ in range(nb_joueurs)]
@@ -71,37 +139,78 @@ class Partie:
             self.role_players = role_players
 
         self.indexed_name_players = [f"{i}_{player.get_name()}" for i, player in enumerate(players)]
+        # Les joueurs isolés (sandbox.JoueurIsole) appliquent eux-mêmes le timeout, échanges de cartes compris
+        for player in self.players:
+            if hasattr(player, "appeler_avec_timeout"):
+                player.timeout = timeout_players
+        self.reset(cards_shuffled=cards_shuffled)
+
+    def reset(self, seed=None, cards_shuffled=None, role_players=None):
+        """
+        Prépare une nouvelle donne avec les mêmes joueurs, sans reconstruire la partie : l'état (GameState)
+        est réutilisé, et les résultats de la partie précédente (classement, événements...) sont effacés
 
+        :param seed: graine du mélange, si cards_shuffled n'est pas fourni
+        :param role_players: rôles de la nouvelle donne, sinon on garde ceux de la précédente
+        """
+        if role_players is not None:
+            self.role_players = role_players
         if cards_shuffled:
             self.cards_shuffled = cards_shuffled
         else:
-            self.shuffle()
-        self.distribute_cards()
-        self.exchange_cards_classic()
+            self.shuffle(seed)
+        self.position = None
+        self.classement = None
+        self.historique_jeux = None
+        self.evenements = None
+        self.nb_tours = 0
+        self.timeouts_sieges = None
+        self.actions = None
+        self.choix_echanges = []
+        if self.mesurer:
+            self.mesures = mesures = Mesures(
+                [player.get_name() or type(player).__name__ for player in self.players], self.tracer
+            )
+            debut = perf_counter()
+            self.distribute_cards()
+            milieu = perf_counter()
+            self.exchange_cards_classic()
+            mesures.ajouter_phase("distribution", debut, milieu)
+            mesures.ajouter_phase("echanges", milieu, perf_counter())
+        else:
+            self.distribute_cards()
+            self.exchange_cards_classic()
 
     @property
     def all_cards(self):
-        return [valeur for valeur in range(0, self.nb_rangs_cartes) for _ in range(4)]
+        return list(paquet_modele(self.nb_rangs_cartes, self.nb_exemplaires))
 
-    def shuffle(self):
-        self.cards_shuffled = copy(self.all_cards)
-        shuffle(self.cards_shuffled)
+    def shuffle(self, seed=None):
+        self.cards_shuffled = list(paquet_modele(self.nb_rangs_cartes, self.nb_exemplaires))
+        if seed is None:
+            shuffle(self.cards_shuffled)
+        else:
+            Random(seed).shuffle(self.cards_shuffled)
 
     def distribute_cards(self):
-        self.initial_cards_players = []
-        for i in range(self.nb_joueurs):
-            cartes_distrib = sorted(
-                self.cards_shuffled[
-                    i * len(self.all_cards) // self.nb_joueurs : (i + 1)
-                    * len(self.all_cards)
-                    // self.nb_joueurs
-                ]
-            )
-            self.initial_cards_players.append(cartes_distrib)
-            self.players[i].donner_main(cartes_distrib)
-        self.current_cards_players = deepcopy(self.initial_cards_players)
+        nb_cartes = len(paquet_modele(self.nb_rangs_cartes, self.nb_exemplaires))
+        nb_joueurs = self.nb_joueurs
+        self.initial_cards_players = [
+            sorted(self.cards_shuffled[i * nb_cartes // nb_joueurs: (i + 1) * nb_cartes // nb_joueurs])
+            for i in range(nb_joueurs)
+        ]
+        for player, cartes_distrib in zip(self.players, self.initial_cards_players):
+            player.donner_main(cartes_distrib)
+        if self.etat is None:
+            self.etat = GameState.from_hands(self.initial_cards_players, self.nb_rangs_cartes, self.nb_exemplaires)
+        else:
+            self.etat.reinitialiser(self.initial_cards_players)
         self.pretty_jeu(self.indexed_name_players)
 
+    @property
+    def current_cards_players(self) -> list[list[int]]:
+        return [copy(self.etat.main_liste(i)) for i in range(self.nb_joueurs)]
+
     def pretty_jeu(self, name_players, init_str="Jeu initial: "):
         if not self.save_events:
             return
@@ -111,123 +220,64 @@ class Partie:
         logger.info(" ".join(events))
 
     def show_pretty_hand(self, index_player) -> str:
-        return show_super_pretty_hand(self.current_cards_players[index_player])
+        return show_super_pretty_hand(self.etat.main_liste(index_player))
         # return "".join([mapping_cards_real_game(el) for el in )
 
     def exchange_cards_classic(self):
-        if {"Trou", "Prez", "Vice-Trou", "Vice-Prez"}.issubset(set(self.role_players)):
-            self.exchange_cards(
-                self.role_players.index("Trou"), self.role_players.index("Prez"), 2
-            )
-            self.exchange_cards(
-                self.role_players.index("Vice-Trou"),
-                self.role_players.index("Vice-Prez"),
-                1,
-            )
-            self.pretty_jeu("Jeu après échange: ")
-        elif len({"Trou", "Prez", "Vice-Trou", "Vice_Prez"} & set(self.role_players)):
-            raise ValueError(f"Ces rôles : {self.role_players} sont illogiques")
+        echanges = sieges_echanges(tuple(self.role_players))
+        if echanges:
+            for joueur_inferieur, joueur_superieur, nb_cards_to_exchange in echanges:
+                self.exchange_cards(joueur_inferieur, joueur_superieur, nb_cards_to_exchange)
+            self.pretty_jeu(self.indexed_name_players, "Jeu après échange: ")
 
     def exchange_cards(self, joueur_inferieur, joueur_superieur, nb_cards_to_exchange):
         # Le joueur inférieur donne ses meilleures cartes au joueur supérieur
-        main_joueur_inferieur = copy(self.current_cards_players[joueur_inferieur])
-        main_joueur_superieur = copy(self.current_cards_players[joueur_superieur])
-        self.current_cards_players[joueur_inferieur] = main_joueur_inferieur[
-            :-nb_cards_to_exchange
-        ]
-        self.current_cards_players[joueur_superieur] = sorted(
-            main_joueur_superieur + main_joueur_inferieur[-nb_cards_to_exchange:]
-        )
+        for card in self.etat.plus_fortes(joueur_inferieur, nb_cards_to_exchange):
+            self.etat.donner(joueur_inferieur, joueur_superieur, card)
 
         # Cartes avant échange
-        main_joueur_inferieur = copy(self.current_cards_players[joueur_inferieur])
-        main_joueur_superieur = copy(self.current_cards_players[joueur_superieur])
+        main_joueur_superieur = copy(self.etat.main_liste(joueur_superieur))
 
         if nb_cards_to_exchange == 1:
             # Le Vice Prez choisit sa carte
             card = self.players[joueur_superieur].give_card_vice_prez_to_vice_trou(
                 main_joueur_superieur
             )
-            if card not in self.current_cards_players[joueur_superieur]:
+            if not isinstance(card, int) or not self.etat.possede(joueur_superieur, card):
                 raise ValueError(
                     f"{self.players[joueur_superieur].get_name()}, vice-prez, a tenté de donner une carte "
                     f"qu'il n'a pas"
                 )
-            main_joueur_superieur.remove(card)
-            self.current_cards_players[joueur_superieur] = main_joueur_superieur
-            self.current_cards_players[joueur_inferieur] = sorted(
-                main_joueur_inferieur + [card]
-            )
+            self.choix_echanges.append(card)
+            self.etat.donner(joueur_superieur, joueur_inferieur, card)
         else:
             # Le Prez chosit sa carte
             cards = self.players[joueur_superieur].give_cards_prez_to_trou(
                 main_joueur_superieur
             )
-            if not set(cards).issubset(self.current_cards_players[joueur_superieur]):
+            if not all(
+                isinstance(card, int) and self.etat.possede(joueur_superieur, card, cards.count(card))
+                for card in cards
+            ):
                 raise ValueError(
                     f"{self.players[joueur_superieur].get_name()}, prez, a tenté de donner des cartes "
                     f"qu'il n'a pas"
                 )
             for card in cards:
-                main_joueur_superieur.remove(card)
-            self.current_cards_players[joueur_superieur] = main_joueur_superieur
-            self.current_cards_players[joueur_inferieur] = sorted(
-                main_joueur_inferieur + cards
-            )
+                self.choix_echanges.append(card)
+                self.etat.donner(joueur_superieur, joueur_inferieur, card)
 
-    def update_according_to_pose(
-        self,
-        pose,
-        cartes_joueurs,
-        joueur_actuel,
-        joueurs_pas_fini,
-        joueurs_en_jeu,
-        classement,
-        cartes_plateau
-    ):
-        if len(cartes_plateau):
-            cartes_au_dessus = cartes_plateau[-1]
-        else:
-            cartes_au_dessus = None
-
-        logger.info(f"{self.indexed_name_players[joueur_actuel]} avec la main "
-                    f"{self.show_pretty_hand(joueur_actuel)} "
-                    f"joue {show_pretty_pose(pose)} ")
-        if pose == cartes_au_dessus:
-            self.counter_same_card += len(pose)
-            self.risque_saut = True
-        else:
-            self.counter_same_card = len(pose)
-            self.risque_saut = False
-        for el in pose:
-            cartes_joueurs[joueur_actuel].remove(el)
-
-        if not cartes_joueurs[joueur_actuel]:
-            logger.info(f"{self.indexed_name_players[joueur_actuel]} a fini ")
-            joueurs_pas_fini.remove(joueur_actuel)
-            joueurs_en_jeu.remove(joueur_actuel)
-            classement.append(joueur_actuel)
-        cartes_plateau.append(pose)
-        cartes_au_dessus = pose
-
-        # Si les 4 dernières cartes du plateau sont identiques, le joueur a la main
-        if self.counter_same_card == 4:
-            self.risque_saut = False
-            logger.info("Coupe !")
-            joueurs_en_jeu = [joueur_actuel]
-
-        # Si le jour a joué un 2, il a la main
-        if pose[0] == self.nb_rangs_cartes - 1:
-            # logger.info(f"{self.role_players[joueur_actuel]} prend la main ")
-            joueurs_en_jeu = [joueur_actuel]
-
-        # Révolution si 4 cartes identiques sont posées d'un coup
-        if len(pose) == 4:
-            logger.info(f"Révolution de {pose[0]} !!")
-            self.risque_saut = False
-            raise NotImplementedError("La révolution n'a pas encore été implémentée !!")
-
-        return cartes_au_dessus, joueurs_en_jeu
+    @property
+    def risque_saut(self) -> bool:
+        return self.position is not None and self.position.risque_saut
+
+    @property
+    def is_revolution(self) -> bool:
+        return self.position is not None and self.position.revolution
+
+    @property
+    def counter_same_card(self) -> int:
+        return self.position.counter_same_card if self.position is not None else 0
 
     def dumb_play(self, cartes_joueur: list[int], cartes_plateau: list[list[int]]) -> list[int]:
         """
@@ -238,172 +288,265 @@ class Partie:
         return [cartes_joueur[-1]]
 
     def convert_pretty_play_to_df(self):
-        return
+        # pandas n'est chargé que si on demande le tableau
+        import pandas as pd
+
+        return pd.DataFrame(self.evenements.resume(self.nb_joueurs))
+
+    def tours(self):
+        """
+        Déroulement de la partie avec les mesures de temps, commun aux boucles synchrone et asyncio : renvoie
+        (joueur, arguments) à chaque tour, et reçoit (pose, None) ou (None, exception levée par le joueur)
+        """
+        mesures = self.mesures
+        deroulement = self.deroulement()
+        try:
+            debut_moteur = perf_counter()
+            player, arguments = next(deroulement)
+            while True:
+                if mesures is not None:
+                    debut_joueur = perf_counter()
+                    mesures.ajouter_phase("moteur", debut_moteur, debut_joueur)
+                pose, exc = yield player, arguments
+                if mesures is not None:
+                    debut_moteur = perf_counter()
+                    mesures.ajouter_joueur(self.position.joueur_actuel, debut_joueur, debut_moteur)
+                if exc is not None:
+                    player, arguments = deroulement.throw(exc)
+                else:
+                    player, arguments = deroulement.send(pose)
+        except StopIteration:
+            if mesures is not None:
+                mesures.ajouter_phase("moteur", debut_moteur, perf_counter())
 
     def play_whole_game_from_cards(self):
-        cartes_joueurs = self.current_cards_players
-        nb_joueurs = self.nb_joueurs
-        cartes_deja_jouees = []
-        classement = []
-        liste_tricheurs = []
+        tours = self.tours()
+        try:
+            player, arguments = next(tours)
+            while True:
+                try:
+                    pose = self.execution_joueurs.appeler(player, "que_jouer", self.timeout_players, *arguments)
+                    reponse = pose, None
+                except Exception as exc:
+                    reponse = None, exc
+                player, arguments = tours.send(reponse)
+        except StopIteration:
+            pass
+        finally:
+            if self.execution_propre:
+                self.execution_joueurs.fermer()
+
+    async def play_whole_game_async(self, execution_joueurs: ExecutionJoueursAsync | None = None):
+        """
+        Même partie que play_whole_game_from_cards, dans une boucle asyncio : les joueurs asynchrones
+        (async def que_jouer) sont attendus, les autres sont appelés dans les threads de execution_joueurs
+        """
+        execution = execution_joueurs or ExecutionJoueursAsync()
+        tours = self.tours()
+        try:
+            player, arguments = next(tours)
+            while True:
+                try:
+                    pose = await execution.appeler(player, "que_jouer", self.timeout_players, *arguments)
+                    reponse = pose, None
+                except Exception as exc:
+                    reponse = None, exc
+                player, arguments = tours.send(reponse)
+        except StopIteration:
+            pass
+        finally:
+            if execution_joueurs is None:
+                execution.fermer()
+
+    def deroulement(self):
+        """
+        Déroulé de la partie, sans appeler les joueurs : le générateur renvoie (joueur, arguments de que_jouer)
+        à chaque tour, et reçoit la pose (send) ou l'exception levée par le joueur (throw)
+        """
+        etat = self.etat
+        self.position = position = Position(etat)
         historique_jeux = []
         cartes_plateau = []
-        joueurs_en_jeu = [i for i in range(nb_joueurs)]
-        joueur_actuel = 0
-        joueurs_pas_fini = [i for i in range(nb_joueurs)]
-        total_pretty_play_joueurs = {i: [] for i in range(len(self.players))}
+        rng_determinisation = None
+        # Pas d'enregistrement du tout si save_events est False et que la destination des résultats n'en a pas besoin
+        if self.save_events or (self.result_sink is not None and self.result_sink.besoin_evenements):
+            self.evenements = enregistreur = EnregistreurEvenements()
+        else:
+            self.evenements = enregistreur = None
+        self.actions = actions = actions_vides() if self.enregistrer_actions else None
+        mesures = self.mesures
+        self.nb_tours = 0
+        self.timeouts_sieges = timeouts_sieges = [0] * self.nb_joueurs
 
         for i, player in enumerate(self.players):
-            player.donner_main(copy(self.current_cards_players[i]))
-
-        events_actuel = []
-        pretty_play_joueurs = {i: [] for i in range(len(self.players))}
-        while len(classement + liste_tricheurs) < nb_joueurs - 1:
-            prochain_joueur = joueurs_en_jeu[
-                (joueurs_en_jeu.index(joueur_actuel) + 1) % len(joueurs_en_jeu)
-            ]
-            flag_triche = False
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                try:
-                    future = executor.submit(self.players[joueur_actuel].que_jouer,
-                                           copy(cartes_joueurs[joueur_actuel]),
-                                           copy(cartes_plateau),
-                                           self.risque_saut,
-                                           copy(cartes_deja_jouees)
-                                           )
-                    pose = future.result(timeout=self.timeout_players)
-                except concurrent.futures.TimeoutError:
-                    logger.error(f"Le code de {self.indexed_name_players[joueur_actuel]} a pris plus de "
-                                 f"{self.timeout_players} secondes : "
-                                 f"on joue à sa place")
-                    pose = self.dumb_play(cartes_joueurs[joueur_actuel], cartes_plateau)
-
-                except Exception:
-                    logger.error(f"Le code de {self.indexed_name_players[joueur_actuel]} est beugué : "
-                                 f"on jour à sa place",
-                                 exc_info=True)
-                    pose = self.dumb_play(cartes_joueurs[joueur_actuel], cartes_plateau)
-                    # joueurs_pas_fini.remove(joueur_actuel)
-                    # joueurs_en_jeu.remove(joueur_actuel)
-                    # liste_tricheurs.append(joueur_actuel)
-                else:
-                    if not isinstance(pose, list) or not all(isinstance(x, int) for x in pose):
-                        logger.error(f"Le joueur {self.indexed_name_players[joueur_actuel]} n'a pas renvoyé "
-                                     f"le bon format: {str(pose)} : on joue à sa place")
-                        pose = self.dumb_play(cartes_joueurs[joueur_actuel], cartes_plateau)
-                        # joueurs_pas_fini.remove(joueur_actuel)
-                        # joueurs_en_jeu.remove(joueur_actuel)
-                        # liste_tricheurs.append(joueur_actuel)
-
-            if not flag_triche:
-                if pose:
-                    # Le joueur a tenté de jouer une carte
-                    if cartes_plateau:
-                        cartes_au_dessus = cartes_plateau[-1]
-                    else:
-                        cartes_au_dessus = None
-
-                    conditions_triche = [
-                        (not all(el == pose[0] for el in pose)),
-                        (
-                                cartes_au_dessus is not None
-                                and operator.lt(pose[0], cartes_au_dessus[0])
-                        ),
-                        self.risque_saut and pose != cartes_au_dessus,
-                        not set(pose).issubset(cartes_joueurs[joueur_actuel])
-                    ]
-                    if any(conditions_triche):
-                        # Mettre à trou le tricheur
-                        logger.error(f"Le joueur {self.indexed_name_players[joueur_actuel]} "
-                                     f"avec la main {self.show_pretty_hand(joueur_actuel)}"
-                                     f" a essayé de jouer {show_super_pretty_hand(pose)}, "
-                                     f"il triche ! ")
-                        joueurs_pas_fini.remove(joueur_actuel)
-                        joueurs_en_jeu.remove(joueur_actuel)
-                        liste_tricheurs.append(joueur_actuel)
-                        pretty_play_joueurs[joueur_actuel].append(["T"])
-                    else:
-                        # Ok, le joueur respecte les règles
-                        pretty_play_joueurs[joueur_actuel].append([str(el) for el in pose])
-                        cartes_au_dessus, joueurs_en_jeu = self.update_according_to_pose(
-                            pose,
-                            cartes_joueurs,
-                            joueur_actuel,
-                            joueurs_pas_fini,
-                            joueurs_en_jeu,
-                            classement,
-                            cartes_plateau
+            player.donner_main(copy(etat.main_liste(i)))
+
+        while not position.est_terminee():
+            joueur_actuel = position.joueur_actuel
+            self.nb_tours += 1
+            player = self.players[joueur_actuel]
+            player.is_revolution = position.revolution
+            if player.position_determinisee and (
+                player.seuil_position is None or sum(etat.tailles) <= player.seuil_position
+            ):
+                if rng_determinisation is None:
+                    rng_determinisation = Random(str(self.cards_shuffled))
+                player.position = position.determiniser(joueur_actuel, rng_determinisation)
+            # Vues en lecture seule sur l'état du moteur : aucune copie
+            if player.vues_riches:
+                vue_main = VueMain(etat.main_liste(joueur_actuel), tuple(etat.mains[joueur_actuel]))
+                vue_cartes_deja_jouees = VueCartesDejaJouees(etat.journal, restantes=etat.cartes_restantes())
+            else:
+                vue_main = VueMain(etat.main_liste(joueur_actuel))
+                vue_cartes_deja_jouees = VueCartesDejaJouees(etat.journal)
+            try:
+                pose = yield player, (vue_main, VueCartes(cartes_plateau), position.risque_saut, vue_cartes_deja_jouees)
+            except concurrent.futures.TimeoutError:
+                logger.error(f"Le code de {self.indexed_name_players[joueur_actuel]} a pris plus de "
+                             f"{self.timeout_players} secondes : "
+                             f"on joue à sa place")
+                if enregistreur is not None:
+                    enregistreur.ajouter(self.nb_tours, joueur_actuel, evenements.TIMEOUT)
+                timeouts_sieges[joueur_actuel] += 1
+                if mesures is not None:
+                    mesures.ajouter_remplacement(joueur_actuel, "timeout")
+                pose = self.dumb_play(etat.main_liste(joueur_actuel), cartes_plateau)
+
+            except Exception:
+                logger.error(f"Le code de {self.indexed_name_players[joueur_actuel]} est beugué : "
+                             f"on jour à sa place",
+                             exc_info=True)
+                if enregistreur is not None:
+                    enregistreur.ajouter(self.nb_tours, joueur_actuel, evenements.BUG)
+                if mesures is not None:
+                    mesures.ajouter_remplacement(joueur_actuel, "bug")
+                pose = self.dumb_play(etat.main_liste(joueur_actuel), cartes_plateau)
+            else:
+                if isinstance(pose, (list, VueCartes)):
+                    # Copie de la pose : le joueur ne peut plus la modifier une fois sur le plateau
+                    pose = list(pose)
+                if inspect.iscoroutine(pose):
+                    # Joueur asynchrone (async def que_jouer) appelé par la boucle synchrone
+                    pose.close()
+                    raise TypeError(
+                        f"Le joueur {self.indexed_name_players[joueur_actuel]} est asynchrone : "
+                        f"lancer la partie avec play_whole_game_async"
+                    )
+                if not isinstance(pose, list) or not all(isinstance(x, int) for x in pose):
+                    logger.error(f"Le joueur {self.indexed_name_players[joueur_actuel]} n'a pas renvoyé "
+                                 f"le bon format: {str(pose)} : on joue à sa place")
+                    if enregistreur is not None:
+                        enregistreur.ajouter(self.nb_tours, joueur_actuel, evenements.FORMAT)
+                    if mesures is not None:
+                        mesures.ajouter_remplacement(joueur_actuel, "format")
+                    pose = self.dumb_play(etat.main_liste(joueur_actuel), cartes_plateau)
+
+            if pose:
+                # Le joueur a tenté de jouer une carte
+                cartes_au_dessus = cartes_plateau[-1] if cartes_plateau else None
+                if etat.est_triche(joueur_actuel, pose, cartes_au_dessus, position.risque_saut, position.revolution):
+                    # Mettre à trou le tricheur
+                    logger.error(f"Le joueur {self.indexed_name_players[joueur_actuel]} "
+                                 f"avec la main {self.show_pretty_hand(joueur_actuel)}"
+                                 f" a essayé de jouer {show_super_pretty_hand(pose)}, "
+                                 f"il triche ! ")
+                    coup = TRICHER
+                    if actions is not None:
+                        actions.append(ACTION_TRICHE)
+                    if enregistreur is not None:
+                        enregistreur.ajouter(
+                            self.nb_tours, joueur_actuel, evenements.TRICHE,
+                            pose[0] if 0 <= pose[0] < self.nb_rangs_cartes else evenements.AUCUN_RANG,
+                            min(len(pose), self.nb_rangs_cartes * self.nb_exemplaires),
                         )
-                        cartes_deja_jouees = sorted(cartes_deja_jouees + pose)
                 else:
-                    if not cartes_plateau:
-                        logger.error(f"Le joueur : {self.indexed_name_players[joueur_actuel]} a la main "
-                                     f"mais ne joue pas : il va en dernier et le jeu continue")
-                        joueurs_pas_fini.remove(joueur_actuel)
-                        joueurs_en_jeu.remove(joueur_actuel)
-                        liste_tricheurs.append(joueur_actuel)
-                        pretty_play_joueurs[joueur_actuel].append(["T"])
-                    if self.risque_saut:
-                        logger.info(f"Le joueur : {self.indexed_name_players[joueur_actuel]} est sauté")
-                        self.risque_saut = False
-                        pretty_play_joueurs[joueur_actuel].append(["S"])
+                    # Ok, le joueur respecte les règles
+                    coup = position.coup(pose[0], len(pose))
+                    if actions is not None:
+                        actions.append(code_action(pose))
+                    if enregistreur is not None:
+                        enregistreur.ajouter(self.nb_tours, joueur_actuel, evenements.JOUE, pose[0], len(pose))
+            else:
+                coup = PASSER
+                if actions is not None:
+                    actions.append(code_action(pose))
+                if not cartes_plateau:
+                    logger.error(f"Le joueur : {self.indexed_name_players[joueur_actuel]} a la main "
+                                 f"mais ne joue pas : il va en dernier et le jeu continue")
+
+            effets = position.apply(coup)
+            if coup >= 0:
+                cartes_plateau.append(pose)
+            if enregistreur is not None:
+                if effets & EFFET_REVOLUTION:
+                    enregistreur.ajouter(self.nb_tours, joueur_actuel, evenements.REVOLUTION, pose[0])
+                if effets & EFFET_FINI:
+                    enregistreur.ajouter(self.nb_tours, joueur_actuel, evenements.FINI)
+                if effets & EFFET_COUPE:
+                    enregistreur.ajouter(self.nb_tours, joueur_actuel, evenements.COUPE)
+                if coup == PASSER:
+                    if effets & EFFET_TRICHE:
+                        enregistreur.ajouter(self.nb_tours, joueur_actuel, evenements.TRICHE)
+                    elif effets & EFFET_SAUTE:
+                        enregistreur.ajouter(self.nb_tours, joueur_actuel, evenements.SAUTE)
                     else:
-                        logger.info(f"Le joueur : {self.indexed_name_players[joueur_actuel]} passe")
-                        joueurs_en_jeu.remove(joueur_actuel)
-                        pretty_play_joueurs[joueur_actuel].append(["P"])
-
-            if len(joueurs_en_jeu) == 1:
-                self.risque_saut = False
-                if joueurs_en_jeu[0] not in joueurs_pas_fini:
-                    joueurs_en_jeu = [prochain_joueur]
-                logger.info(
-                    f"{self.indexed_name_players[joueurs_en_jeu[0]]} a la main"
-                )
-                total_pretty_play_joueurs, pretty_play_joueurs = self.reset_pretty_play_joueurs(
-                    total_pretty_play_joueurs, pretty_play_joueurs, joueurs_pas_fini
-                )
-                historique_jeux.append(copy(cartes_plateau))
-                cartes_plateau = []
-                self.counter_same_card = 0
-                prochain_joueur = joueurs_en_jeu[0]
-                joueurs_en_jeu = copy(joueurs_pas_fini)
+                        enregistreur.ajouter(self.nb_tours, joueur_actuel, evenements.PASSE)
 
-            elif prochain_joueur < joueur_actuel:
+            if effets & EFFET_NOUVEAU_PLI:
+                if enregistreur is not None:
+                    enregistreur.ajouter(self.nb_tours, position.joueur_actuel, evenements.NOUVEAU_PLI)
+                historique_jeux.append(cartes_plateau)
+                cartes_plateau = []
+            elif position.joueur_actuel < joueur_actuel and enregistreur is not None:
                 # On revient au début de l'indexation des joueurs
-                total_pretty_play_joueurs, pretty_play_joueurs = self.reset_pretty_play_joueurs(
-                    total_pretty_play_joueurs, pretty_play_joueurs, joueurs_pas_fini
-                )
-            joueur_actuel = prochain_joueur
-            flag_triche = False
+                enregistreur.ajouter(self.nb_tours, evenements.AUCUN_JOUEUR, evenements.NOUVELLE_LIGNE)
+
+        self.classement = position.resultat()
+        self.historique_jeux = historique_jeux
+        self.cartes_deja_jouees = copy(etat.cartes_deja_jouees_liste())
 
-        df_pretty_play_joueurs = pd.DataFrame(total_pretty_play_joueurs)
-        df_pretty_play_joueurs.to_csv("resume_partie.csv")
-        logger.info(str(df_pretty_play_joueurs))
+        if self.result_sink is not None:
+            self.result_sink.ajouter(self)
 
-        # Ajout du joueur arrivé en dernier
-        classement = classement + [
-            ({i for i in range(nb_joueurs)} - set(liste_tricheurs) - set(classement)).pop()
-        ] + liste_tricheurs
+    def record(self) -> EnregistrementPartie:
+        """
+        Enregistrement compact de la dernière partie jouée (il faut enregistrer_actions=True)
+        """
+        if self.actions is None:
+            raise ValueError("Les actions n'ont pas été enregistrées : il faut enregistrer_actions=True")
+        return EnregistrementPartie(
+            self.nb_joueurs,
+            self.nb_rangs_cartes,
+            list(self.cards_shuffled),
+            list(self.role_players),
+            list(self.choix_echanges),
+            array(self.actions.typecode, self.actions),
+            list(self.classement),
+        )
 
-        logger.info(
-            "Classement final: " + " ".join([self.indexed_name_players[i] for i in classement])
+    @classmethod
+    def replay(cls, record: EnregistrementPartie, save_events=False) -> "Partie":
+        """
+        Rejoue une partie enregistrée, sans appeler les joueurs d'origine
+        """
+        actions = iter(record.actions)
+        partie = cls(
+            nb_joueurs=record.nb_joueurs,
+            nb_rangs_cartes=record.nb_rangs_cartes,
+            players=[JoueurRejoue(actions, record.choix_echanges) for _ in range(record.nb_joueurs)],
+            role_players=list(record.role_players),
+            cards_shuffled=list(record.cards_shuffled),
+            save_events=save_events,
+            nb_paquets=len(record.cards_shuffled) // (NB_COULEURS * record.nb_rangs_cartes),
         )
+        partie.play_whole_game_from_cards()
+        return partie
 
-        self.classement = classement
-        self.historique_jeux = historique_jeux
-        self.all_events += events_actuel
-        self.cartes_deja_jouees = cartes_deja_jouees
-
-    def reset_pretty_play_joueurs(self, total_pretty_play_joueurs, pretty_play_joueurs, joueurs_pas_fini):
-        if all(not len(el) for el in pretty_play_joueurs.values()):
-            a = 3
-        for i in range(len(self.players)):
-            action_jouee = pretty_actions_jouees([el2 for el in pretty_play_joueurs[i] for el2 in el])
-            if i not in joueurs_pas_fini and action_jouee == "":
-                action_jouee = "x"
-            total_pretty_play_joueurs[i].append(action_jouee)
-        pretty_play_joueurs = {i: [] for i in range(len(self.players))}
-        return total_pretty_play_joueurs, pretty_play_joueurs
+    @property
+    def all_events(self) -> list[str]:
+        if self.evenements is None:
+            return []
+        return self.evenements.rendre(self.indexed_name_players)
 
     def show_game(self):
-        print("".join([el for el in self.all_events]))
+        print("\n".join(self.all_events))
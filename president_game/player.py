@@ -1,12 +1,37 @@
 from abc import ABC, abstractmethod
 from time import sleep
 
-from president_game.utils import convert_sorted_hand_to_dict
+from president_game.coups import compter_main, legal_moves
+
+
+def rangs_croissants(nb_rangs_cartes, revolution=False) -> range:
+    """
+    Rangs du plus faible au plus fort
+    """
+    return range(nb_rangs_cartes - 1, -1, -1) if revolution else range(nb_rangs_cartes)
 
 
 class Player(ABC):
     main: list[int]
     name: str = "SleepingPlayer"
+    # Un joueur de confiance est appelé directement par la partie, sans thread ni timeout.
+    # Ne s'hérite pas : une sous-classe n'est de confiance que si elle le déclare elle-même
+    trusted: bool = False
+    # Vues riches : main.counts et historique_jeux.restantes donnent les nombres de cartes par rang
+    vues_riches: bool = False
+    # Avant chaque coup, self.position reçoit une copie de la partie (president_game.position.Position) où les
+    # mains des adversaires sont tirées au hasard : on peut y jouer et défaire des coups pour chercher le sien
+    position_determinisee: bool = False
+    # Si renseigné, la copie n'est faite que quand il reste au plus seuil_position cartes en main (tous joueurs
+    # confondus) : self.position vaut None avant
+    seuil_position: int | None = None
+    # Mis à jour par la partie avant chaque coup : True pendant une révolution (ordre des rangs inversé,
+    # le 3 devient la carte la plus forte et le 2 la plus faible)
+    is_revolution: bool = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.trusted = cls.__dict__.get("trusted", False)
 
     @abstractmethod
     def que_jouer(
@@ -29,8 +54,11 @@ class Player(ABC):
         [[0,0], [2,2], [7,7]]
         Si rien n'a encore été joué, la liste est vide
         :param risque_saut: (bool) True si vous allez être sauté si vous ne jouez pas une carte identique. Impossible de tricher.
+        Pendant une révolution (self.is_revolution), il faut jouer en dessous du centre au lieu d'au dessus.
         :param historique_jeux: (list[int]) Ensemble des cartes qui ont déjà été jouées
         C'est du même format que votre main.
+        Les listes reçues sont des vues en lecture seule (vues.VueCartes) : elles s'utilisent comme des listes
+        mais ne peuvent pas être modifiées. Faites list(main) pour en avoir une copie modifiable.
         :return: (list[int]) La ou les cartes de votre main que vous jouez. La liste est vide si vous ne jouez rien.
         Par exemple, si vous voulez jouer 10.10.10 (Qui correspond à K.K.K dans le vrai jeu),
         vous devez renvoyer [10, 10, 10]
@@ -86,7 +114,16 @@ class Player(ABC):
     def __str__(self):
         return self.get_name()
 
+def nom_joueur(player: Player) -> str:
+    """
+    Nom sous lequel le joueur est compté dans les résultats : get_name(), ou sa classe s'il n'en a pas
+    """
+    return player.get_name() or type(player).__name__
+
+
 class CheatPlayer(Player):
+    trusted = True
+
     def get_name(self):
         return "CheatP"
 
@@ -94,6 +131,9 @@ class CheatPlayer(Player):
         return [0]
 
 class DumbPlayer(Player):
+    trusted = True
+    vues_riches = True
+
     def get_name(self):
         return "DumbP"
 
@@ -101,37 +141,25 @@ class DumbPlayer(Player):
         """
         Stratégie la plus basique : On joue si on a plus fort, mais on ne casse pas les doubles ou les triples
         """
-        main_dict = convert_sorted_hand_to_dict(main)
+        counts = compter_main(main)
         if not cartes_plateau:
             # On considère que, si on a la main, on joue notre ou nos plus faibles cartes
-            lowest_value = min(main_dict)
-            return [lowest_value for _ in range(main_dict[lowest_value])]
+            lowest_value = next(rang for rang in rangs_croissants(len(counts), self.is_revolution) if counts[rang])
+            return [lowest_value] * counts[lowest_value]
         else:
             cartes_au_dessus = cartes_plateau[-1]
             type_jeu = len(cartes_au_dessus)
-            nombre_joue = cartes_au_dessus[0]
             """
-            On ne considère que les cartes supérieures et du même type que le centre
+            On ne considère que les coups légaux du même type que le centre, du plus faible au plus fort
             On ne casse pas les doubles ou les triples
             """
-
-            if not risque_saut:
-                mains_possibles = [
-                    el[0]
-                    for el in main_dict.items()
-                    if el[0] >= nombre_joue and el[1] == type_jeu
-                ]
-            else:
-                mains_possibles = [
-                    el[0]
-                    for el in main_dict.items()
-                    if el[0] == nombre_joue and el[1] == type_jeu
-                ]
-            if not mains_possibles:
-                return []
-            else:
-                lowest_value = min(mains_possibles)
-                return [lowest_value for _ in range(main_dict[lowest_value])]
+            coups = legal_moves(counts, cartes_au_dessus, risque_saut, revolution=self.is_revolution)
+            if self.is_revolution:
+                coups.reverse()
+            for rang, nb_cartes in coups:
+                if nb_cartes == type_jeu and counts[rang] == type_jeu:
+                    return [rang] * type_jeu
+            return []
 
 
 class SlowPlayer(Player):
@@ -146,6 +174,9 @@ class SlowPlayer(Player):
         return []
 
 class AggressivePlayer(Player):
+    trusted = True
+    vues_riches = True
+
     def get_name(self):
         return "AggressiveP"
 
@@ -153,36 +184,26 @@ class AggressivePlayer(Player):
         """
         Stratégie aggressive : On joue si on a plus fort, et on casse nos doubles et triples si besoin
         """
-        main_dict = convert_sorted_hand_to_dict(main)
+        counts = compter_main(main)
         if not cartes_plateau:
             # On considère que, si on a la main, on joue notre ou nos plus faibles cartes
-            lowest_value = min(main_dict)
-            return [lowest_value for _ in range(main_dict[lowest_value])]
+            lowest_value = next(rang for rang in rangs_croissants(len(counts), self.is_revolution) if counts[rang])
+            return [lowest_value] * counts[lowest_value]
         else:
             cartes_au_dessus = cartes_plateau[-1]
             type_jeu = len(cartes_au_dessus)
-            nombre_joue = cartes_au_dessus[0]
             """
-            On ne considère que les cartes supérieures et du même type que le centre
+            On ne considère que les coups légaux du même type que le centre, du plus faible au plus fort
             """
-            type_essaye = type_jeu
+            coups = [rang for rang, nb_cartes
+                     in legal_moves(counts, cartes_au_dessus, risque_saut, revolution=self.is_revolution)
+                     if nb_cartes == type_jeu]
+            if self.is_revolution:
+                coups.reverse()
             # On tente les simples, puis les doubles, puis les triples
-            while type_essaye <= 3:
-                if not risque_saut:
-                    jeux_possibles = [
-                        el[0]
-                        for el in main_dict.items()
-                        if el[0] >= nombre_joue and el[1] == type_essaye
-                    ]
-                else:
-                    jeux_possibles = [
-                        el[0]
-                        for el in main_dict.items()
-                        if el[0] == nombre_joue and el[1] == type_essaye
-                    ]
-                if jeux_possibles:
-                    lowest_value = min(jeux_possibles)
-                    return [lowest_value for _ in range(type_jeu)]
-                type_essaye += 1
+            for type_essaye in range(type_jeu, 4):
+                for rang in coups:
+                    if counts[rang] == type_essaye:
+                        return [rang] * type_jeu
             # On n'a rien trouvé à jouer
             return []
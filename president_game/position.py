@@ -0,0 +1,280 @@
+"""
+Position d'une partie en cours : machine à états pure, sans joueurs, logs ni entrées/sorties
+
+Partie s'en sert pour dérouler le jeu, et les joueurs qui cherchent leur coup (Monte-Carlo, ISMCTS...)
+peuvent la copier, jouer des coups, les défaire et tirer au hasard les mains des adversaires.
+
+Un coup est un entier : le bit du coup (rang, nb_cartes) dans president_game.coups, PASSER ou TRICHER.
+Les joueurs encore dans le pli (en_jeu) et pas encore finis (pas_fini) sont des masques de bits sur les sièges :
+trouver le joueur suivant coûte le même temps quel que soit le nombre de joueurs.
+
+Les règles qui comptent les cartes d'un rang suivent le nombre d'exemplaires de chaque rang (4 par paquet) :
+tous les exemplaires d'un rang posés d'affilée font une coupe, et tous posés d'un coup une révolution.
+"""
+import random
+
+from president_game.etat import GameState
+
+PASSER = -1
+# Coup refusé par la partie (triche, format...) : le joueur finit dernier
+TRICHER = -2
+
+# Effets d'un coup, renvoyés par Position.apply
+EFFET_FINI = 1
+EFFET_COUPE = 2
+EFFET_NOUVEAU_PLI = 4
+EFFET_SAUTE = 8
+EFFET_PASSE = 16
+EFFET_TRICHE = 32
+EFFET_REVOLUTION = 64
+
+
+def joueur_suivant(masque, joueur) -> int:
+    """
+    Premier siège du masque après joueur, en revenant au début si besoin
+    """
+    apres = masque >> (joueur + 1)
+    if apres:
+        return joueur + (apres & -apres).bit_length()
+    return (masque & -masque).bit_length() - 1
+
+
+class Position:
+    """
+    :param etat: mains et cartes déjà jouées (GameState), modifié en place par apply et undo
+    :param joueur_actuel: siège qui doit jouer
+    top_rang, top_nb : cartes au centre (top_rang à -1 si personne n'a encore joué dans le pli)
+    revolution : ordre des rangs inversé, après une pose de nb_exemplaires cartes.
+    La carte la plus forte (le 2, ou le 3 pendant une révolution) donne la main
+    classement, tricheurs : joueurs finis dans l'ordre, et joueurs éliminés pour triche
+    """
+    __slots__ = (
+        "etat",
+        "nb_joueurs",
+        "nb_rangs_cartes",
+        "nb_exemplaires",
+        "table",
+        "joueur_actuel",
+        "en_jeu",
+        "pas_fini",
+        "top_rang",
+        "top_nb",
+        "counter_same_card",
+        "risque_saut",
+        "revolution",
+        "classement",
+        "tricheurs",
+        "pile",
+    )
+
+    def __init__(self, etat: GameState, joueur_actuel=0):
+        self.etat = etat
+        self.nb_joueurs = len(etat.mains)
+        self.nb_rangs_cartes = etat.nb_rangs_cartes
+        self.nb_exemplaires = etat.nb_exemplaires
+        self.table = etat.table
+        self.joueur_actuel = joueur_actuel
+        self.en_jeu = self.pas_fini = (1 << self.nb_joueurs) - 1
+        self.top_rang = -1
+        self.top_nb = 0
+        self.counter_same_card = 0
+        self.risque_saut = False
+        self.revolution = False
+        self.classement = []
+        self.tricheurs = []
+        # De quoi défaire chaque coup joué depuis la création (ou la copie) de la position
+        self.pile = []
+
+    def clone(self) -> "Position":
+        """
+        Copie indépendante. La copie ne peut pas défaire les coups joués avant elle
+        """
+        position = Position.__new__(Position)
+        position.etat = self.etat.clone()
+        position.nb_joueurs = self.nb_joueurs
+        position.nb_rangs_cartes = self.nb_rangs_cartes
+        position.nb_exemplaires = self.nb_exemplaires
+        position.table = self.table
+        position.joueur_actuel = self.joueur_actuel
+        position.en_jeu = self.en_jeu
+        position.pas_fini = self.pas_fini
+        position.top_rang = self.top_rang
+        position.top_nb = self.top_nb
+        position.counter_same_card = self.counter_same_card
+        position.risque_saut = self.risque_saut
+        position.revolution = self.revolution
+        position.classement = self.classement[:]
+        position.tricheurs = self.tricheurs[:]
+        position.pile = []
+        return position
+
+    def coup(self, rang, nb_cartes) -> int:
+        return self.table.bit(rang, nb_cartes)
+
+    def pose(self, coup) -> list[int]:
+        rang, nb_cartes = self.table.coups[coup]
+        return [rang] * nb_cartes
+
+    def est_terminee(self) -> bool:
+        # Il reste au plus un joueur
+        pas_fini = self.pas_fini
+        return pas_fini & (pas_fini - 1) == 0
+
+    def resultat(self) -> list[int]:
+        """
+        Classement final : les joueurs finis, le dernier, puis les tricheurs
+        """
+        restants = [joueur for joueur in range(self.nb_joueurs) if self.pas_fini >> joueur & 1]
+        return self.classement + restants + self.tricheurs
+
+    def coups_legaux(self) -> list[int]:
+        """
+        Coups légaux du joueur actuel par rang croissant, puis PASSER s'il n'a pas la main
+        """
+        table = self.table
+        masque = self.etat.masques[self.joueur_actuel]
+        top_rang = self.top_rang
+        if top_rang >= 0:
+            if self.risque_saut:
+                masque &= 1 << table.bit(top_rang, self.top_nb)
+            elif self.revolution:
+                masque &= table.masques_en_dessous[top_rang]
+            else:
+                masque &= table.masques_au_dessus[top_rang]
+        coups = []
+        ajouter = coups.append
+        while masque:
+            bit_bas = masque & -masque
+            ajouter(bit_bas.bit_length() - 1)
+            masque ^= bit_bas
+        if top_rang >= 0:
+            ajouter(PASSER)
+        return coups
+
+    def apply(self, coup) -> int:
+        """
+        Joue le coup du joueur actuel, sans vérifier qu'il est légal, et passe au joueur suivant.
+        Passer quand on a la main est une triche.
+
+        :return: les effets du coup (EFFET_...)
+        """
+        joueur = self.joueur_actuel
+        bit_joueur = 1 << joueur
+        self.pile.append((
+            joueur, self.en_jeu, self.pas_fini, self.top_rang, self.top_nb, self.counter_same_card,
+            self.risque_saut, self.revolution, len(self.classement), len(self.tricheurs), coup,
+        ))
+        # Le suivant est choisi avant le coup, comme à la table
+        prochain_joueur = joueur_suivant(self.en_jeu, joueur)
+        effets = 0
+
+        if coup == TRICHER or (coup == PASSER and self.top_rang < 0):
+            self.pas_fini &= ~bit_joueur
+            self.en_jeu &= ~bit_joueur
+            self.tricheurs.append(joueur)
+            effets = EFFET_TRICHE
+        elif coup == PASSER:
+            if self.risque_saut:
+                self.risque_saut = False
+                effets = EFFET_SAUTE
+            else:
+                self.en_jeu &= ~bit_joueur
+                effets = EFFET_PASSE
+        else:
+            rang, nb_cartes = self.table.coups[coup]
+            if rang == self.top_rang and nb_cartes == self.top_nb:
+                self.counter_same_card += nb_cartes
+                self.risque_saut = True
+            else:
+                self.counter_same_card = nb_cartes
+                self.risque_saut = False
+            etat = self.etat
+            etat.jouer(joueur, rang, nb_cartes)
+            if etat.tailles[joueur] == 0:
+                self.pas_fini &= ~bit_joueur
+                self.en_jeu &= ~bit_joueur
+                self.classement.append(joueur)
+                effets = EFFET_FINI
+            self.top_rang = rang
+            self.top_nb = nb_cartes
+            # Tous les exemplaires du rang d'affilée (4 avec un paquet) : coupe, le joueur a la main
+            if self.counter_same_card == self.nb_exemplaires:
+                self.risque_saut = False
+                self.en_jeu = bit_joueur
+                effets |= EFFET_COUPE
+            if nb_cartes == self.nb_exemplaires:
+                self.revolution = not self.revolution
+                effets |= EFFET_REVOLUTION
+            # La carte la plus forte (un 2, ou un 3 pendant une révolution) : le joueur a la main
+            if rang == (0 if self.revolution else self.nb_rangs_cartes - 1):
+                self.en_jeu = bit_joueur
+
+        en_jeu = self.en_jeu
+        if en_jeu & (en_jeu - 1) == 0:
+            # Fin du pli : le dernier joueur en jeu a la main, ou le suivant s'il a fini
+            self.risque_saut = False
+            if en_jeu & self.pas_fini:
+                prochain_joueur = en_jeu.bit_length() - 1
+            self.top_rang = -1
+            self.top_nb = 0
+            self.counter_same_card = 0
+            self.en_jeu = self.pas_fini
+            effets |= EFFET_NOUVEAU_PLI
+        self.joueur_actuel = prochain_joueur
+        return effets
+
+    def undo(self):
+        """
+        Défait le dernier coup joué
+        """
+        (
+            self.joueur_actuel, self.en_jeu, self.pas_fini, self.top_rang, self.top_nb, self.counter_same_card,
+            self.risque_saut, self.revolution, nb_classement, nb_tricheurs, coup,
+        ) = self.pile.pop()
+        del self.classement[nb_classement:]
+        del self.tricheurs[nb_tricheurs:]
+        if coup >= 0:
+            rang, nb_cartes = self.table.coups[coup]
+            self.etat.annuler(self.joueur_actuel, rang, nb_cartes)
+
+    def determiniser(self, joueur, rng: random.Random | None = None) -> "Position":
+        """
+        Copie de la position où les mains des adversaires de joueur sont retirées au hasard parmi les cartes
+        qu'il ne voit pas (ni dans sa main, ni déjà jouées), chacun gardant son nombre de cartes
+        """
+        rng = rng or random
+        position = self.clone()
+        etat = position.etat
+        nb_exemplaires = etat.nb_exemplaires
+        main_joueur = etat.mains[joueur]
+        inconnues = [
+            rang
+            for rang, nb_jouees in enumerate(etat.cartes_deja_jouees)
+            for _ in range(nb_exemplaires - nb_jouees - main_joueur[rang])
+        ]
+        rng.shuffle(inconnues)
+        debut = 0
+        for adversaire in range(self.nb_joueurs):
+            if adversaire == joueur:
+                continue
+            taille = etat.tailles[adversaire]
+            main = [0] * self.nb_rangs_cartes
+            for rang in inconnues[debut: debut + taille]:
+                main[rang] += 1
+            debut += taille
+            etat.mains[adversaire] = main
+            etat.masques[adversaire] = self.table.masque_main(main)
+            etat._listes_mains[adversaire] = None
+        return position
+
+    def simuler(self, rng: random.Random | None = None) -> list[int]:
+        """
+        Finit la partie en place avec des coups légaux tirés au hasard et renvoie le classement final
+        """
+        tirage = (rng or random).random
+        coups_legaux = self.coups_legaux
+        apply = self.apply
+        while self.pas_fini & (self.pas_fini - 1):
+            coups = coups_legaux()
+            apply(coups[int(tirage() * len(coups))])
+        return self.resultat()
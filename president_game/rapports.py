@@ -0,0 +1,19 @@
+"""
+Graphiques des études. pandas et plotly ne sont importés qu'au moment de tracer : le moteur n'en dépend pas
+"""
+
+
+def tracer_scores(scores: dict[str, list[float]], colonnes: list[str], ordre: list[str] | None = None):
+    """
+    Trace une ligne par colonne, avec une valeur par entrée de scores (joueur, siège, rôle...)
+
+    :param ordre: ordre des entrées sur le graphique, par défaut celui de scores
+    """
+    import pandas as pd
+    import plotly.express as px
+
+    df = pd.DataFrame.from_dict(scores, orient="index", columns=colonnes)
+    if ordre is not None:
+        df = df.reindex(ordre)
+    fig = px.line(df)
+    fig.show()
@@ -0,0 +1,137 @@
+"""
+Destinations des résultats de parties
+
+Par défaut, une partie jouée avec save_events=True écrit son déroulé dans resume_partie.csv (SinkResumeCsv).
+Pour les études, SinkColonnes accumule les résumés des parties et les écrit par paquets, en colonnes,
+dans un fichier par worker.
+"""
+import csv
+import json
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class ResultSink:
+    """
+    Reçoit chaque partie terminée. besoin_evenements demande à la partie d'enregistrer ses événements
+    """
+    besoin_evenements: bool = False
+
+    def ajouter(self, partie):
+        raise NotImplementedError
+
+    def fermer(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+class SinkResumeCsv(ResultSink):
+    """
+    Déroulé d'une seule partie dans un CSV réécrit à chaque partie, et dans les logs
+    """
+    besoin_evenements = True
+
+    def __init__(self, chemin="resume_partie.csv"):
+        self.chemin = chemin
+
+    def ajouter(self, partie):
+        resume = partie.evenements.resume(partie.nb_joueurs)
+        # Même fichier que DataFrame(resume).to_csv, sans avoir à charger pandas
+        with open(self.chemin, "w", newline="", encoding="utf-8") as fichier:
+            ecrivain = csv.writer(fichier, lineterminator=os.linesep)
+            ecrivain.writerow([""] + list(resume))
+            for i, ligne in enumerate(zip(*resume.values())):
+                ecrivain.writerow([i, *ligne])
+        logger.info(tableau_texte(resume))
+        logger.info(
+            "Classement final: " + " ".join([partie.indexed_name_players[i] for i in partie.classement])
+        )
+
+
+def tableau_texte(colonnes: dict) -> str:
+    """
+    Colonnes alignées à droite, avec le numéro de ligne, pour les logs
+    """
+    lignes = [[""] + [str(nom) for nom in colonnes]]
+    lignes += [[str(i), *valeurs] for i, valeurs in enumerate(zip(*colonnes.values()))]
+    largeurs = [max(len(ligne[j]) for ligne in lignes) for j in range(len(lignes[0]))]
+    return "\n".join(
+        "  ".join(valeur.rjust(largeur) for valeur, largeur in zip(ligne, largeurs)) for ligne in lignes
+    )
+
+
+class SinkColonnes(ResultSink):
+    """
+    Résumés de parties (joueurs, rôles, classement, nombre de tours, actions de chaque siège)
+    écrits par paquets de taille_paquet parties : une ligne JSON par paquet, chaque champ étant une colonne
+
+    :param chemin: fichier de sortie, ouvert en ajout. Avec un dossier, un fichier par processus y est créé
+    :param actions: enregistre les actions de chaque siège (la partie doit alors enregistrer ses événements)
+    """
+    COLONNES = ("joueurs", "roles", "classement", "nb_tours", "actions")
+
+    def __init__(self, chemin, taille_paquet=1000, actions=True):
+        chemin = Path(chemin)
+        if chemin.is_dir():
+            chemin = chemin / f"resultats_{os.getpid()}.jsonl"
+        self.chemin = chemin
+        self.taille_paquet = taille_paquet
+        self.besoin_evenements = actions
+        self.colonnes = {colonne: [] for colonne in self.COLONNES}
+
+    def ajouter(self, partie):
+        actions = None
+        if partie.evenements is not None:
+            actions = ["/".join(el) for el in partie.evenements.resume(partie.nb_joueurs).values()]
+        self.ajouter_resultat(
+            [player.get_name() for player in partie.players],
+            partie.role_players,
+            partie.classement,
+            partie.nb_tours,
+            actions,
+        )
+
+    def ajouter_resultat(self, joueurs, roles, classement, nb_tours, actions=None):
+        colonnes = self.colonnes
+        colonnes["joueurs"].append(list(joueurs))
+        colonnes["roles"].append(list(roles))
+        colonnes["classement"].append([int(el) for el in classement])
+        colonnes["nb_tours"].append(int(nb_tours))
+        colonnes["actions"].append(actions)
+        if len(colonnes["nb_tours"]) >= self.taille_paquet:
+            self.vider()
+
+    def vider(self):
+        if not self.colonnes["nb_tours"]:
+            return
+        with open(self.chemin, "a", encoding="utf-8") as fichier:
+            fichier.write(json.dumps(self.colonnes, separators=(",", ":")) + "\n")
+        self.colonnes = {colonne: [] for colonne in self.COLONNES}
+
+    def fermer(self):
+        self.vider()
+
+
+def lire_colonnes(chemins) -> dict[str, list]:
+    """
+    Relit un ou plusieurs fichiers de SinkColonnes (ou tous ceux d'un dossier) et concatène les colonnes
+    """
+    if isinstance(chemins, (str, Path)):
+        chemins = Path(chemins)
+        chemins = sorted(chemins.glob("*.jsonl")) if chemins.is_dir() else [chemins]
+    colonnes = {colonne: [] for colonne in SinkColonnes.COLONNES}
+    for chemin in chemins:
+        with open(chemin, encoding="utf-8") as fichier:
+            for ligne in fichier:
+                paquet = json.loads(ligne)
+                for colonne in colonnes:
+                    colonnes[colonne].extend(paquet[colonne])
+    return colonnes
@@ -0,0 +1,292 @@
+"""
+Bac à sable : chaque joueur non fiable tourne dans son propre processus persistant
+
+Le joueur isolé (JoueurIsole) remplace le joueur dans la partie. Les appels sont envoyés au processus
+sous forme de messages compacts (entiers sur 16 bits). Si le joueur ne répond pas à temps,
+son processus est tué puis relancé au prochain appel : un timeout coûte exactement timeout_players secondes.
+Les limites de CPU et de mémoire du processus sont fixées avec le module resource (Unix uniquement).
+"""
+import concurrent.futures
+import logging
+import math
+import multiprocessing
+import traceback
+from array import array
+
+from president_game.player import Player
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Codes des messages envoyés au processus du joueur
+CODE_QUE_JOUER = 0
+CODE_GIVE_CARDS_PREZ_TO_TROU = 1
+CODE_GIVE_CARD_VICE_PREZ_TO_VICE_TROU = 2
+CODE_DONNER_MAIN = 3
+CODE_ARRET = 4
+
+# Drapeaux de l'état du jeu envoyés avec que_jouer
+DRAPEAU_RISQUE_SAUT = 1
+DRAPEAU_REVOLUTION = 2
+
+# Statuts des réponses
+STATUT_OK = 0
+STATUT_ERREUR = 1
+STATUT_FORMAT = 2
+
+TYPECODE = "h"
+CARTE_INVALIDE = -1
+
+
+def encoder(*elements) -> bytes:
+    """
+    Encode des entiers et des listes d'entiers (préfixées par leur longueur) en un seul message
+    """
+    message = array(TYPECODE)
+    for element in elements:
+        if isinstance(element, int):
+            message.append(element)
+        else:
+            message.append(len(element))
+            message.extend(element)
+    return message.tobytes()
+
+
+def decoder(message: bytes) -> array:
+    valeurs = array(TYPECODE)
+    valeurs.frombytes(message)
+    return valeurs
+
+
+def lire_liste(valeurs, position) -> tuple[list[int], int]:
+    longueur = valeurs[position]
+    return valeurs[position + 1: position + 1 + longueur].tolist(), position + 1 + longueur
+
+
+def encoder_reponse(reponse) -> bytes:
+    """
+    Les cartes qui ne tiennent pas sur 16 bits deviennent une carte invalide : la partie y verra une triche
+    """
+    if isinstance(reponse, int) and not isinstance(reponse, bool):
+        reponse = [reponse]
+    if not isinstance(reponse, list) or not all(isinstance(x, int) for x in reponse):
+        return encoder(STATUT_FORMAT)
+    return encoder(STATUT_OK, [x if -2 ** 15 <= x < 2 ** 15 else CARTE_INVALIDE for x in reponse])
+
+
+def executer(player: Player, valeurs):
+    code = valeurs[0]
+    if code == CODE_QUE_JOUER:
+        risque_saut = bool(valeurs[1] & DRAPEAU_RISQUE_SAUT)
+        player.is_revolution = bool(valeurs[1] & DRAPEAU_REVOLUTION)
+        main, position = lire_liste(valeurs, 2)
+        nb_plis = valeurs[position]
+        position += 1
+        cartes_plateau = []
+        for _ in range(nb_plis):
+            pli, position = lire_liste(valeurs, position)
+            cartes_plateau.append(pli)
+        historique_jeux, _ = lire_liste(valeurs, position)
+        return player.que_jouer(main, cartes_plateau, risque_saut, historique_jeux)
+    main, _ = lire_liste(valeurs, 1)
+    if code == CODE_GIVE_CARDS_PREZ_TO_TROU:
+        return player.give_cards_prez_to_trou(main)
+    if code == CODE_GIVE_CARD_VICE_PREZ_TO_VICE_TROU:
+        return player.give_card_vice_prez_to_vice_trou(main)
+    raise ValueError(f"Code de message inconnu : {code}")
+
+
+def boucle_worker(conn, player: Player, limite_cpu, limite_memoire):
+    """
+    Boucle du processus du joueur : un message reçu, une réponse envoyée (sauf pour donner_main)
+    """
+    if resource is not None and limite_memoire is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (limite_memoire, limite_memoire))
+    while True:
+        try:
+            valeurs = decoder(conn.recv_bytes())
+        except EOFError:
+            return
+        code = valeurs[0]
+        if code == CODE_ARRET:
+            return
+        if code == CODE_DONNER_MAIN:
+            try:
+                player.donner_main(lire_liste(valeurs, 1)[0])
+            except Exception:
+                pass
+            continue
+
+        if resource is not None and limite_cpu is not None:
+            # Budget CPU pour cet appel uniquement : au-delà, le système tue le processus (SIGXCPU)
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            _, limite_dure = resource.getrlimit(resource.RLIMIT_CPU)
+            limite = math.ceil(usage.ru_utime + usage.ru_stime + limite_cpu)
+            if limite_dure != resource.RLIM_INFINITY:
+                limite = min(limite, limite_dure)
+            resource.setrlimit(resource.RLIMIT_CPU, (limite, limite_dure))
+        try:
+            reponse = encoder_reponse(executer(player, valeurs))
+        except Exception:
+            reponse = encoder(STATUT_ERREUR) + traceback.format_exc().encode("utf-8", errors="replace")
+        conn.send_bytes(reponse)
+
+
+class JoueurIsole(Player):
+    """
+    Remplace un joueur par un mandataire qui l'exécute dans un processus dédié
+
+    :param player: le joueur à isoler, copié dans le processus (il doit être picklable hors fork)
+    :param timeout: timeout par défaut, remplacé par le timeout_players de la Partie qui reçoit le joueur
+    :param limite_cpu: secondes de CPU par appel (par défaut, le timeout arrondi au-dessus)
+    :param limite_memoire: mémoire virtuelle maximale du processus, en octets (None : pas de limite)
+    :param methode_demarrage: "fork", "spawn" ou "forkserver" (par défaut celle de la plateforme)
+    """
+    # Le mandataire gère lui-même son timeout : la partie l'appelle directement
+    trusted = True
+
+    def __init__(
+        self,
+        player: Player,
+        timeout=3,
+        limite_cpu=None,
+        limite_memoire=2 * 1024 ** 3,
+        methode_demarrage=None,
+    ):
+        self.player = player
+        self.nom = player.get_name()
+        self.timeout = timeout
+        self.limite_cpu = limite_cpu if limite_cpu is not None else math.ceil(timeout)
+        self.limite_memoire = limite_memoire
+        self.contexte = multiprocessing.get_context(methode_demarrage)
+        self.process = None
+        self.conn = None
+        self.nb_redemarrages = 0
+        self.demarrer()
+
+    def demarrer(self):
+        conn_parent, conn_enfant = self.contexte.Pipe()
+        self.process = self.contexte.Process(
+            target=boucle_worker,
+            args=(conn_enfant, self.player, self.limite_cpu, self.limite_memoire),
+            name=f"joueur_{self.nom}",
+            daemon=True,
+        )
+        self.process.start()
+        conn_enfant.close()
+        self.conn = conn_parent
+
+    def relancer(self):
+        # Le nouveau processus reçoit la dernière main donnée
+        self.nb_redemarrages += 1
+        self.demarrer()
+        if getattr(self, "main", None) is not None:
+            self.conn.send_bytes(encoder(CODE_DONNER_MAIN, self.main))
+
+    def tuer(self):
+        if self.process is None:
+            return
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+        self.process = None
+        self.conn = None
+
+    def appeler_avec_timeout(self, nom_methode, timeout, *args):
+        """
+        :raises concurrent.futures.TimeoutError: le joueur n'a pas répondu à temps, son processus est tué
+        :raises RuntimeError: le joueur a levé une exception, ou son processus est mort
+        """
+        if nom_methode == "que_jouer":
+            main, cartes_plateau, risque_saut, historique_jeux = args
+            drapeaux = DRAPEAU_RISQUE_SAUT * bool(risque_saut) | DRAPEAU_REVOLUTION * self.is_revolution
+            message = encoder(CODE_QUE_JOUER, drapeaux, main, len(cartes_plateau), *cartes_plateau, historique_jeux)
+        elif nom_methode == "give_cards_prez_to_trou":
+            message = encoder(CODE_GIVE_CARDS_PREZ_TO_TROU, args[0])
+        elif nom_methode == "give_card_vice_prez_to_vice_trou":
+            message = encoder(CODE_GIVE_CARD_VICE_PREZ_TO_VICE_TROU, args[0])
+        else:
+            raise ValueError(f"Méthode non supportée : {nom_methode}")
+
+        if self.process is None:
+            self.relancer()
+        try:
+            self.conn.send_bytes(message)
+            repondu = self.conn.poll(timeout)
+            reponse = self.conn.recv_bytes() if repondu else None
+        except (EOFError, OSError):
+            # Processus mort : limite de CPU ou de mémoire dépassée, ou crash
+            self.tuer()
+            raise RuntimeError(f"Le processus de {self.nom} s'est arrêté")
+        # Hors du try : TimeoutError est une sous-classe d'OSError depuis Python 3.11
+        if not repondu:
+            self.tuer()
+            raise concurrent.futures.TimeoutError(f"{self.nom} n'a pas répondu en {timeout} secondes")
+
+        statut = decoder(reponse[:2])[0]
+        if statut == STATUT_ERREUR:
+            raise RuntimeError(f"{self.nom} a levé une exception :\n{reponse[2:].decode('utf-8')}")
+        if statut == STATUT_FORMAT:
+            return None
+        cartes, _ = lire_liste(decoder(reponse), 1)
+        if nom_methode == "give_card_vice_prez_to_vice_trou":
+            return cartes[0] if cartes else None
+        return cartes
+
+    def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        return self.appeler_avec_timeout("que_jouer", self.timeout, main, cartes_plateau, risque_saut, historique_jeux)
+
+    def give_cards_prez_to_trou(self, main: list[int]) -> list[int]:
+        try:
+            return self.appeler_avec_timeout("give_cards_prez_to_trou", self.timeout, main)
+        except (concurrent.futures.TimeoutError, RuntimeError):
+            logger.error(f"{self.nom} n'a pas choisi ses cartes pour le trou : on donne les plus faibles")
+            return super().give_cards_prez_to_trou(main)
+
+    def give_card_vice_prez_to_vice_trou(self, main: list[int]) -> int:
+        try:
+            return self.appeler_avec_timeout("give_card_vice_prez_to_vice_trou", self.timeout, main)
+        except (concurrent.futures.TimeoutError, RuntimeError):
+            logger.error(f"{self.nom} n'a pas choisi sa carte pour le vice-trou : on donne la plus faible")
+            return super().give_card_vice_prez_to_vice_trou(main)
+
+    def donner_main(self, main: list[int]):
+        if self.process is None:
+            self.nb_redemarrages += 1
+            self.demarrer()
+        self.main = main
+        # Pas de réponse attendue
+        try:
+            self.conn.send_bytes(encoder(CODE_DONNER_MAIN, main))
+        except (EOFError, OSError):
+            # Processus mort depuis le dernier appel : il est relancé avec cette main au prochain appel
+            logger.error(f"Le processus de {self.nom} s'est arrêté : il sera relancé")
+            self.tuer()
+
+    def get_name(self) -> str:
+        return self.nom
+
+    def fermer(self):
+        if self.process is None:
+            return
+        try:
+            self.conn.send_bytes(encoder(CODE_ARRET))
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.process = None
+        self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
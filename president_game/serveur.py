@@ -0,0 +1,163 @@
+"""
+Serveur de parties asyncio, et joueurs externes branchés par un flux (stdin/stdout d'un processus, socket locale)
+
+ServeurParties joue des milliers de parties en même temps dans une seule boucle asyncio.
+
+Protocole des joueurs externes : une ligne JSON par message.
+- requête : {"id": n, "main": [...], "cartes_plateau": [[...], ...], "risque_saut": bool, "historique_jeux": [...],
+  "revolution": bool}
+- réponse : {"id": n, "pose": [...]}
+Côté bot, servir(MonJoueur()) répond sur stdin/stdout, par exemple :
+    python -m president_game.serveur president_game.player:AggressivePlayer
+"""
+import asyncio
+import importlib
+import json
+import sys
+
+from president_game.execution import ExecutionJoueursAsync
+from president_game.partie import Partie
+from president_game.player import Player
+
+
+class ServeurParties:
+    """
+    :param max_parties: nombre maximal de parties jouées en même temps
+    :param max_threads: threads pour les joueurs synchrones qui ne sont pas de confiance
+    """
+    def __init__(self, max_parties=1000, max_threads=8):
+        self.semaphore = asyncio.Semaphore(max_parties)
+        self.execution_joueurs = ExecutionJoueursAsync(max_threads)
+
+    async def jouer(self, partie: Partie) -> Partie:
+        async with self.semaphore:
+            await partie.play_whole_game_async(self.execution_joueurs)
+        return partie
+
+    async def jouer_toutes(self, parties: list[Partie], return_exceptions=False) -> list:
+        """
+        Joue toutes les parties en même temps. Avec return_exceptions, une partie qui échoue (rôles illogiques...)
+        renvoie son exception au lieu d'interrompre les autres
+        """
+        return await asyncio.gather(*(self.jouer(partie) for partie in parties), return_exceptions=return_exceptions)
+
+    def fermer(self):
+        self.execution_joueurs.fermer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+class JoueurFlux(Player):
+    """
+    Joueur externe qui répond sur un flux asyncio. Les échanges de cartes en début de partie se font avec
+    la stratégie par défaut de Player.
+
+    Une réponse arrivée après le timeout est ignorée grâce à son id.
+    """
+    def __init__(self, lecteur: asyncio.StreamReader, ecrivain: asyncio.StreamWriter, nom="JoueurFlux"):
+        self.lecteur = lecteur
+        self.ecrivain = ecrivain
+        self.name = nom
+        self.processus = None
+        self.id_requete = 0
+        self.verrou = asyncio.Lock()
+
+    def get_name(self):
+        return self.name
+
+    @classmethod
+    async def lancer_processus(cls, *commande, nom="JoueurFlux") -> "JoueurFlux":
+        """
+        Lance le bot dans un processus et lui parle par stdin/stdout
+        """
+        processus = await asyncio.create_subprocess_exec(
+            *commande, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+        )
+        joueur = cls(processus.stdout, processus.stdin, nom)
+        joueur.processus = processus
+        return joueur
+
+    @classmethod
+    async def connecter(cls, chemin, nom="JoueurFlux") -> "JoueurFlux":
+        """
+        Se connecte à un bot qui écoute sur une socket Unix locale (voir servir_socket)
+        """
+        lecteur, ecrivain = await asyncio.open_unix_connection(chemin)
+        return cls(lecteur, ecrivain, nom)
+
+    async def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        async with self.verrou:
+            self.id_requete += 1
+            requete = {
+                "id": self.id_requete,
+                "main": list(main),
+                "cartes_plateau": [list(cartes) for cartes in cartes_plateau],
+                "risque_saut": risque_saut,
+                "historique_jeux": list(historique_jeux),
+                "revolution": self.is_revolution,
+            }
+            self.ecrivain.write(json.dumps(requete).encode() + b"\n")
+            await self.ecrivain.drain()
+            while True:
+                ligne = await self.lecteur.readline()
+                if not ligne:
+                    raise ConnectionError(f"{self.name} a fermé la connexion")
+                reponse = json.loads(ligne)
+                # Les réponses aux requêtes abandonnées (timeout) sont sautées
+                if reponse.get("id") == self.id_requete:
+                    return reponse.get("pose")
+
+    async def fermer(self):
+        self.ecrivain.close()
+        if self.processus is not None:
+            await self.processus.wait()
+
+
+def repondre(player: Player, ligne) -> str:
+    requete = json.loads(ligne)
+    player.is_revolution = requete.get("revolution", False)
+    pose = player.que_jouer(
+        requete["main"], requete["cartes_plateau"], requete["risque_saut"], requete["historique_jeux"]
+    )
+    return json.dumps({"id": requete["id"], "pose": list(pose) if isinstance(pose, (list, tuple)) else pose}) + "\n"
+
+
+def servir(player: Player, entree=None, sortie=None):
+    """
+    Côté bot : répond aux requêtes lues sur entree (stdin) jusqu'à sa fermeture.
+    Les print du joueur partent sur stderr pour ne pas se mêler aux réponses.
+    """
+    entree = entree or sys.stdin
+    sortie = sortie or sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        for ligne in entree:
+            sortie.write(repondre(player, ligne))
+            sortie.flush()
+    finally:
+        sys.stdout = sys.__stdout__
+
+
+async def servir_socket(player: Player, chemin):
+    """
+    Côté bot : écoute sur une socket Unix locale, une connexion par partie
+    """
+    async def connexion(lecteur, ecrivain):
+        while ligne := await lecteur.readline():
+            ecrivain.write(repondre(player, ligne).encode())
+            await ecrivain.drain()
+        ecrivain.close()
+
+    serveur = await asyncio.start_unix_server(connexion, chemin)
+    async with serveur:
+        await serveur.serve_forever()
+
+
+if __name__ == "__main__":
+    # python -m president_game.serveur module:Classe
+    nom_module, nom_classe = sys.argv[1].split(":")
+    servir(getattr(importlib.import_module(nom_module), nom_classe)())
@@ -0,0 +1,226 @@
+"""
+Fin de partie résolue exactement
+
+Quand il reste peu de cartes, SolveurFinDePartie explore tous les coups (max^n : chaque joueur cherche sa
+meilleure place) sur une Position où les mains sont connues. Les positions déjà résolues sont gardées dans
+une table de transposition bornée, partagée par défaut par tous les joueurs d'un même processus : elle sert
+d'un tour et d'une partie à l'autre pendant tout un tournoi.
+"""
+import random
+import time
+from functools import lru_cache
+
+from president_game.etat import GameState
+from president_game.player import DumbPlayer
+from president_game.position import PASSER, Position
+
+
+def canonique(position: Position) -> tuple[Position, list[int]]:
+    """
+    Copie de la position où seuls comptent l'ordre des rangs encore en jeu et les rangs extrêmes (qui donnent
+    la main, selon qu'il y a révolution ou non) : les rangs présents sont renumérotés 1, 2, 3... et les rangs
+    extrêmes restent à leur place. Deux fins de partie identiques à ces rangs près ont la même forme canonique.
+
+    :return: la position canonique, et le rang d'origine de chaque rang canonique
+    """
+    etat = position.etat
+    nb_rangs_cartes = position.nb_rangs_cartes
+    plus_fort = nb_rangs_cartes - 1
+    presents = [
+        rang for rang in range(1, plus_fort)
+        if rang == position.top_rang or any(main[rang] for main in etat.mains)
+    ]
+    rangs = [0] + presents + [plus_fort] * (nb_rangs_cartes - 1 - len(presents))
+    nouveau_rang = {rang: i for i, rang in enumerate(presents, 1)}
+    nouveau_rang[0] = 0
+    nouveau_rang[plus_fort] = plus_fort
+
+    nouvel_etat = GameState(position.nb_joueurs, nb_rangs_cartes, etat.nb_exemplaires)
+    for joueur, main in enumerate(etat.mains):
+        nouvelle_main = nouvel_etat.mains[joueur]
+        for rang, nb in enumerate(main):
+            if nb:
+                nouvelle_main[nouveau_rang[rang]] = nb
+        nouvel_etat.tailles[joueur] = etat.tailles[joueur]
+        nouvel_etat.masques[joueur] = nouvel_etat.table.masque_main(nouvelle_main)
+
+    nouvelle = Position(nouvel_etat, position.joueur_actuel)
+    nouvelle.en_jeu = position.en_jeu
+    nouvelle.pas_fini = position.pas_fini
+    nouvelle.top_rang = nouveau_rang[position.top_rang] if position.top_rang >= 0 else -1
+    nouvelle.top_nb = position.top_nb
+    nouvelle.counter_same_card = position.counter_same_card
+    nouvelle.risque_saut = position.risque_saut
+    nouvelle.revolution = position.revolution
+    return nouvelle, rangs
+
+
+class BudgetDepasse(Exception):
+    """
+    La recherche a exploré plus de noeuds que permis
+    """
+
+
+class SolveurFinDePartie:
+    """
+    :param taille_max: nombre maximal de positions gardées. Au-delà, le plus ancien quart est oublié
+
+    Statistiques : noeuds explorés, requêtes et succès dans la table, temps passé à chercher
+    """
+    def __init__(self, taille_max=1_000_000):
+        self.taille_max = taille_max
+        self.table = {}
+        self.noeuds = 0
+        self.requetes = 0
+        self.succes = 0
+        self.duree = 0.0
+        self.noeuds_max = None
+
+    def ordre_restant(self, position: Position, budget_noeuds=None) -> tuple[int, ...]:
+        """
+        Ordre d'arrivée des joueurs pas encore finis, si chacun joue au mieux pour sa place
+        """
+        return self.meilleur_coup(position, budget_noeuds)[1]
+
+    def meilleur_coup(self, position: Position, budget_noeuds=None) -> tuple[int, tuple[int, ...]]:
+        """
+        Meilleur coup du joueur actuel, et ordre d'arrivée des joueurs pas encore finis qui en résulte
+
+        :param budget_noeuds: lève BudgetDepasse au-delà de ce nombre de noeuds explorés. La position est alors
+        dans un état quelconque, mais la table ne contient que des résultats exacts
+        """
+        self.noeuds_max = None if budget_noeuds is None else self.noeuds + budget_noeuds
+        debut = time.perf_counter()
+        try:
+            return self._chercher(position)
+        finally:
+            self.duree += time.perf_counter() - debut
+
+    def _chercher(self, position: Position) -> tuple[int, tuple[int, ...]]:
+        self.noeuds += 1
+        if self.noeuds_max is not None and self.noeuds > self.noeuds_max:
+            raise BudgetDepasse()
+        if position.est_terminee():
+            return PASSER, tuple(joueur for joueur in range(position.nb_joueurs) if position.pas_fini >> joueur & 1)
+        cle = (
+            position.joueur_actuel, position.en_jeu, position.pas_fini, position.top_rang, position.top_nb,
+            position.counter_same_card, position.risque_saut, position.revolution, position.nb_rangs_cartes,
+            position.nb_exemplaires, *position.etat.masques,
+        )
+        self.requetes += 1
+        resultat = self.table.get(cle)
+        if resultat is not None:
+            self.succes += 1
+            return resultat
+
+        joueur = position.joueur_actuel
+        classement = position.classement
+        meilleur = None
+        for coup in position.coups_legaux():
+            nb_finis = len(classement)
+            position.apply(coup)
+            ordre = tuple(classement[nb_finis:]) + self._chercher(position)[1]
+            position.undo()
+            if meilleur is None or ordre.index(joueur) < meilleur[1].index(joueur):
+                meilleur = (coup, ordre)
+
+        if len(self.table) >= self.taille_max:
+            self.oublier()
+        self.table[cle] = meilleur
+        return meilleur
+
+    def oublier(self):
+        """
+        Oublie le plus ancien quart de la table (les dictionnaires gardent l'ordre d'insertion)
+        """
+        table = self.table
+        for cle in list(table)[: max(1, len(table) // 4)]:
+            del table[cle]
+
+    def taux_succes(self) -> float:
+        return self.succes / self.requetes if self.requetes else 0.0
+
+    def noeuds_par_seconde(self) -> float:
+        return self.noeuds / self.duree if self.duree else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "noeuds": self.noeuds,
+            "requetes": self.requetes,
+            "succes": self.succes,
+            "taux_succes": self.taux_succes(),
+            "noeuds_par_seconde": self.noeuds_par_seconde(),
+            "taille_table": len(self.table),
+        }
+
+
+@lru_cache(maxsize=None)
+def solveur_partage() -> SolveurFinDePartie:
+    """
+    Solveur commun à tous les joueurs du processus, pour que la table serve d'une partie à l'autre
+    """
+    return SolveurFinDePartie()
+
+
+class EndgamePlayer(DumbPlayer):
+    """
+    Joue comme DumbPlayer, puis résout la fin de partie quand il reste au plus seuil_cartes cartes en main
+    (tous joueurs confondus). Les mains des adversaires sont tirées au hasard parmi les cartes qu'il ne voit
+    pas (nb_tirages fois), et le coup qui donne la meilleure place en moyenne est joué.
+    Au-delà de budget_noeuds noeuds explorés pour un coup, il rejoue comme DumbPlayer.
+    """
+    # Appelé dans son thread, avec un timeout : la recherche peut être longue
+    trusted = False
+    position_determinisee = True
+
+    def __init__(self, seuil_cartes=12, nb_tirages=3, budget_noeuds=500_000, solveur: SolveurFinDePartie | None = None,
+                 seed=None):
+        self.seuil_cartes = seuil_cartes
+        # La partie ne copie et ne tire la position qu'en dessous du seuil
+        self.seuil_position = seuil_cartes
+        self.nb_tirages = nb_tirages
+        self.budget_noeuds = budget_noeuds
+        self.solveur = solveur or solveur_partage()
+        self.rng = random.Random(seed)
+        self.position = None
+
+    def get_name(self):
+        return "EndgameP"
+
+    def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        # La position n'est donnée que par Partie (pas par le moteur en lot, ni dans un processus isolé), et
+        # seulement sous seuil_cartes
+        position, self.position = self.position, None
+        if position is None or sum(position.etat.tailles) > self.seuil_cartes:
+            return super().que_jouer(main, cartes_plateau, risque_saut, historique_jeux)
+
+        try:
+            return self.resoudre(position)
+        except BudgetDepasse:
+            return super().que_jouer(main, cartes_plateau, risque_saut, historique_jeux)
+
+    def resoudre(self, position: Position) -> list[int]:
+        joueur = position.joueur_actuel
+        solveur = self.solveur
+        fin_budget = solveur.noeuds + self.budget_noeuds
+        places = {}
+        for i in range(self.nb_tirages):
+            tirage = position if i == 0 else position.determiniser(joueur, self.rng)
+            tirage_canonique, rangs = canonique(tirage)
+            for coup in tirage_canonique.coups_legaux():
+                nb_finis = len(tirage_canonique.classement)
+                tirage_canonique.apply(coup)
+                ordre = tuple(tirage_canonique.classement[nb_finis:]) + solveur.ordre_restant(
+                    tirage_canonique, fin_budget - solveur.noeuds
+                )
+                tirage_canonique.undo()
+                if coup == PASSER:
+                    pose = ()
+                else:
+                    rang, nb_cartes = tirage_canonique.table.coups[coup]
+                    pose = (rangs[rang],) * nb_cartes
+                places[pose] = places.get(pose, 0) + ordre.index(joueur)
+
+        # Les coups possibles sont les mêmes à chaque tirage : ils ne dépendent que de notre main et du centre
+        meilleure_pose = min(places, key=lambda pose: (places[pose], pose))
+        return list(meilleure_pose)
@@ -0,0 +1,142 @@
+"""
+Statistiques en ligne et critères d'arrêt des tournois
+
+StatsEnLigne garde la moyenne et la variance d'une mesure au fil des parties (algorithme de Welford), sans
+garder les valeurs. Un critère d'arrêt est appelé par Tournoi.lancer après chaque lot avec les résultats
+cumulés, et renvoie True quand on en sait assez : le tournoi s'arrête alors avant nb_parties.
+"""
+import math
+from statistics import NormalDist
+from typing import Callable
+
+
+class StatsEnLigne:
+    """
+    Moyenne, variance et intervalle de confiance d'une mesure ajoutée valeur par valeur
+    """
+    __slots__ = ("n", "moyenne", "m2")
+
+    def __init__(self):
+        self.n = 0
+        self.moyenne = 0.
+        # Somme des carrés des écarts à la moyenne
+        self.m2 = 0.
+
+    @classmethod
+    def depuis_repartition(cls, repartition, points) -> "StatsEnLigne":
+        """
+        Stats des points à partir d'une répartition des places (repartition[i] parties finies à la place i)
+        """
+        stats = cls()
+        for nb, pt in zip(repartition, points):
+            stats.ajouter(pt, nb)
+        return stats
+
+    @classmethod
+    def depuis_moments(cls, n, moyenne, m2) -> "StatsEnLigne":
+        """
+        Stats déjà calculées ailleurs (par exemple avec NumPy) : m2 est la somme des carrés des écarts à la moyenne
+        """
+        stats = cls()
+        stats.n = n
+        stats.moyenne = moyenne
+        stats.m2 = m2
+        return stats
+
+    def ajouter(self, valeur, poids=1):
+        """
+        Ajoute poids fois la valeur
+        """
+        if poids <= 0:
+            return
+        n = self.n + poids
+        delta = valeur - self.moyenne
+        self.moyenne += delta * poids / n
+        self.m2 += delta * delta * self.n * poids / n
+        self.n = n
+
+    def fusionner(self, autre: "StatsEnLigne"):
+        if autre.n == 0:
+            return
+        n = self.n + autre.n
+        delta = autre.moyenne - self.moyenne
+        self.moyenne += delta * autre.n / n
+        self.m2 += autre.m2 + delta * delta * self.n * autre.n / n
+        self.n = n
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else math.inf
+
+    @property
+    def erreur_type(self) -> float:
+        return math.sqrt(self.variance / self.n) if self.n > 1 else math.inf
+
+    def demi_largeur(self, confiance=0.95) -> float:
+        """
+        Demi-largeur de l'intervalle de confiance (approximation normale) sur la moyenne
+        """
+        return NormalDist().inv_cdf((1 + confiance) / 2) * self.erreur_type
+
+    def intervalle(self, confiance=0.95) -> tuple[float, float]:
+        demi_largeur = self.demi_largeur(confiance)
+        return self.moyenne - demi_largeur, self.moyenne + demi_largeur
+
+    def __repr__(self):
+        bas, haut = self.intervalle()
+        return f"StatsEnLigne(n={self.n}, moyenne={self.moyenne:.4f}, IC95=[{bas:.4f}, {haut:.4f}])"
+
+
+class CriterePrecision:
+    """
+    S'arrête quand l'intervalle de confiance sur la moyenne de la mesure est plus étroit que ±epsilon
+
+    :param mesure: calcule les stats à suivre à partir des résultats cumulés (ResultatsTournoi)
+    :param nb_min: nombre minimal de valeurs avant de s'arrêter, pour que l'approximation normale tienne
+    """
+    def __init__(self, mesure: Callable[..., StatsEnLigne], epsilon, confiance=0.95, nb_min=30):
+        self.mesure = mesure
+        self.epsilon = epsilon
+        self.confiance = confiance
+        self.nb_min = nb_min
+        self.stats = None
+
+    def __call__(self, resultats) -> bool:
+        self.stats = self.mesure(resultats)
+        return self.stats.n >= self.nb_min and self.stats.demi_largeur(self.confiance) < self.epsilon
+
+    def __str__(self):
+        return f"précision ±{self.epsilon} atteinte : {self.stats}"
+
+
+class Sprt:
+    """
+    Test séquentiel du rapport des vraisemblances (Wald) sur une probabilité de succès :
+    H0 p = p0 contre H1 p = p1. alpha et beta sont les risques de choisir H1 à tort et H0 à tort.
+
+    :param mesure: renvoie (nombre de succès, nombre d'essais) à partir des résultats cumulés
+    decision : None tant que le test continue, puis "H0" ou "H1"
+    """
+    def __init__(self, mesure: Callable[..., tuple[int, int]], p0, p1, alpha=0.05, beta=0.05):
+        self.mesure = mesure
+        self.p0 = p0
+        self.p1 = p1
+        self.borne_h0 = math.log(beta / (1 - alpha))
+        self.borne_h1 = math.log((1 - beta) / alpha)
+        self.llr = 0.
+        self.decision = None
+
+    def __call__(self, resultats) -> bool:
+        nb_succes, nb_essais = self.mesure(resultats)
+        self.llr = (
+            nb_succes * math.log(self.p1 / self.p0)
+            + (nb_essais - nb_succes) * math.log((1 - self.p1) / (1 - self.p0))
+        )
+        if self.llr >= self.borne_h1:
+            self.decision = "H1"
+        elif self.llr <= self.borne_h0:
+            self.decision = "H0"
+        return self.decision is not None
+
+    def __str__(self):
+        return f"SPRT p0={self.p0} contre p1={self.p1} : {self.decision} (log-rapport {self.llr:.2f})"
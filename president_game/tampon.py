@@ -0,0 +1,199 @@
+"""
+Tampon de résultats en mémoire partagée pour les tournois multiprocessus
+
+Une ligne de largeur fixe par partie (ligne i : partie i du tournoi), que les workers écrivent directement
+dans un segment multiprocessing.shared_memory : aucun résultat de partie ne passe par pickle.
+Les joueurs et les rôles sont codés par leur indice dans noms_joueurs et noms_roles.
+Le processus principal agrège le tampon avec NumPy (repartitions, differences_appariees).
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from president_game.statistiques import StatsEnLigne
+
+# Donne des parties hors mode dupliqué
+PAS_DE_DONNE = -1
+
+
+def dtype_parties(nb_joueurs) -> np.dtype:
+    return np.dtype([
+        # False tant que la partie n'a pas été jouée jusqu'au bout
+        ("jouee", np.bool_),
+        ("table", np.int32),
+        ("donne", np.int64),
+        # Code du joueur et du rôle de chaque siège
+        ("joueurs", np.int16, (nb_joueurs,)),
+        ("roles", np.int16, (nb_joueurs,)),
+        # Sièges du premier au dernier
+        ("classement", np.int8, (nb_joueurs,)),
+        ("nb_tours", np.int32),
+        # Timeouts de chaque siège
+        ("timeouts", np.int16, (nb_joueurs,)),
+    ])
+
+
+class TamponResultats:
+    """
+    :param nom: nom d'un segment existant à ouvrir (dans un worker), sinon un segment est créé
+    parties : tableau structuré (voir dtype_parties) qui vit dans le segment, ou en mémoire privée après detacher()
+    """
+    def __init__(self, nb_parties, nb_joueurs, noms_joueurs: list[str], noms_roles: list[str], nom=None):
+        self.nb_parties = nb_parties
+        self.nb_joueurs = nb_joueurs
+        self.noms_joueurs = noms_joueurs
+        self.noms_roles = noms_roles
+        self.codes_joueurs = {nom_joueur: code for code, nom_joueur in enumerate(noms_joueurs)}
+        self.codes_roles = {role: code for code, role in enumerate(noms_roles)}
+        dtype = dtype_parties(nb_joueurs)
+        self.proprietaire = nom is None
+        if self.proprietaire:
+            self.memoire = shared_memory.SharedMemory(create=True, size=max(1, nb_parties * dtype.itemsize))
+        else:
+            self.memoire = shared_memory.SharedMemory(name=nom)
+        self.parties = np.ndarray(nb_parties, dtype=dtype, buffer=self.memoire.buf)
+        if self.proprietaire:
+            self.parties["jouee"] = False
+
+    def descripteur(self) -> tuple:
+        """
+        De quoi ouvrir le tampon dans un worker : seul ce petit tuple est envoyé
+        """
+        return self.nb_parties, self.nb_joueurs, self.noms_joueurs, self.noms_roles, self.memoire.name
+
+    @classmethod
+    def ouvrir(cls, descripteur) -> "TamponResultats":
+        return cls(*descripteur)
+
+    def ecrire(self, indice_partie, table, joueurs, roles, classement, nb_tours, timeouts=None, donne=None):
+        """
+        :param joueurs, roles: noms du joueur et du rôle de chaque siège
+        """
+        ligne = self.parties[indice_partie]
+        ligne["table"] = table
+        ligne["donne"] = PAS_DE_DONNE if donne is None else donne
+        ligne["joueurs"] = [self.codes_joueurs[nom] for nom in joueurs]
+        ligne["roles"] = [self.codes_roles[role] for role in roles]
+        ligne["classement"] = classement
+        ligne["nb_tours"] = nb_tours
+        ligne["timeouts"] = 0 if timeouts is None else timeouts
+        ligne["jouee"] = True
+
+    def ecrire_lot(
+        self, indices_parties, table, joueurs, roles, classement, valide, nb_tours, donnes=None, timeouts=None
+    ):
+        """
+        Plusieurs parties d'une même table d'un coup (moteur batch) : classement, valide, nb_tours et timeouts
+        sont des tableaux avec une ligne par partie
+        """
+        indices_parties = np.asarray(indices_parties)
+        parties = self.parties
+        parties["table"][indices_parties] = table
+        parties["donne"][indices_parties] = PAS_DE_DONNE if donnes is None else donnes
+        parties["joueurs"][indices_parties] = [self.codes_joueurs[nom] for nom in joueurs]
+        parties["roles"][indices_parties] = [self.codes_roles[role] for role in roles]
+        parties["classement"][indices_parties] = classement
+        parties["nb_tours"][indices_parties] = nb_tours
+        parties["timeouts"][indices_parties] = 0 if timeouts is None else timeouts
+        parties["jouee"][indices_parties] = valide
+
+    def fermer(self):
+        """
+        Ferme le segment dans ce processus. Le propriétaire le supprime aussi
+        """
+        if self.memoire is None:
+            return
+        # Le tableau pointe dans le segment : il faut le lâcher avant de fermer
+        self.parties = None
+        self.memoire.close()
+        if self.proprietaire:
+            self.memoire.unlink()
+        self.memoire = None
+
+    def detacher(self):
+        """
+        Copie les parties en mémoire privée et supprime le segment partagé
+        """
+        if self.memoire is None:
+            return
+        parties = self.parties.copy()
+        self.fermer()
+        self.parties = parties
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def selection(self, debut=0, fin=None) -> np.ndarray:
+        # Parties [debut, fin) jouées jusqu'au bout
+        parties = self.parties[debut:fin]
+        return parties[parties["jouee"]]
+
+    def places_sieges(self, parties) -> np.ndarray:
+        """
+        places[g, siege] : place du siège dans la partie g (inverse du classement)
+        """
+        places = np.empty_like(parties["classement"])
+        np.put_along_axis(
+            places, parties["classement"].astype(np.int64), np.arange(self.nb_joueurs, dtype=places.dtype)[None, :],
+            axis=1,
+        )
+        return places
+
+    def repartitions(self, debut=0, fin=None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Répartition des places des parties [debut, fin), par siège, par code de rôle et par code de joueur :
+        repartition[x, i] est le nombre de parties où x a fini à la place i
+        """
+        parties = self.selection(debut, fin)
+        n = self.nb_joueurs
+        places = self.places_sieges(parties).astype(np.int64)
+        sieges = np.broadcast_to(np.arange(n), places.shape)
+        par_siege = np.bincount((sieges * n + places).ravel(), minlength=n * n).reshape(n, n)
+        nb_roles = len(self.noms_roles)
+        par_role = np.bincount(
+            (parties["roles"].astype(np.int64) * n + places).ravel(), minlength=nb_roles * n
+        ).reshape(nb_roles, n)
+        nb_noms = len(self.noms_joueurs)
+        par_joueur = np.bincount(
+            (parties["joueurs"].astype(np.int64) * n + places).ravel(), minlength=nb_noms * n
+        ).reshape(nb_noms, n)
+        return par_siege, par_role, par_joueur
+
+    def timeouts_joueurs(self, debut=0, fin=None) -> dict[str, int]:
+        """
+        Nombre de timeouts de chaque joueur qui en a eu
+        """
+        parties = self.selection(debut, fin)
+        totaux = np.bincount(
+            parties["joueurs"].ravel(), weights=parties["timeouts"].ravel(), minlength=len(self.noms_joueurs)
+        )
+        return {nom: int(nb) for nom, nb in zip(self.noms_joueurs, totaux) if nb}
+
+    def differences_appariees(self, points, joueur_a, joueur_b, fin=None) -> np.ndarray:
+        """
+        Même calcul que ResultatsTournoi.differences_appariees, par donne croissante
+        """
+        parties = self.selection(0, fin)
+        parties = parties[parties["donne"] != PAS_DE_DONNE]
+        points_sieges = np.asarray(points, dtype=np.float64)[self.places_sieges(parties)]
+        donnes, indices = np.unique(parties["donne"], return_inverse=True)
+        moyennes = []
+        for joueur in (joueur_a, joueur_b):
+            code = self.codes_joueurs.get(joueur, -1)
+            present = parties["joueurs"] == code
+            sommes = np.bincount(indices, weights=(points_sieges * present).sum(axis=1), minlength=len(donnes))
+            nombres = np.bincount(indices, weights=present.sum(axis=1), minlength=len(donnes))
+            moyennes.append((sommes, nombres))
+        (sommes_a, nombres_a), (sommes_b, nombres_b) = moyennes
+        communes = (nombres_a > 0) & (nombres_b > 0)
+        return sommes_a[communes] / nombres_a[communes] - sommes_b[communes] / nombres_b[communes]
+
+    def stats_differences(self, points, joueur_a, joueur_b, fin=None) -> StatsEnLigne:
+        differences = self.differences_appariees(points, joueur_a, joueur_b, fin)
+        if not len(differences):
+            return StatsEnLigne()
+        moyenne = float(differences.mean())
+        return StatsEnLigne.depuis_moments(len(differences), moyenne, float(((differences - moyenne) ** 2).sum()))
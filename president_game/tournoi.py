@@ -0,0 +1,481 @@
+"""
+Tournois : répartit un grand nombre de parties sur plusieurs processus
+
+Les parties sont découpées en lots de taille fixe. Chaque lot a son propre générateur aléatoire,
+dérivé de la graine du tournoi et du numéro du lot : le résultat ne dépend donc pas du nombre de workers.
+Chaque lot renvoie la répartition des places par siège, par rôle et par joueur, que l'on additionne.
+Avec memoire_partagee, les workers écrivent plutôt chaque partie dans un tampon partagé (voir tampon.py),
+que le processus principal agrège avec NumPy.
+
+En mode dupliqué (comme au bridge), chaque donne est rejouée sur toutes les tables : avec des tables équilibrées,
+chaque joueur reçoit les mêmes cartes aux mêmes sièges et rôles que les autres. La chance de la donne s'annule
+dans la différence de score entre deux joueurs sur une même donne (différences appariées).
+"""
+import logging
+import math
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable
+
+from president_game.coups import NB_COULEURS
+from president_game.execution import ExecutionJoueurs
+from president_game.mesures import Mesures
+from president_game.partie import Partie, paquet_modele
+from president_game.player import Player, nom_joueur
+from president_game.resultats import SinkColonnes
+from president_game.statistiques import StatsEnLigne
+
+logger = logging.getLogger(__name__)
+
+# Une table : les fabriques des joueurs (par exemple leurs classes) et les rôles de chaque siège
+Table = tuple[list[Callable[[], Player]], list[str]]
+
+
+def tables_equilibrees(fabriques: list[Callable[[], Player]], roles: list[str]) -> list[Table]:
+    """
+    Tables équilibrées pour comparer des joueurs : chaque fabrique occupe chaque siège, chaque rôle et chaque
+    couple (siège, rôle) aussi souvent que les autres, pour n'importe quel nombre de fabriques et de sièges.
+
+    On part d'une table où les fabriques se suivent en boucle (A B C A B...), puis on fait tourner les sièges,
+    les fabriques entre elles et les rôles. Les tables en double sont retirées : chacune apparaissait
+    le même nombre de fois, l'équilibre est donc conservé. Il y a au plus len(roles)² * len(fabriques) tables,
+    à jouer chacune le même nombre de fois (nb_parties multiple du nombre de tables).
+    """
+    nb_joueurs = len(roles)
+    nb_fabriques = len(fabriques)
+    tables = {}
+    for decalage_fabriques in range(nb_fabriques):
+        for decalage_sieges in range(nb_joueurs):
+            joueurs = tuple(
+                fabriques[((siege + decalage_sieges) % nb_joueurs + decalage_fabriques) % nb_fabriques]
+                for siege in range(nb_joueurs)
+            )
+            for decalage_roles in range(nb_joueurs):
+                roles_table = tuple(roles[(siege + decalage_roles) % nb_joueurs] for siege in range(nb_joueurs))
+                tables.setdefault((joueurs, roles_table), None)
+    return [(list(joueurs), list(roles_table)) for joueurs, roles_table in tables]
+
+
+class ResultatsTournoi:
+    """
+    Répartition des places : repartition[x][i] est le nombre de parties où x a fini à la place i
+    """
+    nb_joueurs: int
+    nb_parties: int
+    nb_parties_jouees: int
+    repartition_sieges: list[list[int]]
+    repartition_roles: dict[str, list[int]]
+    repartition_joueurs: dict[str, list[int]]
+    # En mode dupliqué : répartition des places par joueur pour chaque donne (indice de la donne -> joueur -> places)
+    donnes: dict[int, dict[str, list[int]]]
+    # Temps de réponse des joueurs et du moteur, additionnés sur toutes les parties (Tournoi(mesurer=True))
+    mesures: Mesures | None = None
+    # Une ligne par partie (Tournoi(memoire_partagee=True)) : TamponResultats, en mémoire privée une fois le tournoi fini
+    tampon = None
+    duree: float = 0.
+
+    def __init__(self, nb_joueurs):
+        self.nb_joueurs = nb_joueurs
+        self.nb_parties = 0
+        self.nb_parties_jouees = 0
+        self.repartition_sieges = [[0] * nb_joueurs for _ in range(nb_joueurs)]
+        self.repartition_roles = {}
+        self.repartition_joueurs = {}
+        self.donnes = {}
+
+    def ajouter_partie(self, classement, players, role_players, donne=None):
+        self.nb_parties_jouees += 1
+        repartition_donne = self.donnes.setdefault(donne, {}) if donne is not None else None
+        for place, siege in enumerate(classement):
+            nom = nom_joueur(players[siege])
+            self.repartition_sieges[siege][place] += 1
+            self.repartition_roles.setdefault(role_players[siege], [0] * self.nb_joueurs)[place] += 1
+            self.repartition_joueurs.setdefault(nom, [0] * self.nb_joueurs)[place] += 1
+            if repartition_donne is not None:
+                repartition_donne.setdefault(nom, [0] * self.nb_joueurs)[place] += 1
+
+    def fusionner(self, autre: "ResultatsTournoi"):
+        self.nb_parties += autre.nb_parties
+        self.nb_parties_jouees += autre.nb_parties_jouees
+        for siege in range(self.nb_joueurs):
+            self.repartition_sieges[siege] = [
+                a + b for a, b in zip(self.repartition_sieges[siege], autre.repartition_sieges[siege])
+            ]
+        for repartition, autre_repartition in [
+            (self.repartition_roles, autre.repartition_roles),
+            (self.repartition_joueurs, autre.repartition_joueurs),
+        ]:
+            for cle, places in autre_repartition.items():
+                repartition[cle] = [a + b for a, b in zip(repartition.get(cle, [0] * self.nb_joueurs), places)]
+        # Les lots contiennent des donnes entières
+        self.donnes.update(autre.donnes)
+        self.ajouter_mesures(autre.mesures)
+
+    def ajouter_mesures(self, mesures: Mesures | None):
+        if mesures is None:
+            return
+        if self.mesures is None:
+            self.mesures = Mesures()
+        self.mesures.fusionner(mesures)
+
+    def ajouter_tampon(self, debut, fin):
+        """
+        Ajoute les parties [debut, fin) du tampon et leurs répartitions, agrégées avec NumPy
+        """
+        par_siege, par_role, par_joueur = self.tampon.repartitions(debut, fin)
+        self.nb_parties += fin - debut
+        # Chaque partie jouée donne une place au siège 0
+        self.nb_parties_jouees += int(par_siege[0].sum())
+        for siege, places in enumerate(par_siege.tolist()):
+            self.repartition_sieges[siege] = [a + b for a, b in zip(self.repartition_sieges[siege], places)]
+        for repartition, noms, lignes in [
+            (self.repartition_roles, self.tampon.noms_roles, par_role.tolist()),
+            (self.repartition_joueurs, self.tampon.noms_joueurs, par_joueur.tolist()),
+        ]:
+            for cle, places in zip(noms, lignes):
+                if any(places):
+                    repartition[cle] = [a + b for a, b in zip(repartition.get(cle, [0] * self.nb_joueurs), places)]
+
+    def timeouts_joueurs(self) -> dict[str, int]:
+        """
+        Nombre de timeouts de chaque joueur qui en a eu (memoire_partagee, ou mesurer)
+        """
+        if self.tampon is not None:
+            return self.tampon.timeouts_joueurs(0, self.nb_parties)
+        return dict(self.mesures.timeouts) if self.mesures is not None else {}
+
+    @staticmethod
+    def scores(repartition, points):
+        return [sum(nb * pt for nb, pt in zip(places, points)) for places in repartition]
+
+    def scores_sieges(self, points) -> list[int]:
+        return self.scores(self.repartition_sieges, points)
+
+    def scores_roles(self, points) -> dict[str, int]:
+        return dict(zip(self.repartition_roles, self.scores(self.repartition_roles.values(), points)))
+
+    def scores_joueurs(self, points) -> dict[str, int]:
+        return dict(zip(self.repartition_joueurs, self.scores(self.repartition_joueurs.values(), points)))
+
+    def stats_sieges(self, points) -> list[StatsEnLigne]:
+        return [StatsEnLigne.depuis_repartition(places, points) for places in self.repartition_sieges]
+
+    def stats_roles(self, points) -> dict[str, StatsEnLigne]:
+        return {
+            role: StatsEnLigne.depuis_repartition(places, points) for role, places in self.repartition_roles.items()
+        }
+
+    def stats_joueurs(self, points) -> dict[str, StatsEnLigne]:
+        return {
+            nom: StatsEnLigne.depuis_repartition(places, points) for nom, places in self.repartition_joueurs.items()
+        }
+
+    def victoires_role(self, role) -> tuple[int, int]:
+        """
+        Nombre de parties gagnées et jouées par le rôle
+        """
+        places = self.repartition_roles.get(role, [0])
+        return places[0], sum(places)
+
+    def differences_appariees(self, points, joueur_a, joueur_b) -> list[float]:
+        """
+        Pour chaque donne jouée par les deux joueurs : points moyens de joueur_a moins points moyens de joueur_b
+        (moyenne sur les sièges occupés par chacun, toutes tables de la donne confondues)
+        """
+        if self.tampon is not None:
+            return self.tampon.differences_appariees(points, joueur_a, joueur_b, self.nb_parties).tolist()
+        differences = []
+        for indice_donne in sorted(self.donnes):
+            repartition_donne = self.donnes[indice_donne]
+            if joueur_a not in repartition_donne or joueur_b not in repartition_donne:
+                continue
+            moyennes = [
+                sum(nb * pt for nb, pt in zip(places, points)) / sum(places)
+                for places in (repartition_donne[joueur_a], repartition_donne[joueur_b])
+            ]
+            differences.append(moyennes[0] - moyennes[1])
+        return differences
+
+    def stats_differences(self, points, joueur_a, joueur_b) -> StatsEnLigne:
+        if self.tampon is not None:
+            return self.tampon.stats_differences(points, joueur_a, joueur_b, self.nb_parties)
+        stats = StatsEnLigne()
+        for difference in self.differences_appariees(points, joueur_a, joueur_b):
+            stats.ajouter(difference)
+        return stats
+
+    def comparaison(self, points, joueur_a, joueur_b) -> dict:
+        """
+        Écart moyen de points par partie entre joueur_a et joueur_b sur les donnes, avec son erreur type.
+        z = ecart / erreur_type : au-delà de 2, l'écart est significatif à environ 95 %
+        """
+        stats = self.stats_differences(points, joueur_a, joueur_b)
+        erreur_type = stats.erreur_type
+        return {
+            "nb_donnes": stats.n,
+            "ecart": stats.moyenne,
+            "erreur_type": erreur_type,
+            "z": stats.moyenne / erreur_type if erreur_type else math.copysign(math.inf, stats.moyenne),
+        }
+
+    @property
+    def parties_par_seconde(self) -> float:
+        return self.nb_parties / self.duree if self.duree else 0.
+
+
+class Tournoi:
+    """
+    :param tables: liste des tables, la partie i se joue sur la table i % len(tables)
+    :param nb_parties: nombre total de parties (nombre maximal avec un critère d'arrêt)
+    :param seed: graine du tournoi (tirée au hasard si None)
+    :param nb_workers: nombre de processus (1 : tout est joué dans le processus courant)
+    :param taille_lot: nombre de parties par lot, c'est aussi la granularité des graines
+    :param moteur: "partie" pour Partie, "batch" pour le moteur vectorisé (mêmes résultats)
+    :param dossier_resultats: si fourni, le résumé de chaque partie y est écrit (un fichier par worker)
+    :param duplique: chaque donne est jouée sur toutes les tables (parties i à i + len(tables) - 1, pour i multiple
+    de len(tables)), et la répartition des places est gardée par donne. nb_parties doit être un multiple de
+    len(tables), et les lots sont arrondis à un nombre entier de donnes
+    :param nb_paquets: nombre de paquets mélangés ensemble (grandes tables)
+    :param mesurer: mesure les temps de réponse des joueurs et du moteur (voir mesures.py), additionnés dans
+    ResultatsTournoi.mesures. Seulement avec le moteur "partie"
+    :param memoire_partagee: les workers écrivent chaque partie dans un tampon en mémoire partagée (voir tampon.py)
+    au lieu de renvoyer leurs répartitions. Le tampon est gardé dans ResultatsTournoi.tampon. Sans NumPy, le
+    tournoi revient aux répartitions renvoyées par lot
+    """
+    def __init__(
+        self,
+        tables: list[Table],
+        nb_parties,
+        seed=None,
+        nb_workers=1,
+        taille_lot=64,
+        moteur="partie",
+        nb_rangs_cartes=13,
+        dossier_resultats=None,
+        duplique=False,
+        mesurer=False,
+        nb_paquets=1,
+        memoire_partagee=False,
+    ):
+        if moteur not in ("partie", "batch"):
+            raise ValueError(f"Moteur inconnu : {moteur}")
+        if mesurer and moteur != "partie":
+            raise ValueError("Les mesures de temps ne sont disponibles qu'avec le moteur partie")
+        if duplique and nb_parties % len(tables):
+            raise ValueError(f"En mode dupliqué, nb_parties doit être un multiple du nombre de tables ({len(tables)})")
+        self.tables = tables
+        self.nb_parties = nb_parties
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+            logger.info(f"Graine du tournoi : {seed}")
+        self.seed = seed
+        self.nb_workers = nb_workers
+        if duplique:
+            taille_lot = -(-taille_lot // len(tables)) * len(tables)
+        self.taille_lot = taille_lot
+        self.duplique = duplique
+        self.mesurer = mesurer
+        self.moteur = moteur
+        self.nb_rangs_cartes = nb_rangs_cartes
+        self.nb_paquets = nb_paquets
+        self.memoire_partagee = memoire_partagee
+        self.dossier_resultats = dossier_resultats
+        if dossier_resultats is not None:
+            Path(dossier_resultats).mkdir(parents=True, exist_ok=True)
+        self.nb_joueurs = len(tables[0][0])
+
+    def lots(self, descripteur_tampon=None):
+        for debut in range(0, self.nb_parties, self.taille_lot):
+            yield (
+                self.tables,
+                debut,
+                min(debut + self.taille_lot, self.nb_parties),
+                self.seed,
+                self.moteur,
+                self.nb_rangs_cartes,
+                self.nb_paquets,
+                self.dossier_resultats,
+                self.duplique,
+                self.mesurer,
+                descripteur_tampon,
+            )
+
+    def creer_tampon(self):
+        # Import local : numpy n'est chargé qu'avec memoire_partagee
+        try:
+            from president_game.tampon import TamponResultats
+        except ImportError:
+            logger.warning("NumPy n'est pas installé : tournoi sans mémoire partagée")
+            return None
+
+        fabriques = {fabrique for fabriques, _ in self.tables for fabrique in fabriques}
+        noms_joueurs = sorted({nom_joueur(fabrique()) for fabrique in fabriques})
+        noms_roles = sorted({role for _, roles in self.tables for role in roles})
+        return TamponResultats(self.nb_parties, self.nb_joueurs, noms_joueurs, noms_roles)
+
+    def lancer(self, critere_arret=None) -> ResultatsTournoi:
+        """
+        :param critere_arret: appelé avec les résultats cumulés après chaque lot (voir statistiques.py).
+        Le tournoi s'arrête dès qu'il renvoie True. Les lots sont additionnés dans l'ordre : le tournoi s'arrête
+        au même lot quel que soit le nombre de workers
+        """
+        debut = time.perf_counter()
+        resultats = ResultatsTournoi(self.nb_joueurs)
+        tampon = resultats.tampon = self.creer_tampon() if self.memoire_partagee else None
+        lots = self.lots(tampon.descripteur() if tampon is not None else None)
+
+        def ajouter_lot(resultat_lot) -> bool:
+            if tampon is None:
+                resultats.fusionner(resultat_lot)
+            else:
+                # Les lots arrivent dans l'ordre : celui-ci suit les parties déjà additionnées
+                fin_lot = min(resultats.nb_parties + self.taille_lot, self.nb_parties)
+                resultats.ajouter_tampon(resultats.nb_parties, fin_lot)
+                resultats.ajouter_mesures(resultat_lot)
+            return critere_arret is not None and critere_arret(resultats)
+
+        try:
+            if self.nb_workers == 1:
+                for resultat_lot in map(jouer_lot, lots):
+                    if ajouter_lot(resultat_lot):
+                        break
+            else:
+                with ProcessPoolExecutor(max_workers=self.nb_workers) as executor:
+                    # Quelques lots d'avance par worker, pour ne pas jouer trop de parties après l'arrêt
+                    en_cours = deque()
+                    for lot in islice(lots, 2 * self.nb_workers):
+                        en_cours.append(executor.submit(jouer_lot, lot))
+                    while en_cours:
+                        if ajouter_lot(en_cours.popleft().result()):
+                            for future in en_cours:
+                                future.cancel()
+                            break
+                        for lot in islice(lots, 1):
+                            en_cours.append(executor.submit(jouer_lot, lot))
+        finally:
+            # Les workers ont fini d'écrire : le segment partagé peut être supprimé
+            if tampon is not None:
+                tampon.detacher()
+        resultats.duree = time.perf_counter() - debut
+        if critere_arret is not None and resultats.nb_parties < self.nb_parties:
+            logger.info(f"Arrêt après {resultats.nb_parties} parties : {critere_arret}")
+        logger.info(
+            f"{resultats.nb_parties} parties ({resultats.nb_parties_jouees} jouées jusqu'au bout) "
+            f"en {resultats.duree:.1f}s sur {self.nb_workers} worker(s) : "
+            f"{resultats.parties_par_seconde:.0f} parties/s"
+        )
+        return resultats
+
+
+def generateur_lot(seed, debut) -> random.Random:
+    # Le numéro du lot est identifié par l'indice de sa première partie
+    return random.Random(f"{seed}-{debut}")
+
+
+def jouer_lot(lot) -> ResultatsTournoi | Mesures | None:
+    """
+    Joue les parties [debut, fin) du tournoi. Fonction de module pour pouvoir être envoyée aux workers
+
+    :return: les résultats du lot. Avec un tampon, les parties y sont déjà écrites : seules les mesures (None si
+    on ne mesure pas) sont renvoyées
+    """
+    (
+        tables, debut, fin, seed, moteur, nb_rangs_cartes, nb_paquets, dossier_resultats, duplique, mesurer,
+        descripteur_tampon,
+    ) = lot
+    rng = generateur_lot(seed, debut)
+    all_cards = paquet_modele(nb_rangs_cartes, NB_COULEURS * nb_paquets)
+    resultats = ResultatsTournoi(len(tables[0][0]))
+    resultats.nb_parties = fin - debut
+
+    # Tirage des paquets dans l'ordre des parties, indépendamment du moteur.
+    # En mode dupliqué, un seul paquet par donne, joué sur toutes les tables
+    parties_par_table = {}
+    donnes_par_table = {}
+    indices_par_table = {}
+    for indice_partie in range(debut, fin):
+        indice_table = indice_partie % len(tables)
+        if not duplique or indice_table == 0:
+            cards_shuffled = list(all_cards)
+            rng.shuffle(cards_shuffled)
+        parties_par_table.setdefault(indice_table, []).append(cards_shuffled)
+        donnes_par_table.setdefault(indice_table, []).append(indice_partie // len(tables) if duplique else None)
+        indices_par_table.setdefault(indice_table, []).append(indice_partie)
+
+    tampon = None
+    if descripteur_tampon is not None:
+        from president_game.tampon import TamponResultats
+
+        tampon = TamponResultats.ouvrir(descripteur_tampon)
+
+    # Les threads des joueurs sont partagés par toutes les parties du lot
+    result_sink = SinkColonnes(dossier_resultats) if dossier_resultats is not None else None
+    try:
+        with ExecutionJoueurs() as execution_joueurs:
+            for indice_table, paquets in parties_par_table.items():
+                fabriques, role_players = tables[indice_table]
+                players = [fabrique() for fabrique in fabriques]
+                noms = [nom_joueur(player) for player in players]
+                donnes = donnes_par_table[indice_table]
+                if moteur == "batch":
+                    from president_game.batch import BatchPartie
+
+                    resultats_lot = BatchPartie(
+                        paquets, players, role_players, nb_rangs_cartes, nb_paquets,
+                        execution_joueurs=execution_joueurs,
+                    ).play_all_games()
+                    if tampon is not None:
+                        tampon.ecrire_lot(
+                            indices_par_table[indice_table], indice_table, noms, role_players,
+                            resultats_lot.classement, resultats_lot.valide, resultats_lot.nb_tours,
+                            donnes if duplique else None, resultats_lot.timeouts,
+                        )
+                        if result_sink is None:
+                            continue
+                    for classement, valide, nb_tours, donne in zip(
+                        resultats_lot.classement, resultats_lot.valide, resultats_lot.nb_tours, donnes
+                    ):
+                        if valide:
+                            if tampon is None:
+                                resultats.ajouter_partie([int(el) for el in classement], players, role_players, donne)
+                            if result_sink is not None:
+                                result_sink.ajouter_resultat(noms, role_players, classement, nb_tours)
+                    continue
+                # Une seule Partie par table, remise à zéro à chaque donne
+                p = None
+                for indice_partie, cards_shuffled, donne in zip(indices_par_table[indice_table], paquets, donnes):
+                    if p is None:
+                        p = Partie(
+                            nb_joueurs=len(players),
+                            nb_rangs_cartes=nb_rangs_cartes,
+                            nb_paquets=nb_paquets,
+                            players=players,
+                            role_players=role_players,
+                            cards_shuffled=cards_shuffled,
+                            save_events=False,
+                            execution_joueurs=execution_joueurs,
+                            result_sink=result_sink,
+                            mesurer=mesurer,
+                        )
+                    else:
+                        p.reset(cards_shuffled=cards_shuffled)
+                    p.play_whole_game_from_cards()
+                    if tampon is not None:
+                        tampon.ecrire(
+                            indice_partie, indice_table, noms, role_players, p.classement, p.nb_tours,
+                            p.timeouts_sieges, donne,
+                        )
+                    else:
+                        resultats.ajouter_partie(p.classement, players, role_players, donne)
+                    resultats.ajouter_mesures(p.mesures)
+    finally:
+        if result_sink is not None:
+            result_sink.fermer()
+        if tampon is not None:
+            tampon.fermer()
+    # Avec le tampon, seules les mesures repassent par pickle
+    return resultats if tampon is None else resultats.mesures
@@ -29,7 +29,8 @@ def convert_sorted_hand_to_dict(main_list):
 def show_super_pretty_hand(main):
     if not main:
         return ""
-    return ".".join("".join(group) for _, group in groupby([DIC_REAL_GAME[el] for el in main]))
+    # Une carte inconnue (par exemple jouée par un tricheur) est affichée telle quelle
+    return ".".join("".join(group) for _, group in groupby([DIC_REAL_GAME.get(el, str(el)) for el in main]))
 
 def pretty_actions_jouees(actions_jouees):
     if not actions_jouees:
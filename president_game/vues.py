@@ -0,0 +1,96 @@
+"""
+Vues en lecture seule passées aux joueurs à la place de copies des listes du moteur
+
+Une vue se comporte comme une liste (len, indexation, itération, in, ==, count, index, +)
+mais ne peut pas être modifiée. Elle partage les listes du moteur, qui ne sont jamais modifiées
+une fois partagées (seulement remplacées ou prolongées) : une vue garde donc toujours le même contenu.
+"""
+from collections.abc import Sequence
+from itertools import islice
+
+
+class VueCartes(Sequence):
+    """
+    Vue des longueur premiers éléments d'une liste. Les éléments qui sont eux-mêmes des listes
+    (les poses du plateau) sont renvoyés sous forme de vues.
+    """
+    __slots__ = ("_cartes", "_longueur")
+
+    def __init__(self, cartes, longueur=None):
+        self._cartes = cartes
+        self._longueur = len(cartes) if longueur is None else longueur
+
+    def _liste(self) -> list:
+        return self._cartes
+
+    @staticmethod
+    def _element(element):
+        return VueCartes(element) if isinstance(element, list) else element
+
+    def __len__(self):
+        return self._longueur
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._element(el) for el in self._liste()[:self._longueur][index]]
+        if index < 0:
+            index += self._longueur
+        if not 0 <= index < self._longueur:
+            raise IndexError("index hors de la vue")
+        return self._element(self._liste()[index])
+
+    def __iter__(self):
+        return (self._element(el) for el in islice(self._liste(), self._longueur))
+
+    def __contains__(self, valeur):
+        return valeur in islice(self._liste(), self._longueur)
+
+    def __eq__(self, autre):
+        if not isinstance(autre, (list, tuple, VueCartes)):
+            return NotImplemented
+        return len(self) == len(autre) and all(a == b for a, b in zip(self, autre))
+
+    __hash__ = None
+
+    def __add__(self, autre):
+        return list(self) + list(autre)
+
+    def __radd__(self, autre):
+        return list(autre) + list(self)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class VueMain(VueCartes):
+    """
+    Main du joueur. En vue riche, counts[rang] donne le nombre de cartes de chaque rang
+    """
+    __slots__ = ("counts",)
+
+    def __init__(self, cartes, counts=None):
+        super().__init__(cartes)
+        self.counts = counts
+
+
+class VueCartesDejaJouees(VueCartes):
+    """
+    Cartes déjà jouées, triées seulement si le joueur les lit
+
+    :param journal: cartes posées dans l'ordre du jeu (liste qui ne fait que s'allonger)
+    :param restantes: en vue riche, nombre de cartes de chaque rang pas encore posées
+    """
+    __slots__ = ("_triees", "restantes")
+
+    def __init__(self, journal, longueur=None, restantes=None):
+        super().__init__(journal, longueur)
+        self._triees = None
+        self.restantes = restantes
+
+    def _liste(self) -> list:
+        if self._triees is None:
+            self._triees = sorted(islice(self._cartes, self._longueur))
+        return self._triees
+
+    def __contains__(self, valeur):
+        return valeur in islice(self._cartes, self._longueur)
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from president_game.archive import (
+    ACTION_RIEN,
+    ACTION_TRICHE,
+    ArchiveParties,
+    EnregistrementPartie,
+    LecteurArchive,
+    actions_vides,
+)
+from president_game.coups import NB_COULEURS
+from president_game.partie import Partie, paquet_modele
+from president_game.player import AggressivePlayer, DumbPlayer
+
+
+def jouer(nb_joueurs, nb_paquets, seed, role_players):
+    rng = random.Random(seed)
+    cards_shuffled = list(paquet_modele(13, NB_COULEURS * nb_paquets))
+    rng.shuffle(cards_shuffled)
+    p = Partie(
+        nb_joueurs=nb_joueurs,
+        nb_paquets=nb_paquets,
+        players=[rng.choice([DumbPlayer, AggressivePlayer])() for _ in range(nb_joueurs)],
+        role_players=role_players,
+        cards_shuffled=cards_shuffled,
+        save_events=False,
+        enregistrer_actions=True,
+    )
+    p.play_whole_game_from_cards()
+    return p
+
+
+@pytest.mark.parametrize("nb_joueurs, nb_paquets", [(4, 1), (5, 1), (8, 2), (6, 5)])
+def test_aller_retour_et_rejeu(tmp_path, nb_joueurs, nb_paquets):
+    roles = ["Prez", "Vice-Prez"] + ["Neutre"] * (nb_joueurs - 4) + ["Vice-Trou", "Trou"]
+    parties = [jouer(nb_joueurs, nb_paquets, seed, roles) for seed in range(10)]
+    with ArchiveParties(tmp_path / "archive") as archive:
+        for p in parties:
+            archive.ajouter(p.record())
+    with LecteurArchive(tmp_path / "archive") as lecteur:
+        assert len(lecteur) == len(parties)
+        for p, record in zip(parties, lecteur):
+            assert list(record.cards_shuffled) == list(p.cards_shuffled)
+            assert list(record.actions) == list(p.actions)
+            assert record.classement == p.classement
+            assert Partie.replay(record).classement == p.classement
+
+
+def test_grandes_poses_et_triche():
+    # 15 et 20 cartes d'un même rang : possible à partir de 4 paquets
+    actions = actions_vides()
+    actions.extend([ACTION_RIEN, (15 << 4) | 0, ACTION_TRICHE, (20 << 4) | 12, (3 << 4) | 5])
+    record = EnregistrementPartie(4, 13, list(range(13)) * 20, ["Neutre"] * 4, [], actions)
+    decode = EnregistrementPartie.from_bytes(record.to_bytes())
+    assert list(decode.actions) == list(actions)
+    assert decode.cards_shuffled == record.cards_shuffled
+
+
+def test_pose_trop_grande_refusee():
+    actions = actions_vides()
+    actions.append((256 << 4) | 0)
+    with pytest.raises(ValueError):
+        EnregistrementPartie(4, 13, [0] * 4, ["Neutre"] * 4, [], actions).to_bytes()
+
+
+def test_table_trop_grande_refusee(tmp_path):
+    record = EnregistrementPartie(17, 13, [0] * 17, ["Neutre"] * 17, [], actions_vides(), list(range(17)))
+    with ArchiveParties(tmp_path / "archive") as archive:
+        with pytest.raises(ValueError):
+            archive.ajouter(record)
+    with LecteurArchive(tmp_path / "archive") as lecteur:
+        assert len(lecteur) == 0
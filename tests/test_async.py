@@ -0,0 +1,42 @@
+import asyncio
+import random
+
+import pytest
+
+from president_game.execution import ExecutionJoueursAsync
+from president_game.partie import Partie, paquet_modele
+from president_game.player import AggressivePlayer, DumbPlayer
+
+
+class DumbAsync(DumbPlayer):
+    async def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        await asyncio.sleep(0)
+        return DumbPlayer.que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux)
+
+
+def partie(players, seed):
+    cards_shuffled = list(paquet_modele(13))
+    random.Random(seed).shuffle(cards_shuffled)
+    return Partie(
+        nb_joueurs=len(players), players=players, role_players=["Neutre"] * len(players),
+        cards_shuffled=cards_shuffled, save_events=False,
+    )
+
+
+def test_async_comme_sync():
+    async def jouer_toutes(parties):
+        with ExecutionJoueursAsync() as execution:
+            await asyncio.gather(*(p.play_whole_game_async(execution) for p in parties))
+
+    parties_async = [partie([DumbAsync(), AggressivePlayer(), DumbPlayer(), AggressivePlayer()], s) for s in range(10)]
+    asyncio.run(jouer_toutes(parties_async))
+    for seed, p_async in enumerate(parties_async):
+        p = partie([DumbPlayer(), AggressivePlayer(), DumbPlayer(), AggressivePlayer()], seed)
+        p.play_whole_game_from_cards()
+        assert p_async.classement == p.classement and p_async.nb_tours == p.nb_tours
+
+
+def test_joueur_async_refuse_en_synchrone():
+    p = partie([DumbAsync(), DumbPlayer(), DumbPlayer(), DumbPlayer()], 0)
+    with pytest.raises(TypeError, match="play_whole_game_async"):
+        p.play_whole_game_from_cards()
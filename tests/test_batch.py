@@ -0,0 +1,86 @@
+import logging
+import time
+
+import pytest
+
+from president_game.batch import BatchPartie, melanger_lot
+from president_game.partie import Partie
+from president_game.player import AggressivePlayer, CheatPlayer, DumbPlayer
+
+NB_PARTIES = 100
+
+
+class JoueurPerso(AggressivePlayer):
+    # Joueur non vectorisé : appelé partie par partie par le moteur batch
+    def get_name(self):
+        return "Perso"
+
+    def give_cards_prez_to_trou(self, main):
+        return main[-2:]
+
+
+class JoueurLent(DumbPlayer):
+    trusted = False
+
+    def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        time.sleep(0.2)
+        return super().que_jouer(main, cartes_plateau, risque_saut, historique_jeux)
+
+
+TABLES = {
+    "dumb_4": ([DumbPlayer] * 4, None, 1),
+    "mixte_5": (
+        [AggressivePlayer, DumbPlayer, AggressivePlayer, DumbPlayer, AggressivePlayer],
+        ["Trou", "Prez", "Vice-Trou", "Vice-Prez", "Neutre"],
+        1,
+    ),
+    "perso_5": (
+        [JoueurPerso, DumbPlayer, CheatPlayer, DumbPlayer, AggressivePlayer],
+        ["Vice-Prez", "Prez", "Vice-Trou", "Trou", "Neutre"],
+        1,
+    ),
+    "deux_paquets_8": (
+        [DumbPlayer, AggressivePlayer] * 4,
+        ["Trou", "Prez", "Vice-Trou", "Vice-Prez"] + ["Neutre"] * 4,
+        2,
+    ),
+}
+
+
+@pytest.fixture(autouse=True)
+def sans_logs():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.mark.parametrize("nom_table", TABLES)
+def test_batch_identique_a_partie(nom_table):
+    fabriques, roles, nb_paquets = TABLES[nom_table]
+    players = [fabrique() for fabrique in fabriques]
+    paquets = melanger_lot(NB_PARTIES, rng=42, nb_paquets=nb_paquets)
+    resultats = BatchPartie(paquets, players, roles, nb_paquets=nb_paquets).play_all_games()
+    assert resultats.valide.any()
+    for indice in range(NB_PARTIES):
+        if not resultats.valide[indice]:
+            continue
+        p = Partie(
+            nb_joueurs=len(players),
+            nb_paquets=nb_paquets,
+            players=players,
+            role_players=roles,
+            cards_shuffled=[int(carte) for carte in paquets[indice]],
+            save_events=False,
+        )
+        p.play_whole_game_from_cards()
+        assert [int(siege) for siege in resultats.classement[indice]] == p.classement
+        assert int(resultats.nb_tours[indice]) == p.nb_tours
+
+
+def test_timeout_joueur_python():
+    players = [JoueurLent(), DumbPlayer(), DumbPlayer(), DumbPlayer()]
+    paquets = melanger_lot(2, rng=1)
+    resultats = BatchPartie(paquets, players, timeout_players=0.05).play_all_games()
+    assert resultats.valide.all()
+    assert resultats.timeouts[:, 0].min() > 0
+    assert not resultats.timeouts[:, 1:].any()
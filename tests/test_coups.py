@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from president_game.coups import compter_main, legal_moves, table_coups
+
+
+def coups_attendus(counts, top, risque_saut, revolution):
+    # Les règles écrites directement, coup par coup
+    coups = []
+    for rang, nb_en_main in enumerate(counts):
+        for nb in range(1, nb_en_main + 1):
+            if top:
+                if risque_saut and (rang, nb) != (top[0], len(top)):
+                    continue
+                if (rang > top[0]) if revolution else (rang < top[0]):
+                    continue
+            coups.append((rang, nb))
+    return coups
+
+
+@pytest.mark.parametrize("nb_exemplaires", [4, 8])
+def test_legal_moves_comme_les_regles(nb_exemplaires):
+    rng = random.Random(0)
+    paquet = list(range(13)) * nb_exemplaires
+    for _ in range(500):
+        counts = compter_main(rng.sample(paquet, 13))
+        top = [rng.randrange(13)] * rng.randint(1, nb_exemplaires) if rng.random() < 0.8 else None
+        risque_saut = rng.random() < 0.3
+        revolution = rng.random() < 0.3
+        assert legal_moves(counts, top, risque_saut, nb_exemplaires, revolution) == coups_attendus(
+            counts, top, risque_saut, revolution
+        )
+
+
+def test_masque_tenu_a_jour():
+    table = table_coups(13, 4)
+    counts = [0] * 13
+    masque = table.masque_main(counts)
+    rng = random.Random(1)
+    for _ in range(200):
+        rang = rng.randrange(13)
+        counts[rang] = rng.randint(0, 4)
+        masque = table.mettre_a_jour(masque, rang, counts[rang])
+        assert masque == table.masque_main(counts)
+
+
+def test_est_legal_hors_limites():
+    table = table_coups(13, 4)
+    masque = table.masque_main([4] * 13)
+    assert not table.est_legal(masque, 13, 1, None, 0, False)
+    assert not table.est_legal(masque, 0, 5, None, 0, False)
+    assert table.est_legal(masque, 12, 4, 3, 1, False)
+    assert not table.est_legal(masque, 2, 1, 3, 1, False)
+    assert table.est_legal(masque, 2, 1, 3, 1, False, revolution=True)
@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+from president_game.etat import GameState
+from president_game.partie import Partie
+from president_game.player import DumbPlayer
+from president_game.vues import VueCartes, VueCartesDejaJouees, VueMain
+
+
+def test_mains_par_rang():
+    etat = GameState.from_hands([[0, 0, 5, 12], [1, 2, 2]])
+    assert etat.mains[0][0] == 2 and etat.tailles == [4, 3]
+    assert etat.main_liste(0) == [0, 0, 5, 12]
+    assert etat.possede(1, 2, 2) and not etat.possede(1, 2, 3) and not etat.possede(1, 13)
+    assert etat.plus_fortes(0, 2) == [5, 12]
+
+
+def test_jouer_annuler_donner():
+    etat = GameState.from_hands([[0, 0, 5, 12], [1, 2, 2]])
+    masques = etat.masques[:]
+    etat.jouer(0, 0, 2)
+    assert etat.main_liste(0) == [5, 12] and etat.cartes_deja_jouees[0] == 2 and etat.journal == [0, 0]
+    assert etat.cartes_restantes()[0] == 2
+    etat.annuler(0, 0, 2)
+    assert etat.main_liste(0) == [0, 0, 5, 12] and etat.journal == [] and etat.masques == masques
+    etat.donner(0, 1, 12)
+    assert etat.main_liste(1) == [1, 2, 2, 12] and etat.tailles == [3, 4]
+    assert etat.masques[1] == etat.table.masque_main(etat.mains[1])
+
+
+def test_triche():
+    etat = GameState.from_hands([[3, 3, 7], [1, 2]])
+    assert not etat.est_triche(0, [3, 3], None, False)
+    # Rangs mélangés, carte absente, en dessous du centre, ou pas identique en cas de saut
+    assert etat.est_triche(0, [3, 7], None, False)
+    assert etat.est_triche(0, [4], None, False)
+    assert etat.est_triche(0, [3], [5], False)
+    assert etat.est_triche(0, [7], [5], True)
+    assert not etat.est_triche(0, [3], [5], False, revolution=True)
+
+
+def test_clone_et_reinitialiser():
+    etat = GameState.from_hands([[0, 1], [2, 3]])
+    liste = etat.main_liste(0)
+    copie = etat.clone()
+    copie.jouer(0, 0, 1)
+    assert etat.main_liste(0) == [0, 1] and copie.main_liste(0) == [1]
+    journal = etat.journal
+    etat.jouer(1, 2, 1)
+    etat.reinitialiser([[4, 4], [5]])
+    assert etat.main_liste(0) == [4, 4] and etat.tailles == [2, 1] and etat.cartes_deja_jouees[2] == 0
+    # Les listes déjà données ne changent pas
+    assert liste == [0, 1] and journal == [2]
+
+
+def test_vues_en_lecture_seule():
+    journal = [5, 1, 3]
+    vue = VueCartesDejaJouees(journal, restantes=(4,) * 13)
+    journal.append(0)
+    # La vue garde sa longueur et se lit triée
+    assert list(vue) == [1, 3, 5] and len(vue) == 3 and 0 not in vue and vue.restantes[0] == 4
+    plateau = VueCartes([[2, 2], [4, 4]])
+    assert isinstance(plateau[-1], VueCartes) and plateau[-1] == [4, 4]
+    main = VueMain([1, 2, 2], (0, 1, 2))
+    assert main + [3] == [1, 2, 2, 3] and main.counts[2] == 2 and main.count(2) == 2
+    with pytest.raises((TypeError, AttributeError)):
+        main[0] = 7
+    with pytest.raises(AttributeError):
+        main.append(3)
+
+
+class JoueurQuiModifie(DumbPlayer):
+    def __init__(self):
+        super().__init__()
+        self.refus = 0
+
+    def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        for liste in (main, cartes_plateau, historique_jeux):
+            try:
+                liste.clear()
+            except AttributeError:
+                self.refus += 1
+        return super().que_jouer(main, cartes_plateau, risque_saut, historique_jeux)
+
+
+def test_joueur_ne_peut_pas_modifier_le_moteur():
+    cards_shuffled = list(range(13)) * 4
+    random.Random(0).shuffle(cards_shuffled)
+    parties = [
+        Partie(nb_joueurs=4, players=[joueur, DumbPlayer(), DumbPlayer(), DumbPlayer()],
+               cards_shuffled=cards_shuffled, save_events=False)
+        for joueur in (JoueurQuiModifie(), DumbPlayer())
+    ]
+    for p in parties:
+        p.play_whole_game_from_cards()
+    assert parties[0].players[0].refus > 0
+    # Les tentatives n'ont rien changé à la partie
+    assert parties[0].classement == parties[1].classement and parties[0].nb_tours == parties[1].nb_tours
@@ -0,0 +1,84 @@
+import concurrent.futures
+import time
+
+import pytest
+
+from president_game.execution import ExecutionJoueurs
+from president_game.partie import Partie
+from president_game.player import DumbPlayer
+
+
+class JoueurNonFiable(DumbPlayer):
+    # Appelé dans son thread, avec un timeout
+    trusted = False
+
+
+class JoueurLentUneFois(JoueurNonFiable):
+    """
+    Bloqué une seconde à son premier coup, puis joue normalement
+    """
+    def __init__(self):
+        super().__init__()
+        self.nb_appels = 0
+
+    def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        self.nb_appels += 1
+        if self.nb_appels == 1:
+            time.sleep(1)
+        return super().que_jouer(main, cartes_plateau, risque_saut, historique_jeux)
+
+
+class DumbLent(DumbPlayer):
+    # Hérite de DumbPlayer sans se déclarer de confiance
+    def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        time.sleep(0.2)
+        return super().que_jouer(main, cartes_plateau, risque_saut, historique_jeux)
+
+
+def test_confiance_non_heritee():
+    assert DumbPlayer.trusted and not DumbLent.trusted
+    player = DumbLent()
+    player.donner_main([0, 1, 2])
+    with ExecutionJoueurs() as execution:
+        with pytest.raises(concurrent.futures.TimeoutError):
+            execution.appeler(player, "que_jouer", 0.05, [0, 1, 2], [], False, [])
+
+
+def test_timeout_libere_le_thread():
+    player = JoueurLentUneFois()
+    player.donner_main([0, 1, 2])
+    with ExecutionJoueurs() as execution:
+        with pytest.raises(concurrent.futures.TimeoutError):
+            execution.appeler(player, "que_jouer", 0.1, [0, 1, 2], [], False, [])
+        # Le coup suivant ne fait pas la queue derrière l'appel bloqué
+        debut = time.perf_counter()
+        execution.appeler(player, "que_jouer", 0.5, [0, 1, 2], [], False, [])
+        assert time.perf_counter() - debut < 0.5
+
+
+def test_un_seul_timeout_par_appel_bloque():
+    p = Partie(
+        nb_joueurs=4,
+        players=[JoueurLentUneFois(), DumbPlayer(), DumbPlayer(), DumbPlayer()],
+        role_players=["Neutre"] * 4,
+        save_events=False,
+        timeout_players=0.1,
+    )
+    p.play_whole_game_from_cards()
+    assert p.timeouts_sieges == [1, 0, 0, 0]
+
+
+def test_partie_ferme_ses_threads():
+    p = Partie(nb_joueurs=4, players=[JoueurNonFiable() for _ in range(4)], save_events=False)
+    p.play_whole_game_from_cards()
+    assert p.execution_joueurs.executors == {}
+
+
+def test_partie_ne_ferme_pas_les_threads_partages():
+    with ExecutionJoueurs() as execution:
+        p = Partie(
+            nb_joueurs=4, players=[JoueurNonFiable() for _ in range(4)], save_events=False,
+            execution_joueurs=execution,
+        )
+        p.play_whole_game_from_cards()
+        assert len(execution.executors) == 4
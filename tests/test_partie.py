@@ -0,0 +1,141 @@
+import logging
+import random
+import time
+
+import pytest
+
+from president_game import evenements
+from president_game.partie import Partie, paquet_modele
+from president_game.player import AggressivePlayer, CheatPlayer, DumbPlayer
+from president_game.resultats import ResultSink, SinkColonnes, lire_colonnes
+
+NEUTRES = ["Neutre"] * 4
+
+
+@pytest.fixture(autouse=True)
+def sans_logs():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def donne(seed):
+    cards_shuffled = list(paquet_modele(13))
+    random.Random(seed).shuffle(cards_shuffled)
+    return cards_shuffled
+
+
+class SinkMemoire(ResultSink):
+    # Garde les événements de chaque partie
+    besoin_evenements = True
+
+    def __init__(self):
+        self.parties = []
+
+    def ajouter(self, partie):
+        self.parties.append((list(partie.evenements), partie.evenements.rendre(partie.indexed_name_players)))
+
+
+def test_evenements_sans_save_events(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sink = SinkMemoire()
+    p = Partie(
+        nb_joueurs=4, players=[DumbPlayer(), AggressivePlayer(), CheatPlayer(), DumbPlayer()],
+        cards_shuffled=donne(0), save_events=False, result_sink=sink,
+    )
+    p.play_whole_game_from_cards()
+    (evenements_partie, lignes), = sink.parties
+    # Le texte n'est construit qu'à la demande
+    assert lignes[0].startswith("0_DumbP joue")
+    poses = [0] * 4
+    for _, joueur, action, _, nb_cartes in evenements_partie:
+        if action == evenements.JOUE:
+            poses[joueur] += nb_cartes
+    # Le tricheur va en dernier, les autres ont posé toutes leurs cartes
+    assert p.classement[-1] == 2
+    assert [poses[joueur] for joueur in p.classement[:-2]] == [13, 13]
+    assert any(action == evenements.TRICHE for _, _, action, _, _ in evenements_partie)
+    # Ni fichier ni pandas sans save_events
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_sink_colonnes(tmp_path):
+    with SinkColonnes(tmp_path, taille_paquet=3) as sink:
+        p = Partie(
+            nb_joueurs=4, players=[DumbPlayer() for _ in range(4)], cards_shuffled=donne(0), save_events=False,
+            result_sink=sink,
+        )
+        classements = []
+        for seed in range(7):
+            p.reset(cards_shuffled=donne(seed))
+            p.play_whole_game_from_cards()
+            classements.append(p.classement)
+    colonnes = lire_colonnes(tmp_path)
+    assert colonnes["classement"] == classements
+    assert colonnes["joueurs"][0] == ["DumbP"] * 4
+    assert all(len(actions) == 4 for actions in colonnes["actions"])
+
+
+def test_reset_comme_une_partie_neuve():
+    players = [DumbPlayer(), AggressivePlayer(), DumbPlayer(), AggressivePlayer()]
+    p = Partie(nb_joueurs=4, players=players, cards_shuffled=donne(0), save_events=False)
+    p.play_whole_game_from_cards()
+    for seed in range(1, 20):
+        p.reset(cards_shuffled=donne(seed))
+        p.play_whole_game_from_cards()
+        neuve = Partie(nb_joueurs=4, players=players, cards_shuffled=donne(seed), save_events=False)
+        neuve.play_whole_game_from_cards()
+        assert (p.classement, p.nb_tours, p.choix_echanges) == (neuve.classement, neuve.nb_tours, neuve.choix_echanges)
+
+
+class DumbRevolution(DumbPlayer):
+    def __init__(self):
+        super().__init__()
+        self.revolutions_vues = 0
+
+    def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        self.revolutions_vues += self.is_revolution
+        return super().que_jouer(main, cartes_plateau, risque_saut, historique_jeux)
+
+
+def test_revolution():
+    # Le joueur 0 commence avec les quatre 3 et les pose d'un coup
+    reste = [carte for carte in paquet_modele(13) if carte != 0]
+    random.Random(0).shuffle(reste)
+    players = [DumbRevolution() for _ in range(4)]
+    sink = SinkMemoire()
+    p = Partie(
+        nb_joueurs=4, players=players, role_players=NEUTRES, cards_shuffled=[0] * 4 + reste, save_events=False,
+        result_sink=sink,
+    )
+    p.play_whole_game_from_cards()
+    (evenements_partie, _), = sink.parties
+    assert evenements_partie[0][2:] == (evenements.JOUE, 0, 4)
+    assert any(action == evenements.REVOLUTION for _, _, action, _, _ in evenements_partie)
+    assert all(player.revolutions_vues for player in players[1:])
+    # La partie va jusqu'au bout
+    assert sorted(p.classement) == [0, 1, 2, 3]
+
+
+class JoueurLent(DumbPlayer):
+    trusted = False
+
+    def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        if not cartes_plateau:
+            time.sleep(0.1)
+        return super().que_jouer(main, cartes_plateau, risque_saut, historique_jeux)
+
+
+def test_mesures_et_trace(tmp_path):
+    p = Partie(
+        nb_joueurs=4, players=[JoueurLent(), DumbPlayer(), DumbPlayer(), DumbPlayer()], cards_shuffled=donne(0),
+        save_events=False, timeout_players=0.02, tracer=True,
+    )
+    p.play_whole_game_from_cards()
+    resume = p.mesures.resume()
+    assert sum(joueur["n"] for joueur in resume["joueurs"].values()) == p.nb_tours
+    assert resume["joueurs"]["DumbP"]["timeouts"] == sum(p.timeouts_sieges) > 0
+    assert set(resume["phases"]) == {"distribution", "echanges", "moteur"}
+    p.mesures.exporter_trace(tmp_path / "trace.json")
+    noms = {evenement["name"] for evenement in p.mesures.trace()["traceEvents"]}
+    assert {"que_jouer", "moteur", "timeout"} <= noms
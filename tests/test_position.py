@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from president_game.etat import GameState
+from president_game.position import EFFET_COUPE, EFFET_REVOLUTION, PASSER, Position
+
+
+def mains_tirees(rng, nb_joueurs=4, nb_paquets=1):
+    paquet = list(range(13)) * 4 * nb_paquets
+    rng.shuffle(paquet)
+    taille = len(paquet) // nb_joueurs
+    return [sorted(paquet[i * taille: (i + 1) * taille]) for i in range(nb_joueurs)]
+
+
+def instantane(position: Position):
+    etat = position.etat
+    return (
+        position.joueur_actuel, position.en_jeu, position.pas_fini, position.top_rang, position.top_nb,
+        position.counter_same_card, position.risque_saut, position.revolution, list(position.classement),
+        list(position.tricheurs), [main[:] for main in etat.mains], etat.masques[:], etat.cartes_deja_jouees[:],
+        etat.journal[:], etat.tailles[:],
+    )
+
+
+@pytest.mark.parametrize("nb_joueurs, nb_paquets", [(4, 1), (5, 1), (8, 2)])
+def test_undo_defait_apply(nb_joueurs, nb_paquets):
+    rng = random.Random(1)
+    for _ in range(50):
+        position = Position(GameState.from_hands(mains_tirees(rng, nb_joueurs, nb_paquets), 13, 4 * nb_paquets))
+        historique = []
+        while not position.est_terminee():
+            historique.append(instantane(position))
+            position.apply(rng.choice(position.coups_legaux()))
+        while historique:
+            position.undo()
+            assert instantane(position) == historique.pop()
+        assert position.pile == []
+
+
+def test_clone_independant():
+    rng = random.Random(2)
+    position = Position(GameState.from_hands(mains_tirees(rng)))
+    avant = instantane(position)
+    copie = position.clone()
+    copie.simuler(rng)
+    assert copie.est_terminee()
+    assert instantane(position) == avant
+
+
+def test_determiniser_garde_la_main_et_les_tailles():
+    rng = random.Random(3)
+    position = Position(GameState.from_hands(mains_tirees(rng)))
+    for _ in range(10):
+        position.apply(position.coups_legaux()[0])
+    copie = position.determiniser(position.joueur_actuel, rng)
+    joueur = position.joueur_actuel
+    assert copie.etat.mains[joueur] == position.etat.mains[joueur]
+    assert copie.etat.tailles == position.etat.tailles
+    # Toutes les cartes encore en main sont réparties entre les joueurs
+    assert [sum(cartes) for cartes in zip(*copie.etat.mains)] == [sum(cartes) for cartes in zip(*position.etat.mains)]
+
+
+def test_coupe_et_revolution():
+    # Le joueur 0 pose les quatre cartes du rang 3 d'un coup : coupe et révolution
+    mains = [[3, 3, 3, 3, 7], [0, 1, 2, 4, 6], [0, 1, 2, 4, 8], [0, 1, 2, 4, 9]]
+    position = Position(GameState.from_hands(mains))
+    effets = position.apply(position.coup(3, 4))
+    assert effets & EFFET_COUPE and effets & EFFET_REVOLUTION
+    assert position.revolution
+    assert position.joueur_actuel == 0
+    assert PASSER not in position.coups_legaux()
@@ -0,0 +1,113 @@
+import concurrent.futures
+import os
+import time
+
+import pytest
+
+from president_game.partie import Partie
+from president_game.player import DumbPlayer
+from president_game.sandbox import JoueurIsole
+
+TIMEOUT = 0.2
+
+
+class JoueurLent(DumbPlayer):
+    def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        time.sleep(2)
+        return []
+
+    def give_cards_prez_to_trou(self, main):
+        time.sleep(2)
+        return []
+
+
+class JoueurBeugue(DumbPlayer):
+    def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        raise ValueError("bug")
+
+
+class JoueurQuiCrashe(DumbPlayer):
+    def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        os._exit(1)
+
+
+def test_timeout_que_jouer():
+    with JoueurIsole(JoueurLent(), timeout=TIMEOUT) as joueur:
+        joueur.donner_main([0, 1, 2])
+        debut = time.perf_counter()
+        with pytest.raises(concurrent.futures.TimeoutError):
+            joueur.que_jouer([0, 1, 2], [], False, [])
+        assert time.perf_counter() - debut < 1
+        # Le processus est tué puis relancé au prochain appel
+        assert joueur.process is None
+        with pytest.raises(concurrent.futures.TimeoutError):
+            joueur.que_jouer([0, 1, 2], [], False, [])
+        assert joueur.nb_redemarrages == 1
+
+
+def test_timeout_echange():
+    with JoueurIsole(JoueurLent(), timeout=TIMEOUT) as joueur:
+        # On donne les deux plus faibles cartes à la place du joueur
+        assert joueur.give_cards_prez_to_trou([0, 3, 5, 12]) == [0, 3]
+
+
+def test_exception_joueur():
+    with JoueurIsole(JoueurBeugue(), timeout=1) as joueur:
+        joueur.donner_main([0, 1, 2])
+        with pytest.raises(RuntimeError, match="exception"):
+            joueur.que_jouer([0, 1, 2], [], False, [])
+        # Le processus survit à l'exception
+        assert joueur.process is not None
+
+
+def test_crash_processus():
+    with JoueurIsole(JoueurQuiCrashe(), timeout=1) as joueur:
+        joueur.donner_main([0, 1, 2])
+        with pytest.raises(RuntimeError, match="arrêté"):
+            joueur.que_jouer([0, 1, 2], [], False, [])
+        assert joueur.process is None
+        joueur.tuer()
+
+
+def test_donner_main_processus_mort():
+    with JoueurIsole(DumbPlayer(), timeout=1) as joueur:
+        joueur.process.kill()
+        joueur.process.join()
+        # Le message ne part pas : le processus est marqué mort, puis relancé avec la main au prochain appel
+        joueur.donner_main([0, 1, 2])
+        assert joueur.process is None
+        assert joueur.que_jouer([0, 1, 2], [], False, []) == [0]
+        assert joueur.nb_redemarrages == 1
+
+
+def test_echanges_avec_le_timeout_de_la_partie():
+    # Le timeout du joueur isolé (3 s par défaut) est remplacé par celui de la partie
+    joueurs = [JoueurIsole(JoueurLent()), DumbPlayer(), DumbPlayer(), DumbPlayer()]
+    try:
+        debut = time.perf_counter()
+        Partie(
+            nb_joueurs=4, players=joueurs, role_players=["Prez", "Vice-Prez", "Vice-Trou", "Trou"],
+            save_events=False, timeout_players=TIMEOUT,
+        )
+        assert time.perf_counter() - debut < 1
+        assert joueurs[0].timeout == TIMEOUT
+    finally:
+        joueurs[0].fermer()
+
+
+def test_partie_avec_joueur_lent():
+    joueurs = [JoueurIsole(JoueurLent(), timeout=TIMEOUT), DumbPlayer(), DumbPlayer(), DumbPlayer()]
+    try:
+        p = Partie(
+            nb_joueurs=4,
+            players=joueurs,
+            role_players=["Prez", "Vice-Prez", "Vice-Trou", "Trou"],
+            save_events=False,
+            timeout_players=TIMEOUT,
+        )
+        p.play_whole_game_from_cards()
+    finally:
+        joueurs[0].fermer()
+    assert sorted(p.classement) == [0, 1, 2, 3]
+    assert p.timeouts_sieges[0] > 0
+    assert p.timeouts_sieges[1:] == [0, 0, 0]
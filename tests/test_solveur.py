@@ -0,0 +1,84 @@
+import random
+
+from president_game.etat import GameState
+from president_game.partie import Partie, paquet_modele
+from president_game.position import Position
+from president_game.solveur import EndgamePlayer, SolveurFinDePartie, canonique
+
+
+def position_de(mains, nb_exemplaires=4):
+    return Position(GameState.from_hands(mains, 13, nb_exemplaires))
+
+
+def test_canonique_renumerote_les_rangs():
+    # Mêmes mains à un décalage des rangs intermédiaires près
+    a = position_de([[2, 5], [7, 9], [5, 9]])
+    b = position_de([[1, 3], [6, 8], [3, 8]])
+    canonique_a, rangs_a = canonique(a)
+    canonique_b, rangs_b = canonique(b)
+    assert canonique_a.etat.mains == canonique_b.etat.mains
+    assert rangs_a[:5] == [0, 2, 5, 7, 9] and rangs_b[:5] == [0, 1, 3, 6, 8]
+    # Les rangs extrêmes restent à leur place
+    extremes = position_de([[0, 12], [4, 12], [0, 4]])
+    mains = canonique(extremes)[0].etat.mains
+    assert [mains[0][0], mains[0][12], mains[1][1]] == [1, 1, 1]
+    assert SolveurFinDePartie().ordre_restant(canonique_a) == SolveurFinDePartie().ordre_restant(a)
+
+
+def test_table_separe_les_nombres_d_exemplaires():
+    solveur = SolveurFinDePartie()
+    mains = [[3, 3], [5], [8]]
+    solveur.ordre_restant(position_de(mains, 4))
+    noeuds = solveur.noeuds
+    # Même position avec deux paquets : elle n'est pas lue dans la table, la recherche est refaite
+    solveur.ordre_restant(position_de(mains, 8))
+    assert solveur.noeuds - noeuds == noeuds
+
+
+def test_oubli_du_plus_ancien_quart():
+    solveur = SolveurFinDePartie(taille_max=8)
+    rng = random.Random(0)
+    for _ in range(20):
+        paquet = list(range(13)) * 4
+        rng.shuffle(paquet)
+        solveur.ordre_restant(position_de([sorted(paquet[i * 3: (i + 1) * 3]) for i in range(3)]))
+        assert len(solveur.table) <= 8
+    solveur.table = {cle: None for cle in range(8)}
+    solveur.oublier()
+    assert list(solveur.table) == list(range(2, 8))
+
+
+def test_stats():
+    solveur = SolveurFinDePartie()
+    position = position_de([[1, 4, 4], [2, 7], [3, 9, 9]])
+    ordre = solveur.ordre_restant(position)
+    premiere = solveur.stats()
+    assert premiere["noeuds"] > 0 and premiere["taille_table"] == premiere["requetes"] - premiere["succes"]
+    # La seconde recherche est lue dans la table
+    assert solveur.ordre_restant(position) == ordre
+    stats = solveur.stats()
+    assert stats["noeuds"] == premiere["noeuds"] + 1 and stats["succes"] == premiere["succes"] + 1
+    assert stats["taux_succes"] == solveur.succes / solveur.requetes
+    assert stats["noeuds_par_seconde"] > 0
+
+
+class EndgameEspion(EndgamePlayer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.cartes_vues = []
+
+    def que_jouer(self, main, cartes_plateau, risque_saut, historique_jeux):
+        if self.position is not None:
+            self.cartes_vues.append(sum(self.position.etat.tailles))
+        return super().que_jouer(main, cartes_plateau, risque_saut, historique_jeux)
+
+
+def test_position_seulement_sous_le_seuil():
+    players = [EndgameEspion(seuil_cartes=8, solveur=SolveurFinDePartie(), seed=0) for _ in range(4)]
+    assert not players[0].trusted
+    cards_shuffled = list(paquet_modele(13))
+    random.Random(0).shuffle(cards_shuffled)
+    p = Partie(nb_joueurs=4, players=players, cards_shuffled=cards_shuffled, save_events=False)
+    p.play_whole_game_from_cards()
+    cartes_vues = [nb for player in players for nb in player.cartes_vues]
+    assert cartes_vues and max(cartes_vues) <= 8
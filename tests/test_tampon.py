@@ -0,0 +1,106 @@
+import logging
+import os
+import sys
+
+import pytest
+
+from president_game.player import AggressivePlayer, DumbPlayer
+from president_game.statistiques import CriterePrecision
+from president_game.tampon import TamponResultats
+from president_game.tournoi import Tournoi, tables_equilibrees
+
+ROLES = ["Prez", "Vice-Prez", "Vice-Trou", "Trou"]
+POINTS = [3, 2, 1, 0]
+
+
+@pytest.fixture(autouse=True)
+def sans_logs():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+def segments():
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+
+def repartitions(resultats):
+    return (
+        resultats.nb_parties, resultats.nb_parties_jouees, resultats.repartition_sieges,
+        resultats.repartition_roles, resultats.repartition_joueurs,
+    )
+
+
+@pytest.mark.parametrize("moteur", ["partie", "batch"])
+@pytest.mark.parametrize("duplique", [True, False])
+@pytest.mark.parametrize("nb_workers", [1, 2])
+def test_memes_resultats_qu_avec_les_lots(moteur, duplique, nb_workers):
+    tables = tables_equilibrees([DumbPlayer, AggressivePlayer], ROLES)
+    avant = segments()
+    resultats = [
+        Tournoi(
+            tables, 10 * len(tables), seed=3, nb_workers=nb_workers, taille_lot=40, moteur=moteur, duplique=duplique,
+            memoire_partagee=memoire_partagee,
+        ).lancer()
+        for memoire_partagee in (False, True)
+    ]
+    assert resultats[0].tampon is None and resultats[1].tampon is not None
+    assert repartitions(resultats[0]) == repartitions(resultats[1])
+    if duplique:
+        noms = sorted(resultats[0].repartition_joueurs)
+        assert resultats[1].differences_appariees(POINTS, *noms) == pytest.approx(
+            resultats[0].differences_appariees(POINTS, *noms)
+        )
+        comparaisons = [resultat.comparaison(POINTS, *noms) for resultat in resultats]
+        assert comparaisons[1] == pytest.approx(comparaisons[0])
+    # Le segment partagé est supprimé à la fin du tournoi
+    assert segments() == avant
+
+
+def test_critere_arret():
+    tables = [([DumbPlayer] * 5, ["Neutre"] * 5)]
+    points = [1, 0, 0, 0, 0]
+    resultats = [
+        Tournoi(tables, 5000, seed=2, memoire_partagee=memoire_partagee).lancer(
+            CriterePrecision(lambda r: r.stats_sieges(points)[0], 0.05)
+        )
+        for memoire_partagee in (False, True)
+    ]
+    assert resultats[0].nb_parties < 5000
+    assert repartitions(resultats[0]) == repartitions(resultats[1])
+
+
+def test_ecriture_et_reductions():
+    with TamponResultats(3, 3, ["a", "b"], ["Neutre"]) as tampon:
+        tampon.ecrire(0, 0, ["a", "b", "b"], ["Neutre"] * 3, [2, 0, 1], 10, [1, 0, 0], donne=0)
+        tampon.ecrire(2, 0, ["b", "a", "a"], ["Neutre"] * 3, [0, 1, 2], 12, [0, 0, 2], donne=1)
+        # La partie 1 n'est pas jouée : elle est ignorée
+        par_siege, par_role, par_joueur = tampon.repartitions()
+        assert par_siege.tolist() == [[1, 1, 0], [0, 1, 1], [1, 0, 1]]
+        assert par_role.tolist() == [[2, 2, 2]]
+        assert par_joueur.tolist() == [[0, 2, 1], [2, 0, 1]]
+        assert tampon.timeouts_joueurs() == {"a": 3}
+        # Donne 0 : a 1 point, b (0 + 2) / 2. Donne 1 : a (1 + 0) / 2, b 2
+        assert tampon.differences_appariees([2, 1, 0], "a", "b").tolist() == [0., -1.5]
+        tampon.detacher()
+        assert tampon.memoire is None
+        assert tampon.repartitions()[0].sum() == 6
+
+
+def test_mesures_avec_le_tampon():
+    tables = [([DumbPlayer] * 4, ROLES)]
+    resultats = Tournoi(tables, 20, seed=1, taille_lot=8, mesurer=True, memoire_partagee=True).lancer()
+    assert resultats.nb_parties == 20 and resultats.nb_parties_jouees == 20
+    assert resultats.mesures is not None
+
+
+def test_sans_numpy(monkeypatch):
+    # L'import de tampon.py échoue comme si NumPy manquait : le tournoi revient aux résultats par lot
+    monkeypatch.setitem(sys.modules, "president_game.tampon", None)
+    tables = tables_equilibrees([DumbPlayer, AggressivePlayer], ROLES)
+    par_lot, repli = [
+        Tournoi(tables, 8 * len(tables), seed=4, taille_lot=16, memoire_partagee=memoire_partagee).lancer()
+        for memoire_partagee in (False, True)
+    ]
+    assert repli.tampon is None
+    assert repartitions(repli) == repartitions(par_lot)
@@ -0,0 +1,121 @@
+import logging
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from president_game.championnat import Championnat, Championnats, ResultatsChampionnats, roles_depuis_classement
+from president_game.cotes import CotesElo
+from president_game.player import AggressivePlayer, CheatPlayer, DumbPlayer
+from president_game.resultats import lire_colonnes
+from president_game.statistiques import CriterePrecision, Sprt, StatsEnLigne
+from president_game.tournoi import Tournoi, tables_equilibrees
+
+ROLES = ["Prez", "Vice-Prez", "Vice-Trou", "Trou"]
+
+
+@pytest.fixture(autouse=True)
+def sans_logs():
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.mark.parametrize("nb_fabriques, roles", [(2, ROLES), (3, ROLES), (2, ROLES + ["Neutre"]), (4, ROLES)])
+def test_tables_equilibrees(nb_fabriques, roles):
+    fabriques = [f"j{i}" for i in range(nb_fabriques)]
+    tables = tables_equilibrees(fabriques, roles)
+    assert len(tables) <= len(roles) ** 2 * nb_fabriques
+    # Chaque fabrique a chaque couple (siège, rôle) aussi souvent que les autres
+    comptes = Counter(
+        (fabrique, siege, role) for joueurs, roles_table in tables
+        for siege, (fabrique, role) in enumerate(zip(joueurs, roles_table))
+    )
+    assert len(set(comptes.values())) == 1
+    assert len(comptes) == nb_fabriques * len(roles) * len(set(roles))
+
+
+def test_memes_resultats_quel_que_soit_le_nombre_de_workers():
+    tables = tables_equilibrees([DumbPlayer, AggressivePlayer], ROLES)
+    resultats = [Tournoi(tables, 64, seed=5, nb_workers=nb_workers, taille_lot=16).lancer() for nb_workers in (1, 2)]
+    assert resultats[0].repartition_joueurs == resultats[1].repartition_joueurs
+    assert resultats[0].repartition_sieges == resultats[1].repartition_sieges
+
+
+def test_stats_en_ligne():
+    rng = random.Random(0)
+    valeurs = [rng.gauss(2, 3) for _ in range(1000)]
+    stats, moitie, autre_moitie = StatsEnLigne(), StatsEnLigne(), StatsEnLigne()
+    for i, valeur in enumerate(valeurs):
+        stats.ajouter(valeur)
+        (moitie if i % 2 else autre_moitie).ajouter(valeur)
+    moitie.fusionner(autre_moitie)
+    moyenne = sum(valeurs) / len(valeurs)
+    variance = sum((valeur - moyenne) ** 2 for valeur in valeurs) / (len(valeurs) - 1)
+    for s in (stats, moitie):
+        assert s.n == 1000 and s.moyenne == pytest.approx(moyenne) and s.variance == pytest.approx(variance)
+    bas, haut = stats.intervalle()
+    assert bas < moyenne < haut and haut - bas == pytest.approx(2 * 1.96 * math.sqrt(variance / 1000), rel=1e-3)
+    repartition = StatsEnLigne.depuis_repartition([3, 1], [1, 0])
+    assert (repartition.n, repartition.moyenne) == (4, 0.75)
+
+
+def test_criteres_arret():
+    stats = StatsEnLigne()
+    critere = CriterePrecision(lambda _: stats, 0.1, nb_min=10)
+    for valeur in (0., 1.) * 5:
+        stats.ajouter(valeur)
+    assert not critere(None)
+    for valeur in (0., 1.) * 200:
+        stats.ajouter(valeur)
+    assert critere(None)
+    # Un joueur qui gagne 9 fois sur 10 : H1 (p = 0.6) plutôt que H0 (p = 0.4)
+    sprt = Sprt(lambda nb: (9 * nb // 10, nb), 0.4, 0.6)
+    assert not sprt(5) and sprt(40) and sprt.decision == "H1"
+
+
+def test_cotes_elo(tmp_path):
+    tables = tables_equilibrees([DumbPlayer, CheatPlayer], ROLES)
+    Tournoi(tables, 4 * len(tables), seed=1, dossier_resultats=tmp_path / "resultats").lancer()
+    cotes = CotesElo()
+    cotes.ajouter_colonnes(lire_colonnes(tmp_path / "resultats"))
+    # Le tricheur finit toujours dernier
+    assert [nom for nom, _, _ in cotes.tableau()] == ["DumbP", "CheatP"]
+    assert cotes.cote("DumbP") > 1500 > cotes.cote("CheatP")
+    assert set(cotes.bonus_roles) == set(ROLES)
+    cotes.sauvegarder(tmp_path / "cotes.json")
+    relues = CotesElo.charger(tmp_path / "cotes.json")
+    assert relues.cotes == cotes.cotes and relues.nb_parties == cotes.nb_parties
+
+
+def test_cotes_provisoires():
+    cotes = CotesElo()
+    cotes.ajouter_resultat(["a", "b"], ["Neutre", "Neutre"], [0, 1])
+    # K provisoire : le premier gagne k_provisoire / 2 face à une cote égale
+    assert cotes.cote("a") == pytest.approx(1500 + cotes.k_provisoire / 2)
+    assert cotes.cote("a") + cotes.cote("b") == pytest.approx(3000)
+
+
+def test_championnat_roles_reportes():
+    players = [DumbPlayer(), AggressivePlayer(), DumbPlayer(), AggressivePlayer()]
+    resultats = ResultatsChampionnats(4)
+    championnat = Championnat(players, 5, rng=random.Random(0))
+    classement = championnat.jouer_manche(resultats)
+    assert championnat.role_players == roles_depuis_classement(classement)
+    assert championnat.role_players[classement[0]] == "Prez" and championnat.role_players[classement[-1]] == "Trou"
+    scores = championnat.jouer(resultats)
+    assert sum(scores) == 5 * sum(championnat.points)
+    assert resultats.nb_championnats == 1 and resultats.nb_parties_jouees == 5
+    # Quatre manches après la première, avec des rôles gagnés à la précédente
+    assert sum(sum(suivants.values()) for suivants in resultats.transitions.values()) == 4 * 4
+
+
+def test_championnats_independants_du_nombre_de_workers():
+    fabriques = [DumbPlayer, AggressivePlayer, DumbPlayer, AggressivePlayer]
+    resultats = [
+        Championnats(fabriques, 6, 3, seed=2, nb_workers=nb_workers, taille_lot=2).lancer() for nb_workers in (1, 2)
+    ]
+    assert resultats[0].scores_finaux == resultats[1].scores_finaux
+    assert resultats[0].transitions == resultats[1].transitions
+    assert len(resultats[0].scores_finaux) == 6